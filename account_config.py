@@ -295,11 +295,21 @@ def get_global_config():
     timeout_input = input("输入超时时间（秒，默认10）: ").strip()
     input_timeout = int(timeout_input) if timeout_input else 10
     
+    # 并发账号数
+    concurrent_input = input("同时执行的账号数（默认1，即逐个执行）: ").strip()
+    max_concurrent_accounts = int(concurrent_input) if concurrent_input else 1
+    
+    # 单个账号内并行的任务阶段数
+    phases_input = input("单个账号内同时执行的任务阶段数（默认4，输入1按原顺序逐个执行）: ").strip()
+    max_parallel_phases = int(phases_input) if phases_input else 4
+    
     # 获取第一个账号的个性化配置，提取全局配置项
     global_config = {
         "gift_items": gift_items,
         "auto_mode": auto_mode,
-        "input_timeout": input_timeout
+        "input_timeout": input_timeout,
+        "max_concurrent_accounts": max(1, max_concurrent_accounts),
+        "max_parallel_phases": max(1, max_parallel_phases)
     }
     
     # 从第一个账号的配置中获取默认值
@@ -363,6 +373,8 @@ def main():
     print(f"最大训练槽位: {config['max_train_slots']}")
     print(f"自动模式: {config['auto_mode']}")
     print(f"输入超时: {config['input_timeout']}秒")
+    print(f"并发账号数: {config['max_concurrent_accounts']}")
+    print(f"账号内并行阶段数: {config['max_parallel_phases']}")
     
     # 保存配置
     if save_config(config):
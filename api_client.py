@@ -0,0 +1,444 @@
+# api_client.py
+# 功能：统一的游戏接口客户端
+# 负责基础地址、Token 请求头、连接池（keep-alive）、默认超时、限流与自适应并发、只读接口缓存以及统一的成功判断
+import asyncio
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import get_rate_limiter
+from response_cache import get_response_cache
+
+try:
+    import aiohttp
+except ImportError:  # 未安装 aiohttp 时异步客户端退化为线程池执行同步请求
+    aiohttp = None
+
+BASE_URL = "https://q-jiang.myprint.top/api"
+SITE_ORIGIN = "https://q-jiang.myprint.top"
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 10
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/138.0.0.0 Safari/537.36"
+)
+
+# 接口 success 字段可能出现的"成功"取值
+SUCCESS_VALUES = [True, 1, "1", "true", "True"]
+
+# 表示登录状态失效的提示语
+AUTH_FAILURE_MESSAGES = ("未登录", "请先登录", "重新登录", "登录过期", "登录已过期", "登录失效", "token失效", "token过期")
+LOGIN_ENDPOINT = "user/login"
+
+# 登录失效时的重新登录回调：handler(旧token) -> 新token 或 None（由 token_store 注册）
+_reauth_handler = None
+
+
+def set_reauth_handler(handler):
+    """注册运行中 token 失效时的重新登录回调"""
+    global _reauth_handler
+    _reauth_handler = handler
+
+
+def is_auth_failure(status_code: int, text: str) -> bool:
+    """
+    判断响应是否为登录失效
+    :param status_code: HTTP 状态码
+    :param text: 响应内容
+    """
+    if status_code in (401, 403):
+        return True
+    if not text or ("登录" not in text and "token" not in text.lower()):
+        return False
+    try:
+        result = json.loads(text)
+    except ValueError:
+        return False
+    if not isinstance(result, dict) or is_success(result):
+        return False
+    if str(result.get("code")) in ("401", "403"):
+        return True
+    msg = str(result.get("msg", "")).lower()
+    return any(keyword.lower() in msg for keyword in AUTH_FAILURE_MESSAGES)
+
+
+def is_success(result) -> bool:
+    """
+    检查接口返回是否成功
+    success 和 code 同时存在时两者都要满足，只返回其中一个时以该字段为准
+    :param result: 接口返回的 JSON（dict）
+    :return: True/False
+    """
+    if not isinstance(result, dict):
+        return False
+    success = result.get("success")
+    code = result.get("code")
+    if success is None and code is None:
+        return False
+    if success is not None and success not in SUCCESS_VALUES:
+        return False
+    if code is not None and str(code) != "200":
+        return False
+    return True
+
+
+class QJiangClient:
+    """
+    游戏接口客户端
+    一个账号对应一个客户端，所有请求复用同一个 requests.Session 的连接池
+    """
+
+    def __init__(self, token=None, session=None, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        """
+        :param token: 登录 token（可稍后设置）
+        :param session: 复用已有的 requests.Session，不传则新建
+        :param timeout: 默认超时时间（秒）
+        :param pool_size: 连接池大小（同一账号内并发请求的上限）
+        """
+        self.session = session if session is not None else requests.Session()
+        self.timeout = timeout
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept": "application/json, text/plain, */*",
+            "Content-Type": "application/json",
+            "Origin": SITE_ORIGIN,
+            "Referer": SITE_ORIGIN + "/",
+            "Connection": "keep-alive",
+        })
+        self._token = None
+        self.token = token
+        self.retired_tokens = set()  # 自动重新登录前使用过的 token
+
+    @property
+    def token(self):
+        return self._token
+
+    @token.setter
+    def token(self, value):
+        self._token = value
+        if value:
+            self.session.headers["Token"] = value
+        else:
+            self.session.headers.pop("Token", None)
+
+    @staticmethod
+    def url(path: str) -> str:
+        """将接口路径（如 "user/login"）拼成完整地址，完整地址原样返回"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{BASE_URL}/{path.lstrip('/')}"
+
+    @staticmethod
+    def endpoint(path: str) -> str:
+        """将完整地址或接口路径统一为 "user/login" 形式（用于限流等按接口区分的逻辑）"""
+        if path.startswith(BASE_URL):
+            path = path[len(BASE_URL):]
+        return path.strip("/")
+
+    def request(self, path: str, payload=None, timeout=None, headers=None, reauth=True) -> requests.Response:
+        """
+        发送 POST 请求并返回原始响应（需要自行检查状态码的场景使用）
+        登录失效时自动重新登录并重发一次（需要 token_store 提供账号信息）
+        :param path: 接口路径
+        :param payload: JSON 请求体，None 表示不带请求体
+        :param timeout: 超时时间，默认使用客户端配置
+        :param headers: 额外的请求头
+        :param reauth: False 时不自动重新登录（探测 token 有效性时使用）
+        """
+        response = self._send(path, payload, timeout, headers)
+        if reauth and self.endpoint(path) != LOGIN_ENDPOINT and is_auth_failure(response.status_code, response.text):
+            if self._reauthenticate():
+                response = self._send(path, payload, timeout, headers)
+        return response
+
+    def _reauthenticate(self) -> bool:
+        """调用重新登录回调替换 token，成功返回 True"""
+        if _reauth_handler is None or not self.token:
+            return False
+        new_token = _reauth_handler(self.token)
+        if not new_token or new_token == self.token:
+            return False
+        # 调用方手里仍是旧 token，记下来避免 get_client 把新 token 换回去
+        self.retired_tokens.add(self.token)
+        self.token = new_token
+        return True
+
+    def _send(self, path: str, payload, timeout, headers) -> requests.Response:
+        # 先经过全局/账号/接口三级限流和自适应并发控制，结束后登记结果供 AIMD 调整并发
+        limiter = get_rate_limiter()
+        limiter.acquire(self.token, self.endpoint(path))
+        started = time.monotonic()
+        response = None
+        try:
+            response = self.session.post(
+                self.url(path),
+                json=payload,
+                headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+            )
+            return response
+        finally:
+            if response is None:
+                limiter.release(time.monotonic() - started, error=True)
+            else:
+                limiter.release(time.monotonic() - started, response.status_code, response.text)
+            # 写接口（即使超时也可能已生效）让相关的只读缓存失效
+            get_response_cache(self.token).on_request(self.endpoint(path))
+
+    def post(self, path: str, payload=None, timeout=None, headers=None, fresh=False, reauth=True):
+        """
+        发送 POST 请求并返回解析后的 JSON
+        只读接口（见 response_cache.DEFAULT_CACHE_TTL）的成功响应会被缓存，有效期内直接返回缓存
+        HTTP 错误会抛出 requests.exceptions.HTTPError，非 JSON 响应会抛出 ValueError
+        :param fresh: True 时忽略缓存强制请求（结果仍会写入缓存）
+        :param reauth: False 时不自动重新登录
+        """
+        endpoint = self.endpoint(path)
+        if not fresh:
+            cached = get_response_cache(self.token).get(endpoint, payload)
+            if cached is not None:
+                return cached
+        response = self.request(path, payload, timeout=timeout, headers=headers, reauth=reauth)
+        response.raise_for_status()
+        result = response.json()
+        if is_success(result):
+            # 重新登录后 token 已变化，缓存写到新 token 名下
+            get_response_cache(self.token).put(endpoint, payload, result)
+        return result
+
+    is_success = staticmethod(is_success)
+
+    def close(self):
+        self.session.close()
+
+
+_clients_lock = threading.Lock()
+_token_clients = {}
+
+
+def get_client(session=None, token=None) -> QJiangClient:
+    """
+    获取与 session / token 绑定的客户端
+    同一个 session 始终复用同一个客户端；没有 session 时按 token 复用，保证每个账号只建立一次连接
+    :param session: requests.Session、QJiangClient 或 AsyncQJiangClient（取其同步客户端），可为 None
+    :param token: 登录 token
+    """
+    if isinstance(session, QJiangClient):
+        client = session
+    elif isinstance(session, AsyncQJiangClient):
+        client = session.sync_client
+    elif session is not None:
+        client = getattr(session, "qjiang_client", None)
+        if client is None:
+            with _clients_lock:
+                client = getattr(session, "qjiang_client", None)
+                if client is None:
+                    client = QJiangClient(token, session=session)
+                    session.qjiang_client = client
+    else:
+        with _clients_lock:
+            client = _token_clients.get(token)
+            if client is None:
+                client = QJiangClient(token)
+                _token_clients[token] = client
+
+    if token and client.token != token and token not in client.retired_tokens:
+        client.token = token
+    return client
+
+
+class AsyncResponse:
+    """
+    异步请求的响应（接口与 requests.Response 常用部分一致，便于同步/异步代码共用判断逻辑）
+    """
+
+    def __init__(self, status_code: int, text: str, url: str = ""):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class AsyncQJiangClient:
+    """
+    asyncio 版游戏接口客户端
+    安装了 aiohttp 时所有请求都在事件循环线程内完成；未安装时退化为 asyncio.to_thread 调用同步客户端
+    网络错误统一转换为 requests.exceptions 中的异常，调用方的异常处理与同步版一致
+    """
+
+    def __init__(self, token=None, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        """
+        :param token: 登录 token
+        :param timeout: 默认超时时间（秒）
+        :param pool_size: 单个客户端同时保持的连接数上限
+        """
+        self.token = token
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._loop = None
+        self._sync_client = None
+        self.retired_tokens = set()  # 自动重新登录前使用过的 token
+
+    @property
+    def sync_client(self) -> QJiangClient:
+        """同一 token 的同步客户端（用于尚无异步版本的接口）"""
+        if self._sync_client is None:
+            self._sync_client = QJiangClient(self.token, pool_size=self.pool_size)
+        elif self._sync_client.token != self.token and self.token not in self._sync_client.retired_tokens:
+            self._sync_client.token = self.token
+        return self._sync_client
+
+    def _headers(self, headers=None):
+        merged = {
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Accept": "application/json, text/plain, */*",
+            "Content-Type": "application/json",
+            "Origin": SITE_ORIGIN,
+            "Referer": SITE_ORIGIN + "/",
+        }
+        if self.token:
+            merged["Token"] = self.token
+        if headers:
+            merged.update(headers)
+        return merged
+
+    def _get_session(self):
+        # aiohttp 的会话绑定创建它的事件循环，换了循环就重新创建
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+        return self._session
+
+    url = staticmethod(QJiangClient.url)
+    endpoint = staticmethod(QJiangClient.endpoint)
+    is_success = staticmethod(is_success)
+
+    async def request(self, path: str, payload=None, timeout=None, headers=None, reauth=True) -> AsyncResponse:
+        """
+        发送 POST 请求并返回响应（需要自行检查状态码的场景使用）
+        登录失效时自动重新登录并重发一次
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        if aiohttp is None:
+            # 同步客户端内部会做限流、缓存失效和重新登录
+            sync_client = self.sync_client
+            response = await asyncio.to_thread(
+                sync_client.request, path, payload, timeout=timeout, headers=headers, reauth=reauth
+            )
+            if sync_client.token != self.token:
+                self.retired_tokens.add(self.token)
+                self.token = sync_client.token
+            return AsyncResponse(response.status_code, response.text, response.url)
+
+        response = await self._send(path, payload, timeout, headers)
+        if reauth and self.endpoint(path) != LOGIN_ENDPOINT and is_auth_failure(response.status_code, response.text):
+            if await self._reauthenticate():
+                response = await self._send(path, payload, timeout, headers)
+        return response
+
+    async def _reauthenticate(self) -> bool:
+        if _reauth_handler is None or not self.token:
+            return False
+        new_token = await asyncio.to_thread(_reauth_handler, self.token)
+        if not new_token or new_token == self.token:
+            return False
+        self.retired_tokens.add(self.token)
+        self.token = new_token
+        return True
+
+    async def _send(self, path: str, payload, timeout, headers) -> AsyncResponse:
+        limiter = get_rate_limiter()
+        await limiter.acquire_async(self.token, self.endpoint(path))
+        url = self.url(path)
+        started = time.monotonic()
+        result = None
+        try:
+            async with self._get_session().post(
+                url,
+                json=payload,
+                headers=self._headers(headers),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as response:
+                text = await response.text()
+                result = AsyncResponse(response.status, text, url)
+                return result
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"请求超时: {url}") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(f"{e}") from e
+        finally:
+            if result is None:
+                limiter.release(time.monotonic() - started, error=True)
+            else:
+                limiter.release(time.monotonic() - started, result.status_code, result.text)
+            get_response_cache(self.token).on_request(self.endpoint(path))
+
+    async def post(self, path: str, payload=None, timeout=None, headers=None, fresh=False, reauth=True):
+        """
+        发送 POST 请求并返回解析后的 JSON（与同步客户端共用同一账号的只读接口缓存）
+        HTTP 错误会抛出 requests.exceptions.HTTPError，非 JSON 响应会抛出 ValueError
+        :param fresh: True 时忽略缓存强制请求
+        :param reauth: False 时不自动重新登录
+        """
+        endpoint = self.endpoint(path)
+        if not fresh:
+            cached = get_response_cache(self.token).get(endpoint, payload)
+            if cached is not None:
+                return cached
+        response = await self.request(path, payload, timeout=timeout, headers=headers, reauth=reauth)
+        response.raise_for_status()
+        result = response.json()
+        if is_success(result):
+            get_response_cache(self.token).put(endpoint, payload, result)
+        return result
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+_async_clients = {}
+
+
+def get_async_client(session=None, token=None) -> AsyncQJiangClient:
+    """
+    获取异步客户端，用法与 get_client 相同
+    :param session: AsyncQJiangClient，可为 None（按 token 复用）
+    :param token: 登录 token
+    """
+    if isinstance(session, AsyncQJiangClient):
+        client = session
+    else:
+        with _clients_lock:
+            client = _async_clients.get(token)
+            if client is None:
+                client = AsyncQJiangClient(token)
+                _async_clients[token] = client
+
+    if token and client.token != token and token not in client.retired_tokens:
+        client.token = token
+    return client
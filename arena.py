@@ -1,5 +1,7 @@
 # arena.py
 import requests
+from api_client import get_client
+from settings import get_account_settings
 import sys
 
 def print_and_flush(*args, **kwargs):
@@ -10,21 +12,12 @@ def get_user_info(session, token):
     """
     获取用户个人信息
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/userInfo"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
+        result = client.post("bas-assets/userInfo", {})
 
-        result = response.json()
-
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result["data"]
             user_info = data.get("userInfo", {})
             return user_info
@@ -46,23 +39,14 @@ def get_arena_rank_list(session, token):
         
     my_user_id = user_info.get("userId", 0)
     
-    url = "https://q-jiang.myprint.top/api/bas-assets/arenaRankList"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     data = {}  # 根据需要可以添加请求参数
 
     try:
         print_and_flush("🔍 正在获取擂台排行榜...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("bas-assets/arenaRankList", data)
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             # 修复数据结构问题 - 根据实际返回的数据结构调整
             if isinstance(result["data"], list):
                 rank_list = result["data"]
@@ -105,22 +89,13 @@ def get_arena_info(session, token):
     """
     获取用户擂台信息
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/arenaInfo"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取擂台信息...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
+        result = client.post("bas-assets/arenaInfo", {})
 
-        result = response.json()
-
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result["data"]
             user_arena = data.get("userArena", {})
             
@@ -152,22 +127,13 @@ def get_arena_award_list(session, token):
     """
     获取擂台积分可兑换物品列表
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/arenaAwardList"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取积分兑换物品列表...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("bas-assets/arenaAwardList", {})
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             award_list = result["data"]
             
             print_and_flush("✅ 积分兑换物品列表获取成功！")
@@ -210,22 +176,13 @@ def exchange_arena_goods(session, token, goods_id, num=1):
     :param goods_id: 物品ID
     :param num: 兑换数量，默认为1
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/exchangeArenaGoods"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     data = {"goodsId": goods_id, "num": num}
 
     try:
         print_and_flush(f"🔄 正在兑换物品 ID: {goods_id} (数量: {num})...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
+        result = client.post("bas-assets/exchangeArenaGoods", data)
+        if client.is_success(result):
             # 显示兑换后的剩余积分
             user_info = result.get("data", {}).get("userInfo", {})
             remaining_integral = user_info.get("integral", 0)
@@ -245,28 +202,20 @@ def exchange_arena_goods(session, token, goods_id, num=1):
         return False
 
 # ... existing code ...
-def auto_exchange_arena_goods(session, token, target_item=None, account_index=None):
+def auto_exchange_arena_goods(session, token, target_item=None, account_index=None, settings=None):
     """
     自动兑换擂台积分物品
     :param session: requests session
     :param token: 用户token
     :param target_item: 目标兑换物品信息，格式: {"id": 物品ID, "name": 物品名称, "points": 所需积分}
-    :param account_index: 账号索引，用于获取对应账号的配置
+    :param account_index: 账号索引，未传 settings 时用于获取对应账号的配置
+    :param settings: 账号配置（settings.AccountSettings）
     """
+    if settings is None:
+        settings = get_account_settings(account_index)
+
     # 检查是否启用了擂台兑换功能
-    try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-        
-        # 如果提供了账号索引，则使用该账号的配置
-        if account_index is not None and 0 <= account_index < len(config.get("accounts", [])):
-            enable_arena_exchange = config["accounts"][account_index]["config"].get("enable_arena_exchange", False)
-        else:
-            # 如果没有提供账号索引或索引无效，使用全局配置
-            enable_arena_exchange = config.get("enable_arena_exchange", False)
-    except Exception:
-        # 如果配置文件不存在或格式错误，使用默认值
-        enable_arena_exchange = False
+    enable_arena_exchange = settings.enable_arena_exchange
     
     # 如果未启用擂台兑换功能，则直接返回
     if not enable_arena_exchange:
@@ -284,23 +233,15 @@ def auto_exchange_arena_goods(session, token, target_item=None, account_index=No
     
     initial_integral = 0
     rank_list_response = None
-    url = "https://q-jiang.myprint.top/api/bas-assets/arenaRankList"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     
     try:
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-        rank_list_response = response.json()
+        rank_list_response = client.post("bas-assets/arenaRankList", {})
     except Exception as e:
         print_and_flush(f"❌ 获取排行榜信息失败: {e}")
         return False
     
-    if rank_list_response and rank_list_response.get("success") and rank_list_response.get("code") == "200":
+    if rank_list_response and client.is_success(rank_list_response):
         my_user_id = user_info.get("userId", 0)
         rank_list = rank_list_response["data"] if isinstance(rank_list_response["data"], list) else rank_list_response["data"].get("rankList", [])
         
@@ -321,14 +262,9 @@ def auto_exchange_arena_goods(session, token, target_item=None, account_index=No
     exchange_count = 0  # 兑换轮次计数
     
     while True:  # 循环兑换直到积分不足
-        # 获取用户当前积分
-        user_info = get_user_info(session, token)
-        if not user_info:
-            print_and_flush("❌ 无法获取用户信息")
-            return False
-        
+        # 获取用户当前积分（userId 不会变化，沿用循环前获取的用户信息）
         current_integral = 0
-        if rank_list_response and rank_list_response.get("success") and rank_list_response.get("code") == "200":
+        if rank_list_response and client.is_success(rank_list_response):
             my_user_id = user_info.get("userId", 0)
             rank_list = rank_list_response["data"] if isinstance(rank_list_response["data"], list) else rank_list_response["data"].get("rankList", [])
             
@@ -388,26 +324,8 @@ def auto_exchange_arena_goods(session, token, target_item=None, account_index=No
         
         # 如果未指定目标物品，则按优先级自动兑换
         else:
-            # 从配置文件获取兑换优先级，优先使用当前账号的配置
-            try:
-                with open("config.json", "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                
-                # 如果提供了账号索引，则使用该账号的配置
-                if account_index is not None and 0 <= account_index < len(config.get("accounts", [])):
-                    priority_list = config["accounts"][account_index]["config"].get("arena_exchange_priority", [
-                        {"id": 56, "name": "蓝武魂", "points": 1500}
-                    ])
-                else:
-                    # 如果没有提供账号索引或索引无效，使用全局配置
-                    priority_list = config.get("arena_exchange_priority", [
-                        {"id": 56, "name": "蓝武魂", "points": 1500}
-                    ])
-            except Exception:
-                # 如果配置文件不存在或格式错误，使用默认值
-                priority_list = [
-                    {"id": 56, "name": "蓝武魂", "points": 1500}
-                ]
+            # 兑换优先级（账号配置优先，其次全局配置）
+            priority_list = settings.arena_exchange_priority
             
             # 每轮只兑换一种物品
             exchanged = False
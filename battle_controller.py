@@ -2,11 +2,9 @@
 import sys
 import requests
 import os
-import json
 import traceback
 from typing import Optional, Any
 import io
-import time
 # 设置环境变量以确保UTF-8编码
 os.environ['PYTHONIOENCODING'] = 'utf-8'
 os.environ['PYTHONLEGACYWINDOWSFSENCODING'] = 'utf-8'
@@ -60,7 +58,7 @@ LEVEL_NAMES = {
 
 # 尝试导入登录模块
 try:
-    from login import login
+    from token_store import ensure_session_token  # 统一的token存储：优先复用已保存的有效token
     from customs_battle import customs_battle
 except ImportError as e:
     print_and_flush(f"模块导入失败: {e}")
@@ -68,85 +66,6 @@ except ImportError as e:
     traceback_print_and_flush_exc()
     exit(1)
 
-def load_token_from_cache(token_file: str):
-    """
-    从缓存文件中加载token
-    """
-    try:
-        if os.path.exists(token_file):
-            with open(token_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                token = data.get("token")
-                user_id = data.get("user_id")
-                if token:
-                    print_and_flush(f"✅ 从缓存加载token成功")
-                    return token, user_id
-    except Exception as e:
-        print_and_flush(f"⚠️ 读取token缓存失败: {e}")
-    return None, None
-
-def save_token_to_cache(token_file: str, token: str, user_id: str):
-    """
-    将token保存到缓存文件
-    """
-    try:
-        with open(token_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                "token": token,
-                "user_id": user_id,
-                "timestamp": time.time()
-            }, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print_and_flush(f"⚠️ 保存token到缓存失败: {e}")
-
-def ensure_session_token(session: requests.Session, tel: str, pwd: str, token_file: str):
-    """
-    确保 session 中有有效的 token，并返回 user_id
-    """
-    # 首先尝试从缓存加载token
-    token, user_id = load_token_from_cache(token_file)
-    if token:
-        print_and_flush("🌐 使用缓存的token")
-        return session, token, user_id
-    
-    # 如果缓存中没有token，则执行登录
-    print_and_flush("🔐 正在登录...")
-    try:
-        login_result = login(tel, pwd)
-        if login_result:
-            new_token = None
-            new_user_id = None
-
-            if isinstance(login_result, dict):
-                new_token = login_result.get("token") or (login_result.get("data") or {}).get("token")
-                new_user_id = login_result.get("user_id") or (login_result.get("data") or {}).get("user_id")
-            elif isinstance(login_result, (list, tuple)) and len(login_result) > 0:
-                new_token = login_result[0]
-                if len(login_result) > 1:
-                    new_user_id = login_result[1]
-            elif isinstance(login_result, str):
-                new_token = login_result
-
-            if not isinstance(new_user_id, (str, int)) or not str(new_user_id).strip():
-                print_and_flush("登录成功但未返回有效 user_id")
-                new_user_id = None
-
-            if new_token:
-                print_and_flush(f"✅ 登录成功！")
-                # 保存token到缓存
-                save_token_to_cache(token_file, new_token, new_user_id)
-                return session, new_token, new_user_id
-            else:
-                print_and_flush("❌ 登录未返回有效 token")
-        else:
-            print_and_flush("❌ 登录失败")
-    except Exception as e:
-        print_and_flush(f"❌ 登录过程出错: {e}")
-        traceback_print_and_flush_exc()
-
-    print_and_flush("❌ 无法获取 token，程序终止。")
-    return session, None, None
-
 def get_user_input():
     """
     获取用户输入的战斗配置
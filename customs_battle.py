@@ -1,7 +1,7 @@
 import json
-import requests
 import time
 import sys
+from api_client import get_client, get_async_client
 
 # 难度映射表
 DIFFICULTY_MAP = {
@@ -33,13 +33,6 @@ def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
     sys.stdout.flush()
 
-def check_response_success(response_data):
-    """检查API响应是否成功"""
-    if not isinstance(response_data, dict):
-        return False
-    return (response_data.get("success") is True and 
-            str(response_data.get("code")) == "200")
-
 def extract_uuid_from_reward(response_data):
     """从响应数据中提取UUID"""
     try:
@@ -55,21 +48,20 @@ def extract_uuid_from_reward(response_data):
         pass
     return None
 
-def luck_draw_later(uuid_value, bcId, token):
+def luck_draw_later(uuid_value, bcId, token, session=None):
     """邮件抽奖功能"""
     if not uuid_value:
         print_and_flush("📧 无有效UUID，跳过邮件抽奖")
         return False
 
-    url = "https://q-jiang.myprint.top/api/bas-checkpoint/luckDrawLater"
-    headers = {"Token": token}
+    client = get_client(session, token)
     data = {"uuid": uuid_value, "bcId": bcId}
 
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=10)
+        response = client.request("bas-checkpoint/luckDrawLater", data)
         if response.status_code == 200:
             result = response.json()
-            if check_response_success(result):
+            if client.is_success(result):
                 print_and_flush("✅ 稍后抽奖成功，奖励已存入邮件")
                 return True
             else:
@@ -84,21 +76,121 @@ def customs_battle(session, token, user_id, total_times=10, diff=3, level=8):
 
     print_and_flush(f"\n📝 战斗参数：难度={DIFFICULTY_MAP.get(diff, '未知')} 关卡={LEVEL_NAMES.get(level, '未知')} 次数={total_times}")
     print_and_flush("-" * 50)
-    # ... 其余代码保持不变
+    client = get_client(session, token)
+
+    for t in range(1, total_times + 1):
+        print_and_flush(f"🚀 第 {t}/{total_times} 次挑战开始")
+
+        # 请求1：进入关卡第一步
+        try:
+            start_response = client.request("bas-checkpoint/startCustoms", {"bcId": bcId})
+            if not client.is_success(start_response.json()):
+                print_and_flush("❌ 进入关卡第一步失败，结束挑战")
+                break
+        except Exception as e:
+            print_and_flush(f"❌ 请求1异常: {e}")
+            break
+
+        # 请求2：进入关卡第二步
+        try:
+            defender_response = client.request("bas-checkpoint/checkpointDefender", {"bcId": bcId})
+            if not client.is_success(defender_response.json()):
+                print_and_flush("❌ 进入关卡第二步失败，结束挑战")
+                break
+        except Exception as e:
+            print_and_flush(f"❌ 请求2异常: {e}")
+            break
+
+        # 四小节战斗
+        battle_failed = False
+        fourth_battle_result = None
+
+        for sec in range(4):
+            enemyId = -(1000 + (bcId - 1) * 4 + sec)
+            try:
+                stage_response = client.request("battle/customs", {"bcId": bcId, "enemyId": enemyId})
+                result = stage_response.json()
+                if not client.is_success(result):
+                    print_and_flush(f"❌ 第{sec+1}小节战斗失败，本轮结束")
+                    battle_failed = True
+                    break
+                else:
+                    print_and_flush(f"✅ 第{sec+1}小节胜利")
+                    if sec == 3:
+                        fourth_battle_result = result
+            except Exception as e:
+                print_and_flush(f"❌ 第{sec+1}小节异常: {e}")
+                battle_failed = True
+                break
+
+        if battle_failed:
+            break  # 本轮失败直接结束整个挑战
+
+        # 检查第四节 UUID
+        uuid_value = extract_uuid_from_reward(fourth_battle_result) if fourth_battle_result else None
+        if not uuid_value:
+            print_and_flush("⚠️ 未找到抽奖UUID，尝试重打一遍第四小节")
+            # 重打一遍第四节
+            enemyId = -(1000 + (bcId - 1) * 4 + 3)
+            try:
+                retry_response = client.request("battle/customs", {"bcId": bcId, "enemyId": enemyId})
+                retry_result = retry_response.json()
+                if client.is_success(retry_result):
+                    print_and_flush("✅ 重打第四小节胜利")
+                    uuid_value = extract_uuid_from_reward(retry_result)
+            except Exception as e:
+                print_and_flush(f"❌ 重打第四小节异常: {e}")
+
+        if uuid_value:
+            luck_draw_later(uuid_value, bcId, token, session=session)
+        else:
+            print_and_flush("❌ 两次第四小节都未拿到UUID，结束挑战")
+            break
+
+    print_and_flush("🎉 挑战流程结束！")
+
+
+# ==================== 异步版本 ====================
+async def luck_draw_later_async(uuid_value, bcId, token, session=None):
+    """邮件抽奖功能（异步版）"""
+    if not uuid_value:
+        print_and_flush("📧 无有效UUID，跳过邮件抽奖")
+        return False
+
+    client = get_async_client(session, token)
+    data = {"uuid": uuid_value, "bcId": bcId}
+
+    try:
+        response = await client.request("bas-checkpoint/luckDrawLater", data)
+        if response.status_code == 200:
+            result = response.json()
+            if client.is_success(result):
+                print_and_flush("✅ 稍后抽奖成功，奖励已存入邮件")
+                return True
+            else:
+                print_and_flush(f"❌ 邮件抽奖失败: {result.get('msg', '未知错误')}")
+    except Exception as e:
+        print_and_flush(f"❌ 邮件抽奖异常: {e}")
+    return False
+
+async def customs_battle_async(session, token, user_id, total_times=10, diff=3, level=8):
+    """
+    闯关（异步版，流程与 customs_battle 相同，session 传 AsyncQJiangClient 或 None）
+    """
+    # 使用传入的参数，而不是硬编码
+    bcId = diff * 8 + level
+
+    print_and_flush(f"\n📝 战斗参数：难度={DIFFICULTY_MAP.get(diff, '未知')} 关卡={LEVEL_NAMES.get(level, '未知')} 次数={total_times}")
+    print_and_flush("-" * 50)
+    client = get_async_client(session, token)
 
     for t in range(1, total_times + 1):
         print_and_flush(f"🚀 第 {t}/{total_times} 次挑战开始")
-        common_headers = {"Token": token}
 
         # 请求1：进入关卡第一步
         try:
-            start_response = requests.post(
-                "https://q-jiang.myprint.top/api/bas-checkpoint/startCustoms",
-                json={"bcId": bcId},
-                headers=common_headers,
-                timeout=10
-            )
-            if not check_response_success(start_response.json()):
+            start_response = await client.request("bas-checkpoint/startCustoms", {"bcId": bcId})
+            if not client.is_success(start_response.json()):
                 print_and_flush("❌ 进入关卡第一步失败，结束挑战")
                 break
         except Exception as e:
@@ -107,13 +199,8 @@ def customs_battle(session, token, user_id, total_times=10, diff=3, level=8):
 
         # 请求2：进入关卡第二步
         try:
-            defender_response = requests.post(
-                "https://q-jiang.myprint.top/api/bas-checkpoint/checkpointDefender",
-                json={"bcId": bcId},
-                headers=common_headers,
-                timeout=10
-            )
-            if not check_response_success(defender_response.json()):
+            defender_response = await client.request("bas-checkpoint/checkpointDefender", {"bcId": bcId})
+            if not client.is_success(defender_response.json()):
                 print_and_flush("❌ 进入关卡第二步失败，结束挑战")
                 break
         except Exception as e:
@@ -127,14 +214,9 @@ def customs_battle(session, token, user_id, total_times=10, diff=3, level=8):
         for sec in range(4):
             enemyId = -(1000 + (bcId - 1) * 4 + sec)
             try:
-                stage_response = requests.post(
-                    "https://q-jiang.myprint.top/api/battle/customs",
-                    json={"bcId": bcId, "enemyId": enemyId},
-                    headers=common_headers,
-                    timeout=10
-                )
+                stage_response = await client.request("battle/customs", {"bcId": bcId, "enemyId": enemyId})
                 result = stage_response.json()
-                if not check_response_success(result):
+                if not client.is_success(result):
                     print_and_flush(f"❌ 第{sec+1}小节战斗失败，本轮结束")
                     battle_failed = True
                     break
@@ -146,7 +228,6 @@ def customs_battle(session, token, user_id, total_times=10, diff=3, level=8):
                 print_and_flush(f"❌ 第{sec+1}小节异常: {e}")
                 battle_failed = True
                 break
-            time.sleep(0.1)  # 加快间隔
 
         if battle_failed:
             break  # 本轮失败直接结束整个挑战
@@ -158,23 +239,18 @@ def customs_battle(session, token, user_id, total_times=10, diff=3, level=8):
             # 重打一遍第四节
             enemyId = -(1000 + (bcId - 1) * 4 + 3)
             try:
-                retry_response = requests.post(
-                    "https://q-jiang.myprint.top/api/battle/customs",
-                    json={"bcId": bcId, "enemyId": enemyId},
-                    headers=common_headers,
-                    timeout=10
-                )
+                retry_response = await client.request("battle/customs", {"bcId": bcId, "enemyId": enemyId})
                 retry_result = retry_response.json()
-                if check_response_success(retry_result):
+                if client.is_success(retry_result):
                     print_and_flush("✅ 重打第四小节胜利")
                     uuid_value = extract_uuid_from_reward(retry_result)
             except Exception as e:
                 print_and_flush(f"❌ 重打第四小节异常: {e}")
 
         if uuid_value:
-            luck_draw_later(uuid_value, bcId, token)
+            await luck_draw_later_async(uuid_value, bcId, token, session=session)
         else:
             print_and_flush("❌ 两次第四小节都未拿到UUID，结束挑战")
             break
 
-    print_and_flush("🎉 挑战流程结束！")
\ No newline at end of file
+    print_and_flush("🎉 挑战流程结束！")
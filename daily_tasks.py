@@ -1,7 +1,7 @@
 # daily_tasks.py
 import requests
+from api_client import get_client, get_async_client
 import json
-import time
 from typing import List, Dict, Any
 import sys
 def print_and_flush(*args, **kwargs):
@@ -19,30 +19,52 @@ def get_daily_tasks(session: requests.Session, token: str) -> List[Dict[str, Any
     Returns:
         任务列表
     """
-    url = "https://q-jiang.myprint.top/api/activity/getRiChangRenWu"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     
     try:
-        response = session.post(url, headers=headers, json={}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # 检查响应是否成功
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            
-            # 从data字段中提取任务列表
-            if isinstance(data.get("data"), list):
-                return data.get("data")
+        data = client.post("activity/getRiChangRenWu", {})
+        return _parse_daily_tasks(client, data)
             
-            print_and_flush(f"❌ 获取日常任务失败: 数据格式不正确")
-            return []
-        else:
-            print_and_flush(f"❌ 获取日常任务失败: {data.get('msg', '未知错误')}")
-            return []
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except json.JSONDecodeError as e:
+        print_and_flush(f"⚠️ JSON解析错误: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 获取日常任务时发生未知错误: {e}")
+    
+    return []
+
+def _parse_daily_tasks(client, data) -> List[Dict[str, Any]]:
+    """解析日常任务列表接口的返回（同步/异步共用）"""
+    # 检查响应是否成功
+    if client.is_success(data):
+        
+        # 从data字段中提取任务列表
+        if isinstance(data.get("data"), list):
+            return data.get("data")
+        
+        print_and_flush(f"❌ 获取日常任务失败: 数据格式不正确")
+        return []
+    else:
+        print_and_flush(f"❌ 获取日常任务失败: {data.get('msg', '未知错误')}")
+        return []
+
+async def get_daily_tasks_async(session, token: str) -> List[Dict[str, Any]]:
+    """
+    获取日常任务列表（异步版，返回值与 get_daily_tasks 相同）
+    
+    Args:
+        session: AsyncQJiangClient，可为 None
+        token: 用户认证token
+    
+    Returns:
+        任务列表
+    """
+    client = get_async_client(session, token)
+    
+    try:
+        data = await client.post("activity/getRiChangRenWu", {})
+        return _parse_daily_tasks(client, data)
             
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
@@ -112,25 +134,47 @@ def claim_task_reward(session: requests.Session, token: str, ma_id: int) -> bool
     Returns:
         是否成功领取奖励
     """
-    url = "https://q-jiang.myprint.top/api/activity/receiveRiChangRenWu"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     payload = {"maId": ma_id}
     
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 任务 {ma_id} 奖励领取成功: {data.get('msg', '')}")
-            return True
-        else:
-            print_and_flush(f"❌ 任务 {ma_id} 奖励领取失败: {data.get('msg', '未知错误')}")
-            return False
+        data = client.post("activity/receiveRiChangRenWu", payload)
+        return _check_claim_result(client, data, ma_id)
+            
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 领取任务奖励时发生未知错误: {e}")
+    
+    return False
+
+def _check_claim_result(client, data, ma_id: int) -> bool:
+    """检查领取任务奖励接口的返回（同步/异步共用）"""
+    if client.is_success(data):
+        print_and_flush(f"✅ 任务 {ma_id} 奖励领取成功: {data.get('msg', '')}")
+        return True
+    else:
+        print_and_flush(f"❌ 任务 {ma_id} 奖励领取失败: {data.get('msg', '未知错误')}")
+        return False
+
+async def claim_task_reward_async(session, token: str, ma_id: int) -> bool:
+    """
+    领取任务奖励（异步版）
+    
+    Args:
+        session: AsyncQJiangClient，可为 None
+        token: 用户认证token
+        ma_id: 任务ID
+    
+    Returns:
+        是否成功领取奖励
+    """
+    client = get_async_client(session, token)
+    payload = {"maId": ma_id}
+    
+    try:
+        data = await client.post("activity/receiveRiChangRenWu", payload)
+        return _check_claim_result(client, data, ma_id)
             
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
@@ -157,40 +201,82 @@ def claim_all_available_rewards(session: requests.Session, token: str) -> None:
     claimed_count = 0
     for task in tasks:
         try:
-            do_num = task.get("doNum", 0)  # 可领取次数
-            ma_id = task.get("maId", 0)
-            name = task.get("name", "未知任务")
-            receive_num = task.get("receiveNum", 0)  # 已领取次数
-            receive_limit_num = task.get("receiveLimitNum", 1)  # 最多可领取次数
+            ma_id, actual_claim_times = _claimable_times(task)
             
-            # 检查是否还可以领取奖励
-            # 条件1: 有可领取次数 (do_num > 0)
-            # 条件2: 还未达到领取上限 (receive_num < receive_limit_num)
-            # 条件3: 任务ID有效
-            if do_num > 0 and receive_num < receive_limit_num and ma_id != 0:
-                print_and_flush(f"📥 正在领取任务 '{name}' 的奖励...")
-                # 计算还能领取的次数，取 do_num 和剩余可领次数的较小值
-                remaining_limit = receive_limit_num - receive_num
-                actual_claim_times = min(do_num, remaining_limit)
-                
-                # 根据可领取次数循环领取
-                for i in range(actual_claim_times):
-                    print_and_flush(f"  -> 第 {i+1} 次领取...")
-                    if not claim_task_reward(session, token, ma_id):
-                        break  # 领取失败则停止
-                    claimed_count += 1
-                    # 短暂延迟避免请求过于频繁
-                    time.sleep(0.5)
-            elif do_num > 0 and receive_num >= receive_limit_num:
-                print_and_flush(f"⏭️ 任务 '{name}' 已达到领取上限 ({receive_num}/{receive_limit_num})，跳过领取")
+            # 根据可领取次数循环领取
+            for i in range(actual_claim_times):
+                print_and_flush(f"  -> 第 {i+1} 次领取...")
+                if not claim_task_reward(session, token, ma_id):
+                    break  # 领取失败则停止
+                claimed_count += 1
         except Exception as e:
             print_and_flush(f"⚠️ 处理任务 {task.get('name', '未知')} 时出错: {e}")
     
+    _print_claim_summary(claimed_count)
+
+def _claimable_times(task: Dict[str, Any]):
+    """
+    计算单个任务还能领取几次奖励（同步/异步共用）
+    
+    Returns:
+        (ma_id, 可领取次数)
+    """
+    do_num = task.get("doNum", 0)  # 可领取次数
+    ma_id = task.get("maId", 0)
+    name = task.get("name", "未知任务")
+    receive_num = task.get("receiveNum", 0)  # 已领取次数
+    receive_limit_num = task.get("receiveLimitNum", 1)  # 最多可领取次数
+    
+    # 检查是否还可以领取奖励
+    # 条件1: 有可领取次数 (do_num > 0)
+    # 条件2: 还未达到领取上限 (receive_num < receive_limit_num)
+    # 条件3: 任务ID有效
+    if do_num > 0 and receive_num < receive_limit_num and ma_id != 0:
+        print_and_flush(f"📥 正在领取任务 '{name}' 的奖励...")
+        # 计算还能领取的次数，取 do_num 和剩余可领次数的较小值
+        remaining_limit = receive_limit_num - receive_num
+        return ma_id, min(do_num, remaining_limit)
+    elif do_num > 0 and receive_num >= receive_limit_num:
+        print_and_flush(f"⏭️ 任务 '{name}' 已达到领取上限 ({receive_num}/{receive_limit_num})，跳过领取")
+    return ma_id, 0
+
+def _print_claim_summary(claimed_count: int):
     if claimed_count > 0:
         print_and_flush(f"✅ 共领取了 {claimed_count} 个任务奖励")
     else:
         print_and_flush("🔍 没有可领取的任务奖励")
 
+async def claim_all_available_rewards_async(session, token: str) -> None:
+    """
+    领取所有可领取的任务奖励（异步版，等待期间不占用线程）
+    
+    Args:
+        session: AsyncQJiangClient，可为 None
+        token: 用户认证token
+    """
+    print_and_flush("🎁 正在检查可领取的日常任务奖励...")
+    tasks = await get_daily_tasks_async(session, token)
+    
+    if not tasks:
+        print_and_flush("⚠️ 暂无日常任务或获取失败")
+        return
+    
+    claimed_count = 0
+    for task in tasks:
+        try:
+            ma_id, actual_claim_times = _claimable_times(task)
+            
+            # 根据可领取次数循环领取
+            for i in range(actual_claim_times):
+                print_and_flush(f"  -> 第 {i+1} 次领取...")
+                if not await claim_task_reward_async(session, token, ma_id):
+                    break  # 领取失败则停止
+                claimed_count += 1
+        except Exception as e:
+            print_and_flush(f"⚠️ 处理任务 {task.get('name', '未知')} 时出错: {e}")
+    
+    _print_claim_summary(claimed_count)
+
 def display_daily_tasks(session: requests.Session, token: str):
     """
     获取并显示日常任务
@@ -3,69 +3,61 @@ import requests
 import json
 import time
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from collections import OrderedDict
 import sys
+import threading
+import contextvars
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from api_client import get_client, get_async_client
+from unprocessable_store import get_unprocessable_store
 
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
     sys.stdout.flush()
 
-# 抽奖追踪器
-lottery_tracker = {
-    "total_draws": 0,
-    "rewards": [],
-    "draw_history": []
-}
+# 抽奖追踪器（按上下文隔离，多账号并发时无论线程还是协程都互不干扰）
+_lottery_tracker = contextvars.ContextVar("lottery_tracker", default=None)
+
+# 当前处理的账号（无法处理邮件记录按账号保存）；批量操作期间只记录缓存有变化，结束时统一写一次文件
+_cache_scope = contextvars.ContextVar("unprocessable_cache_scope", default=None)
 
-# 缓存文件路径
-CACHE_FILE_PATH = "unprocessable_emails_cache.json"
+def _new_lottery_tracker():
+    return {
+        "total_draws": 0,
+        "rewards": [],
+        "draw_history": []
+    }
 
-# 无法处理的邮件缓存
-unprocessable_emails_cache = set()
+def get_lottery_tracker():
+    """获取当前账号（线程/协程）的抽奖记录"""
+    tracker = _lottery_tracker.get()
+    if tracker is None:
+        tracker = _new_lottery_tracker()
+        _lottery_tracker.set(tracker)
+    return tracker
 
 def load_cache_from_file():
-    """从文件加载缓存"""
-    global unprocessable_emails_cache
-    try:
-        if os.path.exists(CACHE_FILE_PATH):
-            with open(CACHE_FILE_PATH, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-                unprocessable_emails_cache = set(cache_data.get("unprocessable_emails", []))
-            print_and_flush(f"✅ 已从文件加载 {len(unprocessable_emails_cache)} 个无法处理的邮件ID")
-        else:
-            print_and_flush("📝 缓存文件不存在，将创建新的缓存文件")
-    except Exception as e:
-        print_and_flush(f"⚠️ 读取缓存文件时出错: {e}")
-        unprocessable_emails_cache = set()
+    """读取当前账号的无法处理邮件记录（平时首次用到时自动读取）"""
+    store = _current_store()
+    print_and_flush(f"✅ 已加载 {len(store)} 个无法处理的邮件ID")
 
 def save_cache_to_file():
-    """将缓存保存到文件"""
-    try:
-        cache_data = {
-            "unprocessable_emails": list(unprocessable_emails_cache),
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        with open(CACHE_FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        print_and_flush(f"✅ 已将 {len(unprocessable_emails_cache)} 个无法处理的邮件ID 保存到文件")
-    except Exception as e:
-        print_and_flush(f"⚠️ 保存缓存文件时出错: {e}")
+    """把当前账号无法处理邮件记录的修改追加写入文件"""
+    written = _current_store().flush()
+    if written:
+        print_and_flush(f"✅ 已将 {written} 条无法处理邮件记录写入文件")
 
 def reset_lottery_tracker():
     """重置抽奖记录"""
-    global lottery_tracker
-    lottery_tracker = {
-        "total_draws": 0,
-        "rewards": [],
-        "draw_history": []
-    }
+    _lottery_tracker.set(_new_lottery_tracker())
 
 def record_lottery_result(email_id: int, title: str, reward: str):
     """记录抽奖结果"""
-    global lottery_tracker
+    lottery_tracker = get_lottery_tracker()
     lottery_tracker["total_draws"] += 1
     lottery_tracker["rewards"].append(reward)
     lottery_tracker["draw_history"].append({
@@ -77,7 +69,7 @@ def record_lottery_result(email_id: int, title: str, reward: str):
 
 def display_lottery_summary():
     """展示抽奖总结"""
-    global lottery_tracker
+    lottery_tracker = get_lottery_tracker()
     if lottery_tracker["total_draws"] == 0:
         print_and_flush("🎲 本次运行没有进行抽奖")
         return
@@ -101,24 +93,184 @@ def display_lottery_summary():
         print_and_flush(f"  {record['draw_number']}. 邮件'{record['email_title']}' 获得: {record['reward']}")
     print_and_flush("="*40)
 
+def _account_for(token) -> str:
+    """token 对应的账号（手机号），未知时返回 None"""
+    try:
+        from token_store import get_token_store
+        return get_token_store().owner(token)
+    except Exception:
+        return None
+
+def _current_store():
+    scope = _cache_scope.get()
+    return get_unprocessable_store(scope["account"] if scope else None)
+
+def _cache_changed():
+    """缓存有变化：批量操作中先记下，否则立即写入文件"""
+    scope = _cache_scope.get()
+    if scope is not None:
+        scope["dirty"] = True
+    else:
+        save_cache_to_file()
+
+@contextmanager
+def batched_cache_writes(token: str = None):
+    """
+    在此范围内对无法处理缓存的读写都属于 token 对应的账号，修改只在结束时写一次文件
+    （嵌套时由最外层写入；token 为 None 时沿用外层的账号）
+    """
+    outer = _cache_scope.get()
+    if outer is not None and (token is None or outer["token"] == token):
+        yield
+        return
+    if token is None and outer is None:
+        scope = {"account": None, "token": None, "dirty": False}
+    elif token is None:
+        scope = dict(outer, dirty=False)
+    else:
+        scope = {"account": _account_for(token), "token": token, "dirty": False}
+    reset_token = _cache_scope.set(scope)
+    try:
+        yield
+    finally:
+        _cache_scope.reset(reset_token)
+        if scope["dirty"]:
+            written = get_unprocessable_store(scope["account"]).flush()
+            if written:
+                print_and_flush(f"✅ 已将 {written} 条无法处理邮件记录写入文件")
+
 def add_to_unprocessable_cache(email_id: int):
-    """将邮件添加到无法处理的缓存中"""
-    global unprocessable_emails_cache
-    unprocessable_emails_cache.add(email_id)
+    """将邮件添加到无法处理的缓存中（记下邮件的过期日期，过期后自动淘汰）"""
+    scope = _cache_scope.get()
+    invalid_day = None
+    if scope and scope["token"]:
+        email = get_email_snapshot(scope["token"]).get(email_id)
+        invalid_day = (email or {}).get("invalidDay")
+    _current_store().add(email_id, invalid_day)
     print_and_flush(f"📝 邮件 {email_id} 已添加到无法处理缓存中")
-    save_cache_to_file()  # 保存到文件
+    _cache_changed()  # 保存到文件
+
+def remove_from_unprocessable_cache(email_id: int):
+    """从无法处理的缓存中移除邮件（如果存在）"""
+    if _current_store().discard(email_id):
+        _cache_changed()  # 保存到文件
 
 def is_in_unprocessable_cache(email_id: int) -> bool:
     """检查邮件是否在无法处理的缓存中"""
-    return email_id in unprocessable_emails_cache
+    return _current_store().contains(email_id)
 
 def clear_unprocessable_cache():
-    """清空无法处理的邮件缓存"""
-    global unprocessable_emails_cache
-    unprocessable_emails_cache.clear()
+    """清空当前账号的无法处理邮件缓存"""
+    _current_store().clear()
     print_and_flush("🧹 无法处理邮件缓存已清空")
     save_cache_to_file()  # 保存到文件
 
+# 邮件列表快照：超过有效期后重新获取
+EMAIL_SNAPSHOT_MAX_AGE = 300
+# 领取/删除失败时，这些提示说明邮件状态已经和快照不一致，下次读取时重新获取
+STALE_EMAIL_MESSAGES = ("不存在", "已删除", "已领取", "已被领取")
+
+
+class EmailSnapshot:
+    """
+    单个账号的邮件列表快照
+    一次获取后由领取、抽奖、删除在本地更新，展示、领取、删除各阶段都从这里读取；
+    只有超过有效期、或接口返回说明邮件状态已变化时才重新获取
+    """
+
+    def __init__(self):
+        self._emails = None
+        self._fetched_at = 0
+        self._lock = threading.Lock()
+
+    def fresh(self) -> bool:
+        with self._lock:
+            return self._emails is not None and time.time() - self._fetched_at <= EMAIL_SNAPSHOT_MAX_AGE
+
+    def replace(self, emails):
+        """用接口刚返回的完整列表替换快照"""
+        with self._lock:
+            self._emails = OrderedDict((email.get("id"), dict(email)) for email in emails)
+            self._fetched_at = time.time()
+
+    def emails(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(email) for email in (self._emails or {}).values()]
+
+    def contains(self, email_id) -> bool:
+        with self._lock:
+            return self._emails is not None and email_id in self._emails
+
+    def get(self, email_id):
+        """快照中的邮件副本，没有时返回 None"""
+        with self._lock:
+            email = (self._emails or {}).get(email_id)
+            return dict(email) if email is not None else None
+
+    def mark_claimed(self, email_id):
+        with self._lock:
+            if self._emails and email_id in self._emails:
+                self._emails[email_id]["receiveIs"] = 1
+
+    def remove(self, email_id):
+        with self._lock:
+            if self._emails:
+                self._emails.pop(email_id, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._emails = None
+
+
+_email_snapshots = {}
+_email_snapshots_lock = threading.Lock()
+
+
+def get_email_snapshot(token) -> EmailSnapshot:
+    """获取账号的邮件列表快照（按 token 区分，同一账号的各阶段共用）"""
+    with _email_snapshots_lock:
+        snapshot = _email_snapshots.get(token)
+        if snapshot is None:
+            snapshot = EmailSnapshot()
+            _email_snapshots[token] = snapshot
+        return snapshot
+
+
+def _note_email_result(client, data, email_id, claimed: bool = False, deleted: bool = False):
+    """
+    按领取/抽奖/删除接口的返回更新快照（同步/异步共用）
+    :param claimed: 成功时标记为已领取
+    :param deleted: 成功时从快照中移除
+    """
+    snapshot = get_email_snapshot(client.token)
+    if client.is_success(data):
+        if deleted:
+            snapshot.remove(email_id)
+        elif claimed:
+            snapshot.mark_claimed(email_id)
+    elif any(msg in str(data.get("msg", "")) for msg in STALE_EMAIL_MESSAGES):
+        snapshot.invalidate()
+
+
+def _handle_get_email_list(client, data):
+    """解析邮件列表接口的返回（同步/异步共用），成功时同时刷新快照"""
+    if client.is_success(data):
+
+        if isinstance(data.get("data"), list):
+            emails = data.get("data")
+            # 将 otherId 转为 uuid 字段
+            for email in emails:
+                if "otherId" in email:
+                    email["uuid"] = email.get("otherId", "")
+            get_email_snapshot(client.token).replace(emails)
+            return emails
+
+        print_and_flush(f"❌ 获取邮件列表失败: 数据格式不正确")
+        return []
+    else:
+        print_and_flush(f"❌ 获取邮件列表失败: {data.get('msg', '未知错误')}")
+        return []
+
 def get_email_list(session: requests.Session, token: str) -> List[Dict[str, Any]]:
     """
     获取邮件列表
@@ -130,34 +282,11 @@ def get_email_list(session: requests.Session, token: str) -> List[Dict[str, Any]
     Returns:
         邮件列表
     """
-    url = "https://q-jiang.myprint.top/api/user-email/list"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     
     try:
-        response = session.post(url, headers=headers, json={}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            
-            if isinstance(data.get("data"), list):
-                emails = data.get("data")
-                # 将 otherId 转为 uuid 字段
-                for email in emails:
-                    if "otherId" in email:
-                        email["uuid"] = email.get("otherId", "")
-                return emails
-            
-            print_and_flush(f"❌ 获取邮件列表失败: 数据格式不正确")
-            return []
-        else:
-            print_and_flush(f"❌ 获取邮件列表失败: {data.get('msg', '未知错误')}")
-            return []
-            
+        data = client.post("user-email/list", {})
+        return _handle_get_email_list(client, data)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
     except json.JSONDecodeError as e:
@@ -167,6 +296,28 @@ def get_email_list(session: requests.Session, token: str) -> List[Dict[str, Any]
     
     return []
 
+
+def load_email_list(session: requests.Session, token: str) -> List[Dict[str, Any]]:
+    """
+    读取邮件列表，快照有效时直接使用快照，否则请求接口
+    
+    Returns:
+        邮件列表（副本，可以随意修改）
+    """
+    snapshot = get_email_snapshot(get_client(session, token).token)
+    if snapshot.fresh():
+        return snapshot.emails()
+    return get_email_list(session, token)
+
+
+def email_exists(session: requests.Session, token: str, email_id: int) -> bool:
+    """按快照检查邮件是否仍然存在（快照失效时重新获取一次）"""
+    snapshot = get_email_snapshot(get_client(session, token).token)
+    if not snapshot.fresh():
+        get_email_list(session, token)
+    return snapshot.contains(email_id)
+
+
 def is_email_expired(invalid_day: str) -> bool:
     if not invalid_day:
         return False
@@ -209,17 +360,43 @@ def format_email_info(email: Dict[str, Any]) -> str:
         result += f" (过期时间: {invalid_day})"
     return result
 
-def display_emails(session: requests.Session, token: str) -> None:
-    print_and_flush("📧 正在获取邮件列表...")
-    emails = get_email_list(session, token)
+def classify_emails(emails: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    按 type、receiveIs、invalidDay 和附件对邮件分类（每封邮件只判断一次，展示、领取、抽奖、删除共用）
+    
+    Returns:
+        {"unclaimed": 未领取且未过期的邮件, "claim": 可领取附件的邮件（含抽奖邮件）,
+         "lottery": 可抽奖的类型40邮件, "expired": 附件已过期的未领取邮件数,
+         "delete": 已领取或已过期、需要删除的邮件ID}
+    """
+    plan = {"unclaimed": [], "claim": [], "lottery": [], "expired": 0, "delete": set()}
+    for email in emails:
+        email_id = email.get("id", 0)
+        email_type = email.get("type", 0)
+        receive_is = email.get("receiveIs", 0)
+        expired = is_email_expired(email.get("invalidDay", ""))
+        has_attachment = bool(email.get("goodsListVo")) or email_type == 40
+        if receive_is == 0 and not expired:
+            plan["unclaimed"].append(email)
+        if has_attachment and receive_is == 0 and email_id:
+            if expired:
+                plan["expired"] += 1
+            else:
+                plan["claim"].append(email)
+                if email_type == 40:
+                    plan["lottery"].append(email)
+        # 类型40的邮件不删除
+        if email_id and email_type != 40 and (receive_is == 1 or expired):
+            plan["delete"].add(email_id)
+    return plan
+
+def _display_unclaimed(emails: List[Dict[str, Any]], plan: Dict[str, Any]) -> None:
     if not emails:
         print_and_flush("⚠️ 暂无邮件或获取失败")
         return
     
     # 只显示未领取附件的邮件（不再过滤类型为40的邮件）
-    unclaimed_emails = [email for email in emails 
-                       if email.get("receiveIs", 0) == 0 and 
-                       not is_email_expired(email.get("invalidDay", ""))]  # 移除类型40的过滤
+    unclaimed_emails = plan["unclaimed"]
     
     unclaimed_count = sum(1 for email in unclaimed_emails if 
                          (email.get("goodsListVo") or email.get("type", 0) == 40))
@@ -231,54 +408,59 @@ def display_emails(session: requests.Session, token: str) -> None:
         except Exception as e:
             print_and_flush(f"  {i}. 邮件信息解析失败: {e}")
 
+def display_emails(session: requests.Session, token: str) -> None:
+    print_and_flush("📧 正在获取邮件列表...")
+    emails = load_email_list(session, token)
+    _display_unclaimed(emails, classify_emails(emails))
+
+def _handle_read_email(client, data, email_id):
+    """处理阅读邮件接口的返回（同步/异步共用）"""
+    if client.is_success(data):
+        print_and_flush(f"✅ 邮件 {email_id} 已标记为已读")
+        return True
+    else:
+        print_and_flush(f"❌ 阅读邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
+        return False
+
 def read_email(session: requests.Session, token: str, email_id: int) -> bool:
-    url = "https://q-jiang.myprint.top/api/user-email/read"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 邮件 {email_id} 已标记为已读")
-            return True
-        else:
-            print_and_flush(f"❌ 阅读邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
-            return False
+        data = client.post("user-email/read", payload)
+        return _handle_read_email(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
     except Exception as e:
         print_and_flush(f"⚠️ 阅读邮件时发生未知错误: {e}")
     return False
 
+
+def _handle_delete_email(client, data, email_id):
+    """处理删除邮件接口的返回（同步/异步共用）"""
+    print_and_flush(f"📤 删除邮件 {email_id} 接口响应: {data}")  # 打印响应数据
+    _note_email_result(client, data, email_id, deleted=True)
+    if client.is_success(data):
+        print_and_flush(f"✅ 邮件 {email_id} 删除成功")
+        # 从无法处理缓存中移除（如果存在）
+        remove_from_unprocessable_cache(email_id)
+        return True
+    else:
+        print_and_flush(f"❌ 删除邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+        return False
+
 def delete_email(session: requests.Session, token: str, email_id: int) -> bool:
     # 检查邮件是否在无法处理缓存中
     if is_in_unprocessable_cache(email_id):
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    url = "https://q-jiang.myprint.top/api/user-email/delEmail"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print_and_flush(f"📤 删除邮件 {email_id} 接口响应: {data}")  # 打印响应数据
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 邮件 {email_id} 删除成功")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
-            return True
-        else:
-            print_and_flush(f"❌ 删除邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return False
+        data = client.post("user-email/delEmail", payload)
+        return _handle_delete_email(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
@@ -289,6 +471,22 @@ def delete_email(session: requests.Session, token: str, email_id: int) -> bool:
         add_to_unprocessable_cache(email_id)
     return False
 
+
+def _handle_delete_expired_email(client, data, email_id):
+    """处理删除过期邮件接口的返回（同步/异步共用）"""
+    print_and_flush(f"📤 删除过期邮件 {email_id} 接口响应: {data}")  # 打印响应数据
+    _note_email_result(client, data, email_id, deleted=True)
+    if client.is_success(data):
+        print_and_flush(f"✅ 过期邮件 {email_id} 删除成功")
+        # 从无法处理缓存中移除（如果存在）
+        remove_from_unprocessable_cache(email_id)
+        return True
+    else:
+        print_and_flush(f"❌ 删除过期邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+        return False
+
 def delete_expired_email(session: requests.Session, token: str, email_id: int) -> bool:
     """
     删除过期邮件
@@ -299,27 +497,11 @@ def delete_expired_email(session: requests.Session, token: str, email_id: int) -
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    url = "https://q-jiang.myprint.top/api/user-email/delEmail"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print_and_flush(f"📤 删除过期邮件 {email_id} 接口响应: {data}")  # 打印响应数据
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 过期邮件 {email_id} 删除成功")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
-            return True
-        else:
-            print_and_flush(f"❌ 删除过期邮件 {email_id} 失败: {data.get('msg', '未知错误')}")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return False
+        data = client.post("user-email/delEmail", payload)
+        return _handle_delete_expired_email(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
@@ -330,6 +512,22 @@ def delete_expired_email(session: requests.Session, token: str, email_id: int) -
         add_to_unprocessable_cache(email_id)
     return False
 
+
+def _handle_delete_email_all(client, data, email_id):
+    """处理 delEmailAll 接口的返回（同步/异步共用）"""
+    print_and_flush(f"📤 删除邮件 {email_id} (delEmailAll接口) 响应: {data}")  # 打印响应数据
+    _note_email_result(client, data, email_id, deleted=True)
+    if client.is_success(data):
+        print_and_flush(f"✅ 邮件 {email_id} 删除成功 (使用delEmailAll接口)")
+        # 从无法处理缓存中移除（如果存在）
+        remove_from_unprocessable_cache(email_id)
+        return True
+    else:
+        print_and_flush(f"❌ 删除邮件 {email_id} 失败: {data.get('msg', '未知错误')} (使用delEmailAll接口)")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+        return False
+
 def delete_email_all(session: requests.Session, token: str, email_id: int) -> bool:
     """
     使用 delEmailAll 接口删除邮件
@@ -340,27 +538,11 @@ def delete_email_all(session: requests.Session, token: str, email_id: int) -> bo
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    url = "https://q-jiang.myprint.top/api/user-email/delEmailAll"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print_and_flush(f"📤 删除邮件 {email_id} (delEmailAll接口) 响应: {data}")  # 打印响应数据
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 邮件 {email_id} 删除成功 (使用delEmailAll接口)")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
-            return True
-        else:
-            print_and_flush(f"❌ 删除邮件 {email_id} 失败: {data.get('msg', '未知错误')} (使用delEmailAll接口)")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return False
+        data = client.post("user-email/delEmailAll", payload)
+        return _handle_delete_email_all(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e} (使用delEmailAll接口)")
         # 添加到无法处理缓存
@@ -371,52 +553,72 @@ def delete_email_all(session: requests.Session, token: str, email_id: int) -> bo
         add_to_unprocessable_cache(email_id)
     return False
 
+
+def _handle_get_email_attachment(client, data, email_id):
+    """处理领取附件接口的返回（同步/异步共用）"""
+    _note_email_result(client, data, email_id, claimed=True)
+    if client.is_success(data):
+        print_and_flush(f"✅ 邮件 {email_id} 附件领取成功: {data.get('msg', '')}")
+        return True
+    else:
+        print_and_flush(f"❌ 领取邮件 {email_id} 附件失败: {data.get('msg', '未知错误')}")
+        return False
+
 def get_email_attachment(session: requests.Session, token: str, email_id: int) -> bool:
-    url = "https://q-jiang.myprint.top/api/user-email/getAttachment"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 邮件 {email_id} 附件领取成功: {data.get('msg', '')}")
-            return True
-        else:
-            print_and_flush(f"❌ 领取邮件 {email_id} 附件失败: {data.get('msg', '未知错误')}")
-            return False
+        data = client.post("user-email/getAttachment", payload)
+        return _handle_get_email_attachment(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
     except Exception as e:
         print_and_flush(f"⚠️ 领取邮件附件时发生未知错误: {e}")
     return False
 
+
+def _handle_receive_email_attachment(client, data, email_id):
+    """处理 receiveEmail 接口的返回（同步/异步共用）"""
+    _note_email_result(client, data, email_id, claimed=True)
+    if client.is_success(data):
+        print_and_flush(f"✅ 邮件 {email_id} 附件领取成功: {data.get('msg', '')}")
+        return True
+    else:
+        print_and_flush(f"❌ 领取邮件 {email_id} 附件失败: {data.get('msg', '未知错误')}")
+        return False
+
 def receive_email_attachment(session: requests.Session, token: str, email_id: int) -> bool:
     """
     领取类型为50和60的邮件附件
     使用 receiveEmail 接口
     """
-    url = "https://q-jiang.myprint.top/api/user-email/receiveEmail"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id}
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            print_and_flush(f"✅ 邮件 {email_id} 附件领取成功: {data.get('msg', '')}")
-            return True
-        else:
-            print_and_flush(f"❌ 领取邮件 {email_id} 附件失败: {data.get('msg', '未知错误')}")
-            return False
+        data = client.post("user-email/receiveEmail", payload)
+        return _handle_receive_email_attachment(client, data, email_id)
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
     except Exception as e:
         print_and_flush(f"⚠️ 领取邮件附件时发生未知错误: {e}")
     return False
 
+
+def _handle_get_lottery_info(client, data, email_id):
+    """
+    处理抽奖信息接口的返回（同步/异步共用）
+    :return: (抽奖信息, 是否需要删除该邮件)，获取失败时抽奖信息为 None
+    """
+    if client.is_success(data):
+        return data.get("data", {}), False
+    error_msg = data.get('msg', '未知错误')
+    print_and_flush(f"❌ 获取抽奖信息失败: {error_msg}")
+    # 当出现"此接口只可访问一次"相关错误时，删除该邮件
+    if "此接口只可访问一次" in error_msg:
+        print_and_flush(f"⚠️ 邮件 {email_id} 已无有效抽奖次数，正在删除...")
+        return None, True
+    return None, False
+
 def get_lottery_info(session: requests.Session, token: str, email_id: int, uuid: str) -> Dict[str, Any]:
     """
     获取类型40邮件的抽奖信息
@@ -435,28 +637,19 @@ def get_lottery_info(session: requests.Session, token: str, email_id: int, uuid:
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过处理")
         return {}
     
-    url = "https://q-jiang.myprint.top/api/user-email/customsEmailRewardInfo"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id, "uuid": uuid}
     
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            return data.get("data", {})
-        else:
-            error_msg = data.get('msg', '未知错误')
-            print_and_flush(f"❌ 获取抽奖信息失败: {error_msg}")
-            # 当出现"此接口只可访问一次"相关错误时，删除该邮件
-            if "此接口只可访问一次" in error_msg:
-                print_and_flush(f"⚠️ 邮件 {email_id} 已无有效抽奖次数，正在删除...")
-                delete_email(session, token, email_id)
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return {}
+        data = client.post("user-email/customsEmailRewardInfo", payload)
+        lottery_info, spent = _handle_get_lottery_info(client, data, email_id)
+        if lottery_info is not None:
+            return lottery_info
+        if spent:
+            delete_email(session, token, email_id)
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+        return {}
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
@@ -485,24 +678,17 @@ def execute_lottery(session: requests.Session, token: str, email_id: int, uuid:
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过处理")
         return False
     
-    url = "https://q-jiang.myprint.top/api/user-email/customsEmailReward"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"id": email_id, "uuid": uuid, "giveUpList": []}
     
     try:
-        response = session.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = client.post("user-email/customsEmailReward", payload)
+        _note_email_result(client, data, email_id, claimed=True)
         
-        if (str(data.get("code")) == "200" or 
-            data.get("success") in [True, 1, "1", "true", "True"]):
-            
-            # 获取实际抽中的奖励信息
-            reward_data = data.get("data")
+        if client.is_success(data):
             
             # 当数据异常（例如返回None或空数据）时，删除邮件
-            if reward_data is None or (isinstance(reward_data, dict) and not reward_data):
-                print_and_flush(f"⚠️ 邮件 {email_id} 抽奖数据异常，此接口只可访问一次，迎接审判吧！")
+            if _lottery_data_broken(data, email_id):
                 # 调用删除接口删除此邮件
                 delete_email(session, token, email_id)
                 record_lottery_result(email_id, email_title, "数据异常已删除")
@@ -511,49 +697,16 @@ def execute_lottery(session: requests.Session, token: str, email_id: int, uuid:
                 return False
             
             # 获取可抽奖物品列表（如果提供了lottery_info则使用，否则尝试重新获取）
-            goods_list = []
             if lottery_info and isinstance(lottery_info, dict):
                 goods_list = lottery_info.get("goodsVos", [])
             else:
                 # 只有在没有提供lottery_info时才尝试获取，避免重复请求
-                temp_lottery_info = get_lottery_info(session, token, email_id, uuid)
-                if temp_lottery_info:
-                    goods_list = temp_lottery_info.get("goodsVos", [])
-            
-            reward_name = "未知奖励"
-            # 如果reward_data是整数，表示抽中的物品在列表中的索引（从0开始）
-            if isinstance(reward_data, int) and goods_list:
-                # 确保索引在有效范围内
-                if 0 <= reward_data < len(goods_list):
-                    reward_item = goods_list[reward_data]
-                    reward_name = reward_item.get("name", "未知奖励")
-                    reward_weight = reward_item.get("weight", 0)
-                    print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得 {reward_name} (权重: {reward_weight})")
-                else:
-                    reward_name = f"第 {reward_data + 1} 个奖励"
-                    print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得{reward_name}")
-            elif reward_data:
-                # 如果reward_data是字典或其他类型，按原有方式处理
-                if isinstance(reward_data, dict):
-                    reward_name = reward_data.get("name", "未知奖励")
-                    reward_num = reward_data.get("num", 1)
-                    print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得 {reward_name} x {reward_num}")
-                else:
-                    reward_name = str(reward_data)
-                    print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: {data.get('msg', '')}")
-            else:
-                reward_name = "未知奖励"
-                print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: {data.get('msg', '')}")
+                goods_list = (get_lottery_info(session, token, email_id, uuid) or {}).get("goodsVos", [])
             
-            # 记录抽奖结果
-            record_lottery_result(email_id, email_title, reward_name)
+            _report_lottery_reward(data, email_id, email_title, goods_list)
             return True
         else:
-            print_and_flush(f"❌ 邮件 {email_id} 抽奖失败: {data.get('msg', '未知错误')}")
-            # 记录失败的抽奖
-            record_lottery_result(email_id, email_title, "抽奖失败")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
+            _report_lottery_failure(data, email_id, email_title)
             return False
     except requests.exceptions.RequestException as e:
         print_and_flush(f"⚠️ 网络请求异常: {e}")
@@ -568,6 +721,54 @@ def execute_lottery(session: requests.Session, token: str, email_id: int, uuid:
     record_lottery_result(email_id, email_title, "异常错误")
     return False
 
+def _lottery_data_broken(data, email_id) -> bool:
+    """抽奖接口返回成功但没有奖励数据（同步/异步共用）"""
+    reward_data = data.get("data")
+    if reward_data is None or (isinstance(reward_data, dict) and not reward_data):
+        print_and_flush(f"⚠️ 邮件 {email_id} 抽奖数据异常，此接口只可访问一次，迎接审判吧！")
+        return True
+    return False
+
+def _report_lottery_reward(data, email_id, email_title, goods_list):
+    """打印并记录抽中的奖励（同步/异步共用）"""
+    # 获取实际抽中的奖励信息
+    reward_data = data.get("data")
+    reward_name = "未知奖励"
+    # 如果reward_data是整数，表示抽中的物品在列表中的索引（从0开始）
+    if isinstance(reward_data, int) and goods_list:
+        # 确保索引在有效范围内
+        if 0 <= reward_data < len(goods_list):
+            reward_item = goods_list[reward_data]
+            reward_name = reward_item.get("name", "未知奖励")
+            reward_weight = reward_item.get("weight", 0)
+            print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得 {reward_name} (权重: {reward_weight})")
+        else:
+            reward_name = f"第 {reward_data + 1} 个奖励"
+            print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得{reward_name}")
+    elif reward_data:
+        # 如果reward_data是字典或其他类型，按原有方式处理
+        if isinstance(reward_data, dict):
+            reward_name = reward_data.get("name", "未知奖励")
+            reward_num = reward_data.get("num", 1)
+            print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: 获得 {reward_name} x {reward_num}")
+        else:
+            reward_name = str(reward_data)
+            print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: {data.get('msg', '')}")
+    else:
+        reward_name = "未知奖励"
+        print_and_flush(f"✅ 邮件 {email_id} 抽奖成功: {data.get('msg', '')}")
+    
+    # 记录抽奖结果
+    record_lottery_result(email_id, email_title, reward_name)
+
+def _report_lottery_failure(data, email_id, email_title):
+    """抽奖接口返回失败（同步/异步共用）"""
+    print_and_flush(f"❌ 邮件 {email_id} 抽奖失败: {data.get('msg', '未知错误')}")
+    # 记录失败的抽奖
+    record_lottery_result(email_id, email_title, "抽奖失败")
+    # 添加到无法处理缓存
+    add_to_unprocessable_cache(email_id)
+
 def process_lottery_email(session: requests.Session, token: str, email_id: int, uuid: str, email_title: str = "") -> bool:
     """
     处理类型为40的抽奖邮件
@@ -590,7 +791,21 @@ def process_lottery_email(session: requests.Session, token: str, email_id: int,
     # 首先获取抽奖信息
     print_and_flush(f"🎲 正在获取邮件 {email_id} 的抽奖信息...")
     lottery_info = get_lottery_info(session, token, email_id, uuid)
+    if not _check_lottery_info(lottery_info, email_id, email_title):
+        return False
+    
+    # 执行抽奖，传递lottery_info避免重复请求
+    print_and_flush("🎲 正在执行抽奖...")
+    result = execute_lottery(session, token, email_id, uuid, lottery_info, email_title)
+    
+    # 如果抽奖失败，添加到无法处理缓存
+    if not result:
+        add_to_unprocessable_cache(email_id)
     
+    return result
+
+def _check_lottery_info(lottery_info, email_id, email_title) -> bool:
+    """检查抽奖信息，获取失败时记录并返回 False（同步/异步共用）"""
     if not lottery_info:
         print_and_flush(f"❌ 无法获取邮件 {email_id} 的抽奖信息")
         record_lottery_result(email_id, email_title, "获取抽奖信息失败")
@@ -607,108 +822,91 @@ def process_lottery_email(session: requests.Session, token: str, email_id: int,
     #     name = goods.get("name", "未知物品")
     #     weight = goods.get("weight", 0)
     #     print_and_flush(f"  {i}. {name} (权重: {weight})")
-    
-    # 执行抽奖，传递lottery_info避免重复请求
-    print_and_flush(f"🎲 正在执行抽奖...")
-    result = execute_lottery(session, token, email_id, uuid, lottery_info, email_title)
-    
-    # 如果抽奖失败，添加到无法处理缓存
-    if not result:
-        add_to_unprocessable_cache(email_id)
-    
-    return result
+    return True
 
-def process_all_customs_emails(session: requests.Session, token: str) -> None:
-    """
-    处理所有类型为40的抽奖邮件
+def _draw_lotteries(session: requests.Session, token: str, emails: List[Dict[str, Any]], lottery_emails: List[Dict[str, Any]]) -> set:
     """
-    # 重置抽奖记录
-    reset_lottery_tracker()
+    处理分类好的抽奖邮件并打印统计
     
-    print_and_flush("🎲 正在处理所有抽奖邮件...")
-    emails = get_email_list(session, token)
+    Returns:
+        抽奖成功的邮件ID
+    """
     if not emails:
         print_and_flush("⚠️ 暂无邮件或获取失败")
-        return
+        return set()
     
-    lottery_count = 0
-    for email in emails:
-        try:
-            email_id = email.get("id", 0)
-            email_type = email.get("type", 0)
-            receive_is = email.get("receiveIs", 0)
+    with batched_cache_writes(token):
+        drawn = set()
+        for email in lottery_emails:
             title = email.get("title", "无标题")
-            invalid_day = email.get("invalidDay", "")
-            uuid = email.get("uuid", "")
-            
-            # 处理类型为40且未领取的邮件
-            if email_type == 40 and receive_is == 0 and email_id and not is_email_expired(invalid_day):
+            try:
+                email_id = email.get("id", 0)
+                uuid = email.get("uuid", "")
                 print_and_flush(f"🎲 正在处理抽奖邮件: '{title}' (ID: {email_id})")
-                # 再次检查邮件是否仍然存在（可能在处理其他邮件时已被删除）
-                current_emails = get_email_list(session, token)
-                email_still_exists = any(e.get("id") == email_id for e in current_emails)
-                
-                if not email_still_exists:
+                # 再次检查邮件是否仍然存在（可能在处理其他邮件时已被删除，按快照判断）
+                if not email_exists(session, token, email_id):
                     print_and_flush(f"⚠️ 邮件 {email_id} 已被删除，跳过处理")
                     continue
-                    
+                
                 if process_lottery_email(session, token, email_id, uuid, title):
-                    lottery_count += 1
-                    time.sleep(0.5)
-        except Exception as e:
-            print_and_flush(f"⚠️ 处理抽奖邮件 '{title}' 时出错: {e}")
-    
-    if lottery_count > 0:
-        print_and_flush(f"✅ 共处理了 {lottery_count} 个抽奖邮件")
+                    drawn.add(email_id)
+            except Exception as e:
+                print_and_flush(f"⚠️ 处理抽奖邮件 '{title}' 时出错: {e}")
+        _print_draw_summary(drawn)
+        return drawn
+
+def _print_draw_summary(drawn: set) -> None:
+    if drawn:
+        print_and_flush(f"✅ 共处理了 {len(drawn)} 个抽奖邮件")
     else:
         print_and_flush("🔍 没有可处理的抽奖邮件")
     
     # 显示抽奖总结
     display_lottery_summary()
 
-def get_all_attachments(session: requests.Session, token: str) -> None:
-    print_and_flush("📎 正在检查可领取的邮件附件...")
+def process_all_customs_emails(session: requests.Session, token: str) -> None:
+    """
+    处理所有类型为40的抽奖邮件
+    """
+    # 重置抽奖记录
+    reset_lottery_tracker()
     
-    # 重置抽奖记录（如果是第一次调用）
-    if lottery_tracker["total_draws"] == 0:
-        reset_lottery_tracker()
-        
-    emails = get_email_list(session, token)
+    print_and_flush("🎲 正在处理所有抽奖邮件...")
+    emails = load_email_list(session, token)
+    _draw_lotteries(session, token, emails, classify_emails(emails)["lottery"])
+
+def _claim_attachments(session: requests.Session, token: str, emails: List[Dict[str, Any]],
+                       claim_emails: List[Dict[str, Any]], skipped_count: int) -> set:
+    """
+    领取分类好的邮件附件（抽奖邮件执行抽奖）并打印统计
+    :param skipped_count: 附件已过期而跳过的邮件数
+    
+    Returns:
+        领取成功的邮件ID
+    """
     if not emails:
         print_and_flush("⚠️ 暂无邮件或获取失败")
-        return
-    claimed_count = 0
-    skipped_count = 0
-    lottery_count = 0
-    for email in emails:
-        try:
-            email_id = email.get("id", 0)
-            receive_is = email.get("receiveIs", 0)
-            title = email.get("title", "无标题")
-            goods_list = email.get("goodsListVo", [])
-            email_type = email.get("type", 0)
-            invalid_day = email.get("invalidDay", "")
-            uuid = email.get("uuid", "")
-            # 处理未领取的邮件，包括类型为40的抽奖邮件
-            if (goods_list or email_type == 40) and receive_is == 0 and email_id:
-                if is_email_expired(invalid_day):
-                    skipped_count += 1
-                    continue
-                
-                # 再次检查邮件是否仍然存在
-                current_emails = get_email_list(session, token)
-                email_still_exists = any(e.get("id") == email_id for e in current_emails)
-                
-                if not email_still_exists:
+        return set()
+    with batched_cache_writes(token):
+        claimed = set()
+        lottery_count = 0
+        for email in claim_emails:
+            try:
+                email_id = email.get("id", 0)
+                title = email.get("title", "无标题")
+                email_type = email.get("type", 0)
+                uuid = email.get("uuid", "")
+            
+                # 再次检查邮件是否仍然存在（按快照判断）
+                if not email_exists(session, token, email_id):
                     print_and_flush(f"⚠️ 邮件 {email_id} 已被删除，跳过处理")
                     continue
-                
+            
                 if email_type == 40:
                     print_and_flush(f"🎲 正在处理抽奖邮件 '{title}' ...")
                     if process_lottery_email(session, token, email_id, uuid, title):
                         lottery_count += 1
-                        claimed_count += 1
-                        time.sleep(0.5)
+                        claimed.add(email_id)
                 else:
                     print_and_flush(f"📥 正在领取邮件 '{title}' 的附件...")
                     # 根据邮件类型选择合适的接口
@@ -718,29 +916,43 @@ def get_all_attachments(session: requests.Session, token: str) -> None:
                     else:
                         # 其他类型的邮件使用 getAttachment 接口
                         result = get_email_attachment(session, token, email_id)
-                    
+                
                     if result:
-                        claimed_count += 1
-                        time.sleep(0.5)
-        except Exception as e:
-            print_and_flush(f"⚠️ 处理邮件 '{email.get('title', '未知')}' 时出错: {e}")
-    if claimed_count > 0:
-        print_and_flush(f"✅ 共领取了 {claimed_count} 个邮件附件，其中抽奖邮件 {lottery_count} 个")
+                        claimed.add(email_id)
+            except Exception as e:
+                print_and_flush(f"⚠️ 处理邮件 '{email.get('title', '未知')}' 时出错: {e}")
+        _print_attachment_summary(claimed, lottery_count, skipped_count)
+        return claimed
+
+def _print_attachment_summary(claimed: set, lottery_count: int, skipped_count: int) -> None:
+    if claimed:
+        print_and_flush(f"✅ 共领取了 {len(claimed)} 个邮件附件，其中抽奖邮件 {lottery_count} 个")
     if skipped_count > 0:
         print_and_flush(f"⏭️ 共跳过了 {skipped_count} 个已过期的邮件")
-    if claimed_count == 0 and skipped_count == 0:
+    if not claimed and skipped_count == 0:
         print_and_flush("🔍 没有可领取的邮件附件")
     
     # 显示抽奖总结
     display_lottery_summary()
 
+def get_all_attachments(session: requests.Session, token: str) -> None:
+    print_and_flush("📎 正在检查可领取的邮件附件...")
+    
+    # 重置抽奖记录（如果是第一次调用）
+    if get_lottery_tracker()["total_draws"] == 0:
+        reset_lottery_tracker()
+        
+    emails = load_email_list(session, token)
+    plan = classify_emails(emails)
+    _claim_attachments(session, token, emails, plan["claim"], plan["expired"])
+
 def delete_all_claimed_emails(session: requests.Session, token: str) -> None:
     """
     自动删除所有已领取附件的邮件（无论是否过期）
     包括类型为50和60的已领取邮件
     """
     print_and_flush("🗑️ 正在检查并删除已领取的邮件...")
-    emails = get_email_list(session, token)
+    emails = load_email_list(session, token)
     if not emails:
         print_and_flush("⚠️ 暂无邮件或获取失败")
         return
@@ -748,37 +960,28 @@ def delete_all_claimed_emails(session: requests.Session, token: str) -> None:
     deleted_count = 0
     error_count = 0
     
-    for email in emails:
-        try:
-            email_id = email.get("id", 0)
-            title = email.get("title", "无标题")
-            receive_is = email.get("receiveIs", 0)
-            email_type = email.get("type", 0)
-            invalid_day = email.get("invalidDay", "")
-            
-            # 检查邮件是否已领取且未过期，并排除类型为40的邮件
-            if receive_is == 1 and email_id and not is_email_expired(invalid_day) and email_type != 40:
-                print_and_flush(f"🗑️ 正在删除已领取邮件: '{title}' (ID: {email_id})")
-                # 类型为50/60的邮件优先使用 delEmailAll 接口
-                success = False
-                if email_type in [50, 60]:  # 支持类型50和60
-                    if delete_email_all_with_verification(session, token, email_id):
-                        deleted_count += 1
-                        success = True
-                    elif delete_email(session, token, email_id):
-                        deleted_count += 1
-                        success = True
+    # 检查邮件是否已领取且未过期，并排除类型为40的邮件
+    targets = [email for email in emails
+               if email.get("receiveIs", 0) == 1 and email.get("id") and
+               not is_email_expired(email.get("invalidDay", "")) and email.get("type", 0) != 40]
+    for email in targets:
+        print_and_flush(f"🗑️ 正在删除已领取邮件: '{email.get('title', '无标题')}' (ID: {email.get('id')})")
+    
+    with batched_cache_writes(token):
+        # 类型为50/60的邮件优先使用 delEmailAll 接口，批量删除后统一验证
+        all_ids = [email["id"] for email in targets if email.get("type", 0) in [50, 60]]
+        confirmed = delete_emails_with_verification(session, token, all_ids, delete_email_all, "邮件 {} (delEmailAll)")
+        
+        for email in targets:
+            try:
+                email_id = email["id"]
+                if email_id in confirmed or delete_email(session, token, email_id):
+                    deleted_count += 1
                 else:
-                    if delete_email(session, token, email_id):
-                        deleted_count += 1
-                        success = True
-                
-                if not success:
                     error_count += 1
-                time.sleep(0.5)  # 避免请求过快
-        except Exception as e:
-            print_and_flush(f"⚠️ 删除已领取邮件 '{email.get('title', '未知')}' 时出错: {e}")
-            error_count += 1
+            except Exception as e:
+                print_and_flush(f"⚠️ 删除已领取邮件 '{email.get('title', '未知')}' 时出错: {e}")
+                error_count += 1
     
     if deleted_count > 0:
         print_and_flush(f"✅ 共删除了 {deleted_count} 封已领取的邮件")
@@ -794,98 +997,258 @@ def delete_all_claimed_emails(session: requests.Session, token: str) -> None:
     if deleted_count == 0 and error_count == 0:
         print_and_flush("🔍 没有已领取的邮件需要删除")
 
-def delete_claimed_and_expired_emails(session: requests.Session, token: str) -> None:
+# 删除接口路由表文件
+DELETE_ROUTES_FILE = "email_delete_routes.json"
+
+
+class DeleteRouter:
     """
-    删除所有已领取的邮件和所有过期的邮件
+    删除接口路由表（线程安全，跨运行保存）
+    按（邮件类型、是否过期、是否已领取）记录上次删除成功的接口，同类邮件下次直接使用该接口，
+    失败时才按原来的顺序逐个尝试
+    文件结构: {"<类型>|<是否过期>|<是否已领>": {"route": 接口名, "hits": 成功次数}}
     """
-    print_and_flush("🗑️ 正在删除已领取和过期的邮件...")
-    emails = get_email_list(session, token)
-    if not emails:
-        print_and_flush("⚠️ 暂无邮件或获取失败")
-        return
+
+    def __init__(self, path: str = DELETE_ROUTES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._routes = None
+        self._dirty = False
+
+    def _load(self) -> dict:
+        if self._routes is None:
+            self._routes = {}
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        self._routes = data
+            except Exception as e:
+                print_and_flush(f"⚠️ 读取删除接口路由表失败: {e}")
+        return self._routes
+
+    @staticmethod
+    def key(email_type, expired: bool, claimed: bool) -> str:
+        return f"{email_type}|{int(bool(expired))}|{int(bool(claimed))}"
+
+    def route(self, key: str):
+        """该类邮件上次删除成功的接口，没有记录时返回 None"""
+        with self._lock:
+            return (self._load().get(key) or {}).get("route")
+
+    def record_success(self, key: str, route: str):
+        with self._lock:
+            routes = self._load()
+            entry = routes.get(key)
+            if entry and entry.get("route") == route:
+                entry["hits"] = entry.get("hits", 0) + 1
+            else:
+                routes[key] = {"route": route, "hits": 1}
+            self._dirty = True
+
+    def record_miss(self, key: str, route: str):
+        """记录的接口这次失败：删除记录，下次重新按顺序尝试"""
+        with self._lock:
+            routes = self._load()
+            if (routes.get(key) or {}).get("route") == route:
+                del routes[key]
+                self._dirty = True
+
+    def save(self):
+        """有更新时写回文件（每轮删除结束调用一次）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._routes, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print_and_flush(f"⚠️ 保存删除接口路由表失败: {e}")
+
+
+_delete_router = None
+_delete_router_lock = threading.Lock()
+
+
+def get_delete_router() -> DeleteRouter:
+    """获取全局共享的删除接口路由表（所有账号共用）"""
+    global _delete_router
+    with _delete_router_lock:
+        if _delete_router is None:
+            _delete_router = DeleteRouter()
+        return _delete_router
+
+
+def _handle_judgement(client, data, email_id) -> bool:
+    """处理审判检查的返回（同步/异步共用）"""
+    print_and_flush(f"📤 审判检查 - 邮件 {email_id} 接口响应: {data}")  # 打印响应数据
+    if client.is_success(data):
+        _note_email_result(client, data, email_id, deleted=True)
+        return True
+    error_msg = data.get('msg', '')
+    if "此接口只可访问一次" in error_msg and "迎接审判吧" in error_msg:
+        print_and_flush(f"⚠️ 邮件 {email_id} 触发审判机制，正在删除...")
+        # 审判情况下，我们视作删除成功
+        return True
+    return False
+
+
+def _delete_by_judgement(session: requests.Session, token: str, email_id: int) -> bool:
+    """
+    直接调用 delEmail 接口检查是否是"审判"情况（不经过无法处理缓存）
+    返回"此接口只可访问一次次数+1，迎接审判吧！"时视作删除成功；这次调用真的删除成功时同样返回 True
+    """
+    client = get_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = client.post("user-email/delEmail", payload)
+        return _handle_judgement(client, data, email_id)
+    except Exception as e:
+        print_and_flush(f"⚠️ 检查审判情况时发生异常: {e}")
+    return False
+
+
+# 只在其他接口都失败后才检查、不记入路由表的接口（它只是把失败视作已删除）
+_UNROUTABLE_ROUTES = ("judgement",)
+
+# 删除接口名 -> 删除函数
+_DELETE_ROUTE_FUNCS = {
+    "delEmailAll": delete_email_all,
+    "delExpired": delete_expired_email,
+    "delEmail": delete_email,
+    "judgement": _delete_by_judgement,
+}
+
+
+def _delete_chain(email_type, expired: bool) -> List[str]:
+    """没有路由记录时按原来的顺序尝试的删除接口"""
+    if email_type in [50, 60]:  # 类型为50/60的邮件优先使用 delEmailAll 接口
+        return ["delEmailAll", "delExpired", "delEmail", "judgement"]
+    if expired:  # 对于过期邮件优先使用专门的删除接口
+        return ["delExpired", "delEmail", "judgement"]
+    return ["delEmail", "judgement"]
+
+
+def _plan_delete_routes(email: Dict[str, Any]):
+    """
+    一封邮件依次尝试的删除接口（同步/异步共用）
+    :return: (路由表, 路由键, 接口顺序, 路由表记录的接口)
+    """
+    email_type = email.get("type", 0)
+    expired = is_email_expired(email.get("invalidDay", ""))
+    router = get_delete_router()
+    key = router.key(email_type, expired, email.get("receiveIs", 0) == 1)
+    chain = _delete_chain(email_type, expired)
+    learned = router.route(key)
+    if learned in _UNROUTABLE_ROUTES:
+        learned = None
+    if learned in chain:
+        chain = [learned] + [route for route in chain if route != learned]
+    return router, key, chain, learned
+
+
+def delete_email_routed(session: requests.Session, token: str, email: Dict[str, Any]) -> bool:
+    """
+    按删除接口路由表删除一封邮件：同类邮件上次成功的接口最先尝试，
+    失败时再按原来的顺序尝试其余接口（最后检查"审判"情况），成功的接口记入路由表（"审判"检查除外）
+    （路由表不在这里保存，由调用方在一轮删除结束后调用 get_delete_router().save()）
+    """
+    email_id = email.get("id", 0)
+    router, key, chain, learned = _plan_delete_routes(email)
     
-    deleted_count = 0
+    # 前一个接口失败时会把邮件加入无法处理缓存，不能因此跳过后面的接口
+    was_cached = is_in_unprocessable_cache(email_id)
+    for route in chain:
+        if not was_cached:
+            remove_from_unprocessable_cache(email_id)
+        if _DELETE_ROUTE_FUNCS[route](session, token, email_id):
+            if route not in _UNROUTABLE_ROUTES:
+                router.record_success(key, route)
+            return True
+        if route == learned:
+            router.record_miss(key, route)
+    if not was_cached:
+        add_to_unprocessable_cache(email_id)
+    return False
+
+
+def _delete_emails(session: requests.Session, token: str, emails: List[Dict[str, Any]], delete_emails: List[Dict[str, Any]]) -> None:
+    """
+    删除分类好的已领取/过期邮件并打印统计
+    """
+    if not emails:
+        print_and_flush("⚠️ 暂无邮件或获取失败")
+        return
+    
+    deleted = []
     error_count = 0
     
-    for email in emails:
-        try:
-            email_id = email.get("id", 0)
-            title = email.get("title", "无标题")
-            receive_is = email.get("receiveIs", 0)
-            invalid_day = email.get("invalidDay", "")
-            email_type = email.get("type", 0)
-            
-            # 删除条件：已领取 或 已过期，并排除类型为40的邮件
-            should_delete = False
+    # 删除失败时的无法处理缓存更新在全部删除完成后统一写入
+    with batched_cache_writes(token):
+        for email in delete_emails:
+            try:
+                _announce_delete(email)
             
-            # 已领取的邮件（无论是否过期）
-            if receive_is == 1 and email_id and email_type != 40:
-                should_delete = True
-                print_and_flush(f"🗑️ 正在删除已领取邮件: '{title}' (ID: {email_id})")
+                # 按路由表选择删除接口（同类邮件上次成功的接口优先）
+                success = delete_email_routed(session, token, email)
             
-            # 过期的邮件（无论是否已领取）
-            elif is_email_expired(invalid_day) and email_id and email_type != 40:
-                receive_status = "已领" if receive_is == 1 else "未领"
-                print_and_flush(f"🗑️ 正在删除过期邮件: [{receive_status}] '{title}' (ID: {email_id})")
-                should_delete = True
-            
-            if should_delete:
-                # 根据邮件类型选择删除接口
-                success = False
-                if email_type in [50, 60]:  # 支持类型50和60
-                    # 类型为50/60的邮件优先使用 delEmailAll 接口
-                    if delete_email_all(session, token, email_id):
-                        success = True
-                    # 如果 delEmailAll 接口失败，再尝试其他接口
-                    elif delete_expired_email(session, token, email_id):
-                        success = True
-                    elif delete_email(session, token, email_id):
-                        success = True
-                else:
-                    # 对于过期邮件优先使用专门的删除接口
-                    if is_email_expired(invalid_day):
-                        if delete_expired_email(session, token, email_id):
-                            success = True
-                        elif delete_email(session, token, email_id):
-                            success = True
-                    else:
-                        if delete_email(session, token, email_id):
-                            success = True
-                
-                # 如果所有接口都失败，检查是否是"审判"情况
-                if not success:
-                    # 尝试调用任意一个删除接口，检查返回信息
-                    # 这里我们使用 delete_email 接口来检查是否是审判情况
-                    url = "https://q-jiang.myprint.top/api/user-email/delEmail"
-                    headers = {"Token": token, "Content-Type": "application/json"}
-                    payload = {"id": email_id}
-                    try:
-                        response = session.post(url, headers=headers, json=payload, timeout=10)
-                        response.raise_for_status()
-                        data = response.json()
-                        print_and_flush(f"📤 审判检查 - 邮件 {email_id} 接口响应: {data}")  # 打印响应数据
-                        error_msg = data.get('msg', '')
-                        # 当出现"此接口只可访问一次次数+1，迎接审判吧！"相关错误时
-                        if "此接口只可访问一次" in error_msg and "迎接审判吧" in error_msg:
-                            print_and_flush(f"⚠️ 邮件 {email_id} 触发审判机制，正在删除...")
-                            # 审判情况下，我们视作删除成功
-                            success = True
-                    except Exception as e:
-                        print_and_flush(f"⚠️ 检查审判情况时发生异常: {e}")
-                        pass  # 忽略检查过程中的异常
-                
                 # 根据操作结果更新计数
                 if success:
-                    deleted_count += 1
+                    deleted.append(email)
                 else:
                     error_count += 1
-                    
-                time.sleep(0.5)  # 避免请求过快
                 
-        except Exception as e:
-            print_and_flush(f"⚠️ 删除邮件 '{email.get('title', '未知')}' 时出错: {e}")
-            error_count += 1
-    
+            except Exception as e:
+                print_and_flush(f"⚠️ 删除邮件 '{email.get('title', '未知')}' 时出错: {e}")
+                error_count += 1
+        
+        # 全部删除完成后只获取一次邮件列表，核对接口返回成功的邮件是否真的删除了
+        if deleted:
+            remaining = _remaining_email_ids(session, token, [email.get("id") for email in deleted])
+            still_there = _settle_verified_deletes(deleted, remaining)
+            error_count += still_there
+        else:
+            still_there = 0
+    get_delete_router().save()
+    deleted_count = len(deleted) - still_there
+    _print_delete_summary(deleted_count, error_count)
+
+def _announce_delete(email: Dict[str, Any]) -> None:
+    email_id = email.get("id", 0)
+    title = email.get("title", "无标题")
+    receive_is = email.get("receiveIs", 0)
+
+    # 已领取的邮件（无论是否过期）
+    if receive_is == 1:
+        print_and_flush(f"🗑️ 正在删除已领取邮件: '{title}' (ID: {email_id})")
+    # 过期的邮件（无论是否已领取）
+    else:
+        receive_status = "已领" if receive_is == 1 else "未领"
+        print_and_flush(f"🗑️ 正在删除过期邮件: [{receive_status}] '{title}' (ID: {email_id})")
+
+def _settle_verified_deletes(deleted: List[Dict[str, Any]], remaining) -> int:
+    """
+    按核对结果处理接口返回删除成功的邮件（同步/异步共用）
+    :param remaining: 仍然存在的邮件ID，None 表示邮件列表获取失败、无法核对
+    :return: 接口返回成功但仍然存在的邮件数
+    """
+    if remaining is None:
+        print_and_flush(f"⚠️ 获取邮件列表失败，{len(deleted)} 封邮件的删除结果未能核对")
+        return 0
+    for email in deleted:
+        email_id = email.get("id")
+        if email_id in remaining:
+            print_and_flush(f"⚠️ 邮件 '{email.get('title', '无标题')}' (ID: {email_id}) 删除接口返回成功，但邮件仍存在")
+            add_to_unprocessable_cache(email_id)
+    if not remaining:
+        print_and_flush(f"🔍 已核对邮件列表，{len(deleted)} 封邮件确认删除")
+    return len(remaining)
+
+def _print_delete_summary(deleted_count: int, error_count: int) -> None:
     if deleted_count > 0:
         print_and_flush(f"✅ 共删除了 {deleted_count} 封邮件")
     if error_count > 0:
@@ -893,104 +1256,620 @@ def delete_claimed_and_expired_emails(session: requests.Session, token: str) ->
     if deleted_count == 0 and error_count == 0:
         print_and_flush("🔍 没有需要删除的邮件")
 
-def verify_email_deleted(session: requests.Session, token: str, email_id: int) -> bool:
+def delete_claimed_and_expired_emails(session: requests.Session, token: str) -> None:
     """
-    验证邮件是否真的被删除
+    删除所有已领取的邮件和所有过期的邮件
     """
-    emails = get_email_list(session, token)
-    if not emails:
-        # 如果获取邮件列表失败，我们无法验证，返回True假设删除成功
-        return True
+    print_and_flush("🗑️ 正在删除已领取和过期的邮件...")
+    emails = load_email_list(session, token)
+    delete_ids = classify_emails(emails)["delete"]
+    _delete_emails(session, token, emails, [email for email in emails if email.get("id") in delete_ids])
+
+def process_inbox(session: requests.Session, token: str, separate_lottery: bool = False) -> None:
+    """
+    一次完成邮件处理：展示未领取邮件 -> 领取附件/抽奖 -> 删除已领取和过期的邮件
+    只获取一次邮件列表、每封邮件只分类一次，输出与依次调用 display_emails、
+    get_all_attachments、delete_claimed_and_expired_emails 相同
     
-    # 检查邮件是否还在列表中
+    Args:
+        session: requests会话对象
+        token: 用户认证token
+        separate_lottery: 是否先单独处理抽奖邮件（同 process_all_customs_emails 的输出）
+    """
+    # 整个邮件处理期间的无法处理缓存修改最后统一写入
+    with batched_cache_writes(token):
+        print_and_flush("📧 正在获取邮件列表...")
+        emails = load_email_list(session, token)
+        plan = classify_emails(emails)
+        _display_unclaimed(emails, plan)
+    
+        claimed = set()
+        if separate_lottery:
+            print_and_flush("\n 正在处理关卡抽奖邮件...")
+            reset_lottery_tracker()
+            print_and_flush("🎲 正在处理所有抽奖邮件...")
+            claimed |= _draw_lotteries(session, token, emails, plan["lottery"])
+    
+        print_and_flush("\n📎 正在领取普通邮件附件...")
+        print_and_flush("📎 正在检查可领取的邮件附件...")
+        if get_lottery_tracker()["total_draws"] == 0:
+            reset_lottery_tracker()
+        claim_emails = [email for email in plan["claim"] if email.get("id") not in claimed]
+        claimed |= _claim_attachments(session, token, emails, claim_emails, plan["expired"])
+    
+        print_and_flush("🗑️ 正在删除已领取和过期的邮件...")
+        _delete_emails(session, token, emails, _inbox_deletions(emails, plan, claimed))
+
+def _inbox_deletions(emails: List[Dict[str, Any]], plan: Dict[str, Any], claimed: set) -> List[Dict[str, Any]]:
+    """本轮要删除的邮件：已领取/过期的，加上刚领取的（类型40除外），不用重新获取列表"""
+    delete_emails = []
     for email in emails:
-        if email.get("id") == email_id:
-            return False  # 邮件仍然存在
-    return True  # 邮件已被删除
+        email_id = email.get("id")
+        if email_id in claimed and email.get("type", 0) != 40:
+            email["receiveIs"] = 1
+        if email_id in plan["delete"] or (email_id in claimed and email.get("type", 0) != 40):
+            delete_emails.append(email)
+    return delete_emails
+
+# 批量删除时同时进行的删除请求数
+DELETE_MAX_IN_FLIGHT = 4
+
+def _remaining_email_ids(session: requests.Session, token: str, email_ids) -> Optional[set]:
+    """
+    重新获取一次邮件列表（不使用快照），返回 email_ids 中仍然存在的邮件
+    获取失败时无法验证，返回 None
+    """
+    snapshot = get_email_snapshot(get_client(session, token).token)
+    snapshot.invalidate()
+    get_email_list(session, token)
+    return _remaining_in_snapshot(snapshot, email_ids)
+
+def _remaining_in_snapshot(snapshot: EmailSnapshot, email_ids) -> Optional[set]:
+    """刚重新获取的快照中仍然存在的邮件（同步/异步共用），获取失败（快照为空）时返回 None"""
+    if not snapshot.fresh():
+        return None
+    return {email_id for email_id in email_ids if snapshot.contains(email_id)}
+
+def verify_email_deleted(session: requests.Session, token: str, email_id: int) -> bool:
+    """
+    验证邮件是否真的被删除（邮件列表获取失败时无法确认，返回 False）
+    """
+    remaining = _remaining_email_ids(session, token, [email_id])
+    return remaining is not None and email_id not in remaining
+
+def delete_emails_with_verification(session: requests.Session, token: str, email_ids, delete_func=None, label: str = "邮件 {}") -> set:
+    """
+    批量删除邮件并验证：删除请求连续发出（最多 DELETE_MAX_IN_FLIGHT 个同时进行），
+    全部完成后只获取一次邮件列表核对，无法处理缓存的更新最后统一写入
+    
+    Args:
+        email_ids: 要删除的邮件ID
+        delete_func: 删除接口函数（delete_email / delete_expired_email / delete_email_all），默认 delete_email
+        label: 输出中的邮件描述，{} 处填邮件ID
+    
+    Returns:
+        确认删除成功的邮件ID（邮件列表获取失败时接口返回成功的邮件未经确认，不在其中）
+    """
+    delete_func = delete_func or delete_email
+    pending = []
+    for email_id in email_ids:
+        # 检查邮件是否在无法处理缓存中
+        if is_in_unprocessable_cache(email_id):
+            print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
+            continue
+        pending.append(email_id)
+    if not pending:
+        return set()
+    
+    confirmed = set()
+    with batched_cache_writes(token):
+        with ThreadPoolExecutor(max_workers=min(DELETE_MAX_IN_FLIGHT, len(pending)), thread_name_prefix="delete") as executor:
+            futures = {
+                email_id: executor.submit(contextvars.copy_context().run, delete_func, session, token, email_id)
+                for email_id in pending
+            }
+        accepted = [email_id for email_id in pending if futures[email_id].result()]
+        remaining = _remaining_email_ids(session, token, accepted) if accepted else set()
+        
+        for email_id in pending:
+            if email_id not in accepted:
+                # 添加到无法处理缓存
+                add_to_unprocessable_cache(email_id)
+            elif remaining is None:
+                print_and_flush(f"⚠️ {label.format(email_id)} 删除接口返回成功，但获取邮件列表失败，未能确认")
+            elif email_id in remaining:
+                print_and_flush(f"⚠️ {label.format(email_id)} 删除接口返回成功，但邮件仍存在")
+                # 添加到无法处理缓存
+                add_to_unprocessable_cache(email_id)
+            else:
+                print_and_flush(f"✅ {label.format(email_id)} 已确认删除成功")
+                # 从无法处理缓存中移除（如果存在）
+                remove_from_unprocessable_cache(email_id)
+                confirmed.add(email_id)
+    return confirmed
 
 def delete_email_with_verification(session: requests.Session, token: str, email_id: int) -> bool:
     """
     删除邮件并验证是否成功
     """
+    return email_id in delete_emails_with_verification(session, token, [email_id], delete_email, "邮件 {}")
+
+def delete_expired_email_with_verification(session: requests.Session, token: str, email_id: int) -> bool:
+    """
+    删除过期邮件并验证是否成功
+    """
+    return email_id in delete_emails_with_verification(session, token, [email_id], delete_expired_email, "过期邮件 {}")
+
+def delete_email_all_with_verification(session: requests.Session, token: str, email_id: int) -> bool:
+    """
+    使用delEmailAll接口删除邮件并验证是否成功
+    """
+    return email_id in delete_emails_with_verification(session, token, [email_id], delete_email_all, "邮件 {} (delEmailAll)")
+
+
+# ==================== 异步版本 ====================
+# 与上面的同步函数一一对应，返回值相同；响应处理、统计和输出都走同一组 _handle_* / _print_* 等函数，
+# 修改流程时两边一起改。无法处理缓存、抽奖记录按 contextvars 隔离，同一事件循环中的多个账号互不干扰
+async def get_email_list_async(session, token: str) -> List[Dict[str, Any]]:
+    """
+    获取邮件列表（异步版）
+    
+    Args:
+        session: AsyncQJiangClient，可为 None
+        token: 用户认证token
+    
+    Returns:
+        邮件列表
+    """
+    client = get_async_client(session, token)
+    
+    try:
+        data = await client.post("user-email/list", {})
+        return _handle_get_email_list(client, data)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except json.JSONDecodeError as e:
+        print_and_flush(f"⚠️ JSON解析错误: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 获取邮件列表时发生未知错误: {e}")
+    
+    return []
+
+async def load_email_list_async(session, token: str) -> List[Dict[str, Any]]:
+    """读取邮件列表（异步版），快照有效时直接使用快照"""
+    snapshot = get_email_snapshot(get_async_client(session, token).token)
+    if snapshot.fresh():
+        return snapshot.emails()
+    return await get_email_list_async(session, token)
+
+async def email_exists_async(session, token: str, email_id: int) -> bool:
+    """按快照检查邮件是否仍然存在（异步版）"""
+    snapshot = get_email_snapshot(get_async_client(session, token).token)
+    if not snapshot.fresh():
+        await get_email_list_async(session, token)
+    return snapshot.contains(email_id)
+
+async def display_emails_async(session, token: str) -> None:
+    print_and_flush("📧 正在获取邮件列表...")
+    emails = await load_email_list_async(session, token)
+    _display_unclaimed(emails, classify_emails(emails))
+
+async def read_email_async(session, token: str, email_id: int) -> bool:
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/read", payload)
+        return _handle_read_email(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 阅读邮件时发生未知错误: {e}")
+    return False
+
+async def delete_email_async(session, token: str, email_id: int) -> bool:
     # 检查邮件是否在无法处理缓存中
     if is_in_unprocessable_cache(email_id):
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    # 先尝试删除
-    if delete_email(session, token, email_id):
-        # 验证是否真的删除
-        if verify_email_deleted(session, token, email_id):
-            print_and_flush(f"✅ 邮件 {email_id} 已确认删除成功")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
-            return True
-        else:
-            print_and_flush(f"⚠️ 邮件 {email_id} 删除接口返回成功，但邮件仍存在")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return False
-    else:
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/delEmail", payload)
+        return _handle_delete_email(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
         add_to_unprocessable_cache(email_id)
-        return False
+    except Exception as e:
+        print_and_flush(f"⚠️ 删除邮件时发生未知错误: {e}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    return False
 
-def delete_expired_email_with_verification(session: requests.Session, token: str, email_id: int) -> bool:
+async def delete_expired_email_async(session, token: str, email_id: int) -> bool:
     """
-    删除过期邮件并验证是否成功
+    删除过期邮件（异步版）
+    使用专门的删除过期邮件接口
     """
     # 检查邮件是否在无法处理缓存中
     if is_in_unprocessable_cache(email_id):
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    # 先尝试删除
-    if delete_expired_email(session, token, email_id):
-        # 验证是否真的删除
-        if verify_email_deleted(session, token, email_id):
-            print_and_flush(f"✅ 过期邮件 {email_id} 已确认删除成功")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
-            return True
-        else:
-            print_and_flush(f"⚠️ 过期邮件 {email_id} 删除接口返回成功，但邮件仍存在")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
-            return False
-    else:
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/delEmail", payload)
+        return _handle_delete_expired_email(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
         add_to_unprocessable_cache(email_id)
-        return False
+    except Exception as e:
+        print_and_flush(f"⚠️ 删除过期邮件时发生未知错误: {e}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    return False
 
-def delete_email_all_with_verification(session: requests.Session, token: str, email_id: int) -> bool:
+async def delete_email_all_async(session, token: str, email_id: int) -> bool:
     """
-    使用delEmailAll接口删除邮件并验证是否成功
+    使用 delEmailAll 接口删除邮件（异步版）
+    专门用于删除类型为50和60的邮件
     """
     # 检查邮件是否在无法处理缓存中
     if is_in_unprocessable_cache(email_id):
         print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过删除")
         return False
     
-    # 先尝试删除
-    if delete_email_all(session, token, email_id):
-        # 验证是否真的删除
-        if verify_email_deleted(session, token, email_id):
-            print_and_flush(f"✅ 邮件 {email_id} (delEmailAll) 已确认删除成功")
-            # 从无法处理缓存中移除（如果存在）
-            if email_id in unprocessable_emails_cache:
-                unprocessable_emails_cache.discard(email_id)
-                save_cache_to_file()  # 保存到文件
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/delEmailAll", payload)
+        return _handle_delete_email_all(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e} (使用delEmailAll接口)")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    except Exception as e:
+        print_and_flush(f"⚠️ 删除邮件时发生未知错误: {e} (使用delEmailAll接口)")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    return False
+
+async def get_email_attachment_async(session, token: str, email_id: int) -> bool:
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/getAttachment", payload)
+        return _handle_get_email_attachment(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 领取邮件附件时发生未知错误: {e}")
+    return False
+
+async def receive_email_attachment_async(session, token: str, email_id: int) -> bool:
+    """
+    领取类型为50和60的邮件附件（异步版）
+    使用 receiveEmail 接口
+    """
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/receiveEmail", payload)
+        return _handle_receive_email_attachment(client, data, email_id)
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+    except Exception as e:
+        print_and_flush(f"⚠️ 领取邮件附件时发生未知错误: {e}")
+    return False
+
+async def get_lottery_info_async(session, token: str, email_id: int, uuid: str) -> Dict[str, Any]:
+    """获取类型40邮件的抽奖信息（异步版）"""
+    # 检查邮件是否在无法处理缓存中
+    if is_in_unprocessable_cache(email_id):
+        print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过处理")
+        return {}
+    
+    client = get_async_client(session, token)
+    payload = {"id": email_id, "uuid": uuid}
+    
+    try:
+        data = await client.post("user-email/customsEmailRewardInfo", payload)
+        lottery_info, spent = _handle_get_lottery_info(client, data, email_id)
+        if lottery_info is not None:
+            return lottery_info
+        if spent:
+            await delete_email_async(session, token, email_id)
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+        return {}
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    except Exception as e:
+        print_and_flush(f"⚠️ 获取抽奖信息时发生未知错误: {e}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    
+    return {}
+
+async def execute_lottery_async(session, token: str, email_id: int, uuid: str, lottery_info: Dict[str, Any] = None, email_title: str = "") -> bool:
+    """执行类型40邮件的抽奖（异步版）"""
+    # 检查邮件是否在无法处理缓存中
+    if is_in_unprocessable_cache(email_id):
+        print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过处理")
+        return False
+    
+    client = get_async_client(session, token)
+    payload = {"id": email_id, "uuid": uuid, "giveUpList": []}
+    
+    try:
+        data = await client.post("user-email/customsEmailReward", payload)
+        _note_email_result(client, data, email_id, claimed=True)
+        
+        if client.is_success(data):
+            
+            # 当数据异常（例如返回None或空数据）时，删除邮件
+            if _lottery_data_broken(data, email_id):
+                # 调用删除接口删除此邮件
+                await delete_email_async(session, token, email_id)
+                record_lottery_result(email_id, email_title, "数据异常已删除")
+                # 添加到无法处理缓存
+                add_to_unprocessable_cache(email_id)
+                return False
+            
+            # 获取可抽奖物品列表（如果提供了lottery_info则使用，否则尝试重新获取）
+            if lottery_info and isinstance(lottery_info, dict):
+                goods_list = lottery_info.get("goodsVos", [])
+            else:
+                # 只有在没有提供lottery_info时才尝试获取，避免重复请求
+                goods_list = (await get_lottery_info_async(session, token, email_id, uuid) or {}).get("goodsVos", [])
+            
+            _report_lottery_reward(data, email_id, email_title, goods_list)
             return True
         else:
-            print_and_flush(f"⚠️ 邮件 {email_id} (delEmailAll) 删除接口返回成功，但邮件仍存在")
-            # 添加到无法处理缓存
-            add_to_unprocessable_cache(email_id)
+            _report_lottery_failure(data, email_id, email_title)
             return False
-    else:
+    except requests.exceptions.RequestException as e:
+        print_and_flush(f"⚠️ 网络请求异常: {e}")
         # 添加到无法处理缓存
         add_to_unprocessable_cache(email_id)
-        return False
\ No newline at end of file
+    except Exception as e:
+        print_and_flush(f"⚠️ 执行抽奖时发生未知错误: {e}")
+        # 添加到无法处理缓存
+        add_to_unprocessable_cache(email_id)
+    
+    # 记录异常的抽奖
+    record_lottery_result(email_id, email_title, "异常错误")
+    return False
+
+async def process_lottery_email_async(session, token: str, email_id: int, uuid: str, email_title: str = "") -> bool:
+    """处理类型为40的抽奖邮件（异步版）"""
+    # 检查邮件是否在无法处理缓存中
+    if is_in_unprocessable_cache(email_id):
+        print_and_flush(f"⏭️ 邮件 {email_id} 在无法处理缓存中，跳过处理")
+        return False
+    
+    # 首先获取抽奖信息
+    print_and_flush(f"🎲 正在获取邮件 {email_id} 的抽奖信息...")
+    lottery_info = await get_lottery_info_async(session, token, email_id, uuid)
+    if not _check_lottery_info(lottery_info, email_id, email_title):
+        return False
+    
+    # 执行抽奖，传递lottery_info避免重复请求
+    print_and_flush("🎲 正在执行抽奖...")
+    result = await execute_lottery_async(session, token, email_id, uuid, lottery_info, email_title)
+    
+    # 如果抽奖失败，添加到无法处理缓存
+    if not result:
+        add_to_unprocessable_cache(email_id)
+    
+    return result
+
+async def _draw_lotteries_async(session, token: str, emails: List[Dict[str, Any]], lottery_emails: List[Dict[str, Any]]) -> set:
+    """处理分类好的抽奖邮件并打印统计（异步版），返回抽奖成功的邮件ID"""
+    if not emails:
+        print_and_flush("⚠️ 暂无邮件或获取失败")
+        return set()
+    
+    with batched_cache_writes(token):
+        drawn = set()
+        for email in lottery_emails:
+            title = email.get("title", "无标题")
+            try:
+                email_id = email.get("id", 0)
+                uuid = email.get("uuid", "")
+                print_and_flush(f"🎲 正在处理抽奖邮件: '{title}' (ID: {email_id})")
+                # 再次检查邮件是否仍然存在（可能在处理其他邮件时已被删除，按快照判断）
+                if not await email_exists_async(session, token, email_id):
+                    print_and_flush(f"⚠️ 邮件 {email_id} 已被删除，跳过处理")
+                    continue
+                
+                if await process_lottery_email_async(session, token, email_id, uuid, title):
+                    drawn.add(email_id)
+            except Exception as e:
+                print_and_flush(f"⚠️ 处理抽奖邮件 '{title}' 时出错: {e}")
+        _print_draw_summary(drawn)
+        return drawn
+
+async def process_all_customs_emails_async(session, token: str) -> None:
+    """处理所有类型为40的抽奖邮件（异步版）"""
+    # 重置抽奖记录
+    reset_lottery_tracker()
+    
+    print_and_flush("🎲 正在处理所有抽奖邮件...")
+    emails = await load_email_list_async(session, token)
+    await _draw_lotteries_async(session, token, emails, classify_emails(emails)["lottery"])
+
+async def _claim_attachments_async(session, token: str, emails: List[Dict[str, Any]],
+                                   claim_emails: List[Dict[str, Any]], skipped_count: int) -> set:
+    """领取分类好的邮件附件（抽奖邮件执行抽奖）并打印统计（异步版），返回领取成功的邮件ID"""
+    if not emails:
+        print_and_flush("⚠️ 暂无邮件或获取失败")
+        return set()
+    with batched_cache_writes(token):
+        claimed = set()
+        lottery_count = 0
+        for email in claim_emails:
+            try:
+                email_id = email.get("id", 0)
+                title = email.get("title", "无标题")
+                email_type = email.get("type", 0)
+                uuid = email.get("uuid", "")
+            
+                # 再次检查邮件是否仍然存在（按快照判断）
+                if not await email_exists_async(session, token, email_id):
+                    print_and_flush(f"⚠️ 邮件 {email_id} 已被删除，跳过处理")
+                    continue
+            
+                if email_type == 40:
+                    print_and_flush(f"🎲 正在处理抽奖邮件 '{title}' ...")
+                    if await process_lottery_email_async(session, token, email_id, uuid, title):
+                        lottery_count += 1
+                        claimed.add(email_id)
+                else:
+                    print_and_flush(f"📥 正在领取邮件 '{title}' 的附件...")
+                    if email_type in [50, 60]:  # 类型为50/60的邮件使用 receiveEmail 接口
+                        result = await receive_email_attachment_async(session, token, email_id)
+                    else:
+                        result = await get_email_attachment_async(session, token, email_id)
+                
+                    if result:
+                        claimed.add(email_id)
+            except Exception as e:
+                print_and_flush(f"⚠️ 处理邮件 '{email.get('title', '未知')}' 时出错: {e}")
+        _print_attachment_summary(claimed, lottery_count, skipped_count)
+        return claimed
+
+async def get_all_attachments_async(session, token: str) -> None:
+    print_and_flush("📎 正在检查可领取的邮件附件...")
+    
+    # 重置抽奖记录（如果是第一次调用）
+    if get_lottery_tracker()["total_draws"] == 0:
+        reset_lottery_tracker()
+        
+    emails = await load_email_list_async(session, token)
+    plan = classify_emails(emails)
+    await _claim_attachments_async(session, token, emails, plan["claim"], plan["expired"])
+
+async def _delete_by_judgement_async(session, token: str, email_id: int) -> bool:
+    """检查"审判"情况（异步版，判断与 _delete_by_judgement 相同）"""
+    client = get_async_client(session, token)
+    payload = {"id": email_id}
+    try:
+        data = await client.post("user-email/delEmail", payload)
+        return _handle_judgement(client, data, email_id)
+    except Exception as e:
+        print_and_flush(f"⚠️ 检查审判情况时发生异常: {e}")
+    return False
+
+# 删除接口名 -> 异步删除函数（与 _DELETE_ROUTE_FUNCS 一一对应）
+_DELETE_ROUTE_FUNCS_ASYNC = {
+    "delEmailAll": delete_email_all_async,
+    "delExpired": delete_expired_email_async,
+    "delEmail": delete_email_async,
+    "judgement": _delete_by_judgement_async,
+}
+
+async def delete_email_routed_async(session, token: str, email: Dict[str, Any]) -> bool:
+    """按删除接口路由表删除一封邮件（异步版，与 delete_email_routed 共用同一路由表）"""
+    email_id = email.get("id", 0)
+    router, key, chain, learned = _plan_delete_routes(email)
+    
+    # 前一个接口失败时会把邮件加入无法处理缓存，不能因此跳过后面的接口
+    was_cached = is_in_unprocessable_cache(email_id)
+    for route in chain:
+        if not was_cached:
+            remove_from_unprocessable_cache(email_id)
+        if await _DELETE_ROUTE_FUNCS_ASYNC[route](session, token, email_id):
+            if route not in _UNROUTABLE_ROUTES:
+                router.record_success(key, route)
+            return True
+        if route == learned:
+            router.record_miss(key, route)
+    if not was_cached:
+        add_to_unprocessable_cache(email_id)
+    return False
+
+async def _remaining_email_ids_async(session, token: str, email_ids) -> Optional[set]:
+    """重新获取一次邮件列表，返回 email_ids 中仍然存在的邮件（异步版），获取失败时返回 None"""
+    snapshot = get_email_snapshot(get_async_client(session, token).token)
+    snapshot.invalidate()
+    await get_email_list_async(session, token)
+    return _remaining_in_snapshot(snapshot, email_ids)
+
+async def _delete_emails_async(session, token: str, emails: List[Dict[str, Any]], delete_emails: List[Dict[str, Any]]) -> None:
+    """删除分类好的已领取/过期邮件并打印统计（异步版）"""
+    if not emails:
+        print_and_flush("⚠️ 暂无邮件或获取失败")
+        return
+    
+    deleted = []
+    error_count = 0
+    
+    # 删除失败时的无法处理缓存更新在全部删除完成后统一写入
+    with batched_cache_writes(token):
+        for email in delete_emails:
+            try:
+                _announce_delete(email)
+                if await delete_email_routed_async(session, token, email):
+                    deleted.append(email)
+                else:
+                    error_count += 1
+            except Exception as e:
+                print_and_flush(f"⚠️ 删除邮件 '{email.get('title', '未知')}' 时出错: {e}")
+                error_count += 1
+        
+        # 全部删除完成后只获取一次邮件列表核对
+        if deleted:
+            remaining = await _remaining_email_ids_async(session, token, [email.get("id") for email in deleted])
+            still_there = _settle_verified_deletes(deleted, remaining)
+            error_count += still_there
+        else:
+            still_there = 0
+    get_delete_router().save()
+    deleted_count = len(deleted) - still_there
+    _print_delete_summary(deleted_count, error_count)
+
+async def delete_claimed_and_expired_emails_async(session, token: str) -> None:
+    """删除所有已领取的邮件和所有过期的邮件（异步版）"""
+    print_and_flush("🗑️ 正在删除已领取和过期的邮件...")
+    emails = await load_email_list_async(session, token)
+    delete_ids = classify_emails(emails)["delete"]
+    await _delete_emails_async(session, token, emails, [email for email in emails if email.get("id") in delete_ids])
+
+async def process_inbox_async(session, token: str, separate_lottery: bool = False) -> None:
+    """
+    一次完成邮件处理（异步版，流程和输出与 process_inbox 相同）
+    
+    Args:
+        session: AsyncQJiangClient，可为 None
+        token: 用户认证token
+        separate_lottery: 是否先单独处理抽奖邮件
+    """
+    # 整个邮件处理期间的无法处理缓存修改最后统一写入
+    with batched_cache_writes(token):
+        print_and_flush("📧 正在获取邮件列表...")
+        emails = await load_email_list_async(session, token)
+        plan = classify_emails(emails)
+        _display_unclaimed(emails, plan)
+    
+        claimed = set()
+        if separate_lottery:
+            print_and_flush("\n 正在处理关卡抽奖邮件...")
+            reset_lottery_tracker()
+            print_and_flush("🎲 正在处理所有抽奖邮件...")
+            claimed |= await _draw_lotteries_async(session, token, emails, plan["lottery"])
+    
+        print_and_flush("\n📎 正在领取普通邮件附件...")
+        print_and_flush("📎 正在检查可领取的邮件附件...")
+        if get_lottery_tracker()["total_draws"] == 0:
+            reset_lottery_tracker()
+        claim_emails = [email for email in plan["claim"] if email.get("id") not in claimed]
+        claimed |= await _claim_attachments_async(session, token, emails, claim_emails, plan["expired"])
+    
+        print_and_flush("🗑️ 正在删除已领取和过期的邮件...")
+        await _delete_emails_async(session, token, emails, _inbox_deletions(emails, plan, claimed))
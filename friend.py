@@ -1,6 +1,6 @@
 # friend.py
 import requests
-import time
+from api_client import get_client
 import sys
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
@@ -11,15 +11,12 @@ def get_friend_list(session, token):
     """
     获取基础好友列表
     """
-    url = "https://q-jiang.myprint.top/api/user/friendList"
-    headers = {"Token": token}
+    client = get_client(session, token)
 
     try:
-        response = session.post(url, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("user/friendList")
 
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             
             # 根据实际返回的数据结构，好友列表在 userFriendVos 键中
@@ -59,13 +56,10 @@ def get_friend_give_status(session, token):
 
     try:
         # 获取别人向我索要的记录
-        ask_url = "https://q-jiang.myprint.top/api/user/askGiftList"
-        headers = {"Token": token}
-        response = session.post(ask_url, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        client = get_client(session, token)
+        result = client.post("user/askGiftList")
 
-        if not (result.get("success") and str(result.get("code")) == "200"):
+        if not (client.is_success(result)):
             print_and_flush(f"⚠️ 获取 askGiftList 失败: {result.get('msg', '未知错误')}")
             for f in friends:
                 f["giveIs"] = None
@@ -131,15 +125,12 @@ def get_my_give_list(session, token):
     """
     获取我向好友赠送的列表
     """
-    url = "https://q-jiang.myprint.top/api/user/giveGiftList"
-    headers = {"Token": token}
+    client = get_client(session, token)
 
     try:
-        response = session.post(url, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("user/giveGiftList")
 
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             data = result.get("data", [])
             
             # 处理可能的字典格式数据
@@ -159,15 +150,12 @@ def get_friend_requests(session, token):
     """
     获取好友申请列表
     """
-    url = "https://q-jiang.myprint.top/api/user/askFriendList"
-    headers = {"Token": token}
+    client = get_client(session, token)
 
     try:
-        response = session.post(url, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("user/askFriendList")
 
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             return result.get("data", [])
         else:
             print_and_flush(f"❌ 获取好友申请列表失败: {result.get('msg', '未知错误')}")
@@ -182,20 +170,14 @@ def accept_friend_request(session, token, friend_id, requester_name):
     同意好友申请
     根据接口信息，需要传入 friendId 而不是 id
     """
-    url = "https://q-jiang.myprint.top/api/user/agreeFriend"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     data = {"friendId": friend_id}  # 根据你提供的信息，这里应该是 friendId
     
     try:
         print_and_flush(f"🤝 正在同意 {requester_name} 的好友申请...")
-        response = session.post(url, json=data, headers=headers)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("user/agreeFriend", data)
         
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             print_and_flush(f"✅ 成功添加 {requester_name} 为好友")
             return True
         else:
@@ -233,6 +215,5 @@ def auto_accept_friend_requests(session, token):
         else:
             fail_count += 1
             
-        time.sleep(1)  # 避免请求过快
     
     print_and_flush(f"\n🎉 好友申请处理完成！成功 {success_count} 人，失败 {fail_count} 人")
\ No newline at end of file
@@ -1,5 +1,6 @@
 # generalCard.py
 import requests
+from api_client import get_client
 import sys
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
@@ -41,16 +42,13 @@ def refresh_pub_with_silver_ticket(session: requests.Session, token: str) -> boo
     """
     使用银票刷新酒馆
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pub/refreshBySilverTicket"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     data = {}
     
     try:
-        response = session.post(url, headers=headers, json=data, timeout=10)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("mid-user-pub/refreshBySilverTicket", data)
         
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             print_and_flush(f"✅ 酒馆银票刷新成功")
             return True
         else:
@@ -65,22 +63,13 @@ def get_pub_general_list(session, token):
     获取酒馆中的武将列表
     返回: 武将列表（list）或 None（失败）
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pub/pubGeneralList"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取酒馆武将列表...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("mid-user-pub/pubGeneralList", {})
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             user_pub = result["data"].get("userPub")
             if not user_pub:
                 print_and_flush("❌ 响应数据中缺少 'userPub' 字段")
@@ -111,24 +100,15 @@ def recruit_general(session, token, mup_id):
     执行酒馆招募操作
     返回: 招募结果（dict）或 None（失败）
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pub/recruitGeneral"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     data = {"mupId": mup_id}
 
     try:
         print_and_flush(f"🚀 正在执行酒馆招募 (mupId: {mup_id})...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("mid-user-pub/recruitGeneral", data)
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             # 检查所有可能包含武将信息的字段
             recruited_general = None
             
@@ -1,6 +1,7 @@
 # gift.py
-import time
+import asyncio
 import requests
+from api_client import get_client, get_async_client
 from friend import get_friend_give_status, get_my_give_list, get_friend_list
 import sys
 
@@ -21,11 +22,7 @@ def ask_gift(session, token, friend_id, friend_name, goodsid):
     """
     向单个好友发起索要请求
     """
-    url = "https://q-jiang.myprint.top/api/user/askGift"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     data = {"friendId": friend_id, "goodsId": goodsid}
     
     # 关闭调试打印
@@ -35,45 +32,40 @@ def ask_gift(session, token, friend_id, friend_name, goodsid):
     
     try:
         print_and_flush(f"🎁 正在向 {friend_name} 索要...")
-        response = session.post(url, json=data, headers=headers)
-        response.raise_for_status()
-        result = response.json()
-        # 关闭调试打印
-        #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
-        if result.get("success") and str(result.get("code")) == "200":
-            print_and_flush(f"✅ 索要请求发送成功")
-            return True
-        else:
-            msg = result.get("msg", "未知错误")
-            if "已经索要" in msg or "已索要" in msg:
-                print_and_flush(f"🟡 已索要")
-            elif "不是好友" in msg:
-                print_and_flush(f"🚫 非好友")
-            elif "无法索要" in msg:
-                print_and_flush(f"🚫 无法索要")
-            else:
-                print_and_flush(f"❌ {msg}")
-            return False
+        result = client.post("user/askGift", data)
+        return _handle_ask_gift(client, result)
     except Exception as e:
         print_and_flush(f"❌ 请求异常: {str(e)}")
         return False
 
 
-def ask_gifts_to_all_friends(session, token, goodsid):
+def _handle_ask_gift(client, result):
+    """处理索要接口的返回（同步/异步共用）"""
+    # 关闭调试打印
+    #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
+    if client.is_success(result):
+        print_and_flush("✅ 索要请求发送成功")
+        return True
+    else:
+        msg = result.get("msg", "未知错误")
+        if "已经索要" in msg or "已索要" in msg:
+            print_and_flush("🟡 已索要")
+        elif "不是好友" in msg:
+            print_and_flush("🚫 非好友")
+        elif "无法索要" in msg:
+            print_and_flush("🚫 无法索要")
+        else:
+            print_and_flush(f"❌ {msg}")
+        return False
+
+
+def _askable_friends(friends):
     """
-    批量向所有好友索要指定资源
+    打印索要前的统计，返回今天还能索要的好友（同步/异步共用）
     """
-    if goodsid not in GIFT_ITEMS:
-        print_and_flush(f"❌ 无效的资源编号: {goodsid}")
-        return
-    resource_name = GIFT_ITEMS[goodsid]
-    print_and_flush(f"\n📬 开始批量索要【{resource_name}】...")
-
-    # 直接使用好友列表，其中 askIs 字段表示今天是否已索要
-    friends = get_friend_list(session, token)
     if not friends:
         print_and_flush("❌ 好友列表为空或获取失败")
-        return
+        return []
 
     # askIs: 0=未索要, 1=已索要
     can_ask_list = [f for f in friends if f.get("askIs") == 0]
@@ -88,14 +80,31 @@ def ask_gifts_to_all_friends(session, token, goodsid):
         print_and_flush(f"🟡 {already_count} 位已索要（今日）")
     if available == 0:
         print_and_flush("📭 今日已向所有好友索要过")
-        return
+        return []
 
     print_and_flush(f"📤 正在向 {available} 位好友发送请求...\n")
+    return can_ask_list
+
+
+def ask_gifts_to_all_friends(session, token, goodsid):
+    """
+    批量向所有好友索要指定资源
+    """
+    if goodsid not in GIFT_ITEMS:
+        print_and_flush(f"❌ 无效的资源编号: {goodsid}")
+        return
+    resource_name = GIFT_ITEMS[goodsid]
+    print_and_flush(f"\n📬 开始批量索要【{resource_name}】...")
+
+    # 直接使用好友列表，其中 askIs 字段表示今天是否已索要
+    can_ask_list = _askable_friends(get_friend_list(session, token))
+    if not can_ask_list:
+        return
+
     success_count = 0
     for friend in can_ask_list:
         if ask_gift(session, token, friend["userId"], friend["userName"], goodsid=goodsid):
             success_count += 1
-        time.sleep(1.2)
     print_and_flush(f"\n🎉 批量索要完成！成功向 {success_count} 人发送请求")
 
 
@@ -105,11 +114,7 @@ def handle_received_ask_request(session, token, requester_id, goods_id):
     单次处理一个索要请求
     返回: "success" 成功, "already_done" 已处理, "failed" 失败
     """
-    url = "https://q-jiang.myprint.top/api/user/giveGift"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     data = {"friendId": requester_id, "goodsId": goods_id}
     
     # 关闭调试打印
@@ -118,39 +123,40 @@ def handle_received_ask_request(session, token, requester_id, goods_id):
     #print_and_flush(f"  -> 请求参数: friendId={requester_id}, goodsId={goods_id}")
     
     try:
-        response = session.post(url, json=data, headers=headers)
-        # 关闭调试打印
-        #print_and_flush(f"  -> HTTP状态码: {response.status_code}")  # 打印HTTP状态码
-        if response.status_code != 200:
-            # 关闭调试打印
-            #print_and_flush(f"  -> 响应内容: {response.text}")  # 打印响应内容
-            return "failed"
-        result = response.json()
-        # 关闭调试打印
-        #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
-        if result.get("success") and str(result.get("code")) == "200":
-            return "success"
-        else:
-            msg = result.get("msg", "未知错误")
-            if "已经赠送" in msg or "已经赠过" in msg or "今天已经赠送" in msg:
-                return "already_done"
-            else:
-                print_and_flush(f"❌ 赠送失败: {msg}")
-                return "failed"
+        response = client.request("user/giveGift", data)
+        return _handle_give_gift(client, response)
     except Exception as e:
         print_and_flush(f"❌ 赠送异常: {str(e)}")
         return "failed"
 
 
-def handle_received_ask_requests(session, token):
-    """
-    自动处理所有【别人向你】发起的索要请求
-    """
-    print_and_flush("\n📨 开始处理【别人向你】发起的索要请求...")
-    friends = get_friend_give_status(session, token)
+def _handle_give_gift(client, response):
+    """处理赠送接口的响应（同步/异步共用）"""
+    # 关闭调试打印
+    #print_and_flush(f"  -> HTTP状态码: {response.status_code}")  # 打印HTTP状态码
+    if response.status_code != 200:
+        # 关闭调试打印
+        #print_and_flush(f"  -> 响应内容: {response.text}")  # 打印响应内容
+        return "failed"
+    result = response.json()
+    # 关闭调试打印
+    #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
+    if client.is_success(result):
+        return "success"
+    else:
+        msg = result.get("msg", "未知错误")
+        if "已经赠送" in msg or "已经赠过" in msg or "今天已经赠送" in msg:
+            return "already_done"
+        else:
+            print_and_flush(f"❌ 赠送失败: {msg}")
+            return "failed"
+
+
+def _pending_ask_requests(friends):
+    """打印收到的索要记录统计，返回待处理的请求（同步/异步共用）"""
     if not friends:
         print_and_flush("📪 无任何索要请求")
-        return
+        return []
 
     # 有 askId 并且 giveIs != 1 才表示需要处理 (giveIs: 1=已赠送，0=未赠送)
     pending = [f for f in friends if f.get("askId") and f.get("giveIs") != 1]
@@ -163,30 +169,46 @@ def handle_received_ask_requests(session, token):
 
     if not pending:
         print_and_flush("✅ 所有请求均已处理")
-        return
+        return []
 
     print_and_flush(f"⏳ 正在处理 {len(pending)} 条请求...\n")
-    success_count = 0
-    failed_count = 0
-    already_processed_count = 0
-    
+    return pending
+
+
+def _report_give_result(f, result, counts):
+    """打印单条索要请求的处理结果并计数（同步/异步共用）"""
+    goods_name = GIFT_ITEMS.get(f["goodsId"], f"未知资源({f['goodsId']})")
+    if result == "success":
+        print_and_flush(f"  ✅ 已向 {f['userName']} 赠送 {goods_name}")
+    elif result == "already_done":
+        print_and_flush(f"  🟡 {f['userName']} 的请求已处理")
+    else:
+        print_and_flush(f"  ❌ 向 {f['userName']} 赠送失败")
+        result = "failed"
+    counts[result] += 1
+
+
+def _print_give_summary(counts):
+    print_and_flush(f"\n🎉 赠送处理完成！成功 {counts['success']} 人，失败 {counts['failed']} 人，已处理 {counts['already_done']} 人")
+
+
+def handle_received_ask_requests(session, token):
+    """
+    自动处理所有【别人向你】发起的索要请求
+    """
+    print_and_flush("\n📨 开始处理【别人向你】发起的索要请求...")
+    pending = _pending_ask_requests(get_friend_give_status(session, token))
+    if not pending:
+        return
+
+    counts = {"success": 0, "failed": 0, "already_done": 0}
     for f in pending:
-        goods_name = GIFT_ITEMS.get(f["goodsId"], f"未知资源({f['goodsId']})")
         # 关闭调试打印
-        #print_and_flush(f"  处理请求: {f['userName']} 索要 {goods_name}")  # 打印正在处理的请求
+        #print_and_flush(f"  处理请求: {f['userName']} 索要 {f['goodsId']}")  # 打印正在处理的请求
         result = handle_received_ask_request(session, token, f["userId"], f["goodsId"])
-        if result == "success":
-            print_and_flush(f"  ✅ 已向 {f['userName']} 赠送 {goods_name}")
-            success_count += 1
-        elif result == "already_done":
-            print_and_flush(f"  🟡 {f['userName']} 的请求已处理")
-            already_processed_count += 1
-        else:
-            print_and_flush(f"  ❌ 向 {f['userName']} 赠送失败")
-            failed_count += 1
-        time.sleep(1.0)
+        _report_give_result(f, result, counts)
 
-    print_and_flush(f"\n🎉 赠送处理完成！成功 {success_count} 人，失败 {failed_count} 人，已处理 {already_processed_count} 人")
+    _print_give_summary(counts)
 
 
 # ==================== 3. 自动领取好友赠送的资源 ====================
@@ -195,11 +217,7 @@ def receive_gift(session, token, giver_id):
     领取单个好友赠送的资源
     """
     # 使用正确的接口 receiveFriendGift
-    url = "https://q-jiang.myprint.top/api/user/receiveFriendGift"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     data = {"friendId": giver_id}
     
     # 关闭调试打印
@@ -208,32 +226,30 @@ def receive_gift(session, token, giver_id):
     #print_and_flush(f"  -> 请求参数: friendId={giver_id}")
     
     try:
-        response = session.post(url, json=data, headers=headers)
-        # 关闭调试打印
-        #print_and_flush(f"  -> HTTP状态码: {response.status_code}")  # 打印HTTP状态码
-        response.raise_for_status()
-        result = response.json()
-        # 关闭调试打印
-        #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
-        if result.get("success") and str(result.get("code")) == "200":
-            goods_list = result.get("data", [])
-            return True, goods_list
-        else:
-            return False, [result.get("msg", "未知错误")]
+        result = client.post("user/receiveFriendGift", data)
+        return _handle_receive_gift(client, result)
     except requests.exceptions.RequestException as e:
         return False, [f"网络请求错误: {str(e)}"]
     except Exception as e:
         return False, [str(e)]
 
 
-def receive_gifts_from_friends(session, token):
-    print_and_flush("\n📥 开始检查并领取好友赠送的资源...")
-    
-    # 通过 giveGiftList 接口获取我向别人赠送的记录，并检查别人是否已赠送给我
-    my_give_list = get_my_give_list(session, token)
+def _handle_receive_gift(client, result):
+    """处理领取接口的返回（同步/异步共用）"""
+    # 关闭调试打印
+    #print_and_flush(f"  -> 响应结果: {result}")  # 打印响应结果
+    if client.is_success(result):
+        goods_list = result.get("data", [])
+        return True, goods_list
+    else:
+        return False, [result.get("msg", "未知错误")]
+
+
+def _pending_gifts(my_give_list):
+    """打印赠送记录统计，返回对方已赠送但尚未领取的记录（同步/异步共用）"""
     if not my_give_list:
         print_and_flush("📭 无任何赠送记录")
-        return
+        return []
 
     # receiveIs=0 表示对方已赠送但我未领取
     pending = [item for item in my_give_list if item.get("receiveIs") == 0]
@@ -246,50 +262,59 @@ def receive_gifts_from_friends(session, token):
 
     if not pending:
         print_and_flush("✅ 所有礼物均已领取")
-        return
+        return []
 
     print_and_flush(f"⏳ 正在领取 {len(pending)} 份礼物...\n")
+    return pending
+
+
+def _report_received(item, success, goods_list):
+    """打印单份礼物的领取结果（同步/异步共用）"""
+    goods_name = GIFT_ITEMS.get(item["giveGiftGoodsId"], f"未知资源({item['giveGiftGoodsId']})")
+    if success:
+        # 更安全的检查方式
+        try:
+            if goods_list and isinstance(goods_list, list) and len(goods_list) > 0:
+                gift_item = goods_list[0]
+                name = gift_item.get('name', goods_name) if isinstance(gift_item, dict) else goods_name
+                count = gift_item.get('goodsNum', 1) if isinstance(gift_item, dict) else 1
+                print_and_flush(f"  ✅ 领取成功：{name} ×{count}")
+            else:
+                print_and_flush("  ✅ 领取成功")
+        except Exception as e:
+            print_and_flush(f"  ✅ 领取成功（解析明细出错: {e}）")
+    else:
+        # 更安全的错误处理
+        try:
+            error_msg = goods_list[0] if goods_list and isinstance(goods_list, list) and len(goods_list) > 0 else "未知错误"
+            # 移除"不是好友"的特殊处理，让程序继续尝试领取
+            print_and_flush(f"  ❌ 领取失败: {error_msg}")
+        except Exception as e:
+            print_and_flush(f"  ❌ 领取失败: 未知错误 ({e})")
+
+
+def receive_gifts_from_friends(session, token):
+    print_and_flush("\n📥 开始检查并领取好友赠送的资源...")
+    
+    # 通过 giveGiftList 接口获取我向别人赠送的记录，并检查别人是否已赠送给我
+    pending = _pending_gifts(get_my_give_list(session, token))
+    if not pending:
+        return
+
     success_count = 0
     fail_count = 0
-    
-    # 创建 userId 到 userName 的映射，用于显示
-    user_map = {item["friendId"]: item["userName"] for item in my_give_list}
-    
-    for i, item in enumerate(pending, 1):
+    for item in pending:
         # 修正：应该使用 userId（赠送者ID）而不是 friendId（你自己的ID）
         giver_id = item["userId"]  # 赠送者ID
-        friend_id = item["friendId"]  # 你自己的ID（在列表中是作为friendId出现的）
-        goods_name = GIFT_ITEMS.get(item["giveGiftGoodsId"], f"未知资源({item['giveGiftGoodsId']})")
-        friend_name = user_map.get(friend_id, f"未知用户({friend_id})")
-        
         # 关闭调试打印
-        #print_and_flush(f"🎁 [{i}/{len(pending)}] {friend_name} 送你 {goods_name}")
-        #print_and_flush(f"  -> 赠送者ID: {giver_id}, 你的ID: {friend_id}")
+        #print_and_flush(f"  -> 赠送者ID: {giver_id}, 你的ID: {item['friendId']}")
         #print_and_flush(f"  -> 赠送记录详情: {item}")  # 打印赠送记录详情
         success, goods_list = receive_gift(session, token, giver_id)  # 传入赠送者ID
+        _report_received(item, success, goods_list)
         if success:
-            # 更安全的检查方式
-            try:
-                if goods_list and isinstance(goods_list, list) and len(goods_list) > 0:
-                    gift_item = goods_list[0]
-                    name = gift_item.get('name', goods_name) if isinstance(gift_item, dict) else goods_name
-                    count = gift_item.get('goodsNum', 1) if isinstance(gift_item, dict) else 1
-                    print_and_flush(f"  ✅ 领取成功：{name} ×{count}")
-                else:
-                    print_and_flush(f"  ✅ 领取成功")
-            except Exception as e:
-                print_and_flush(f"  ✅ 领取成功（解析明细出错: {e}）")
             success_count += 1
         else:
-            # 更安全的错误处理
-            try:
-                error_msg = goods_list[0] if goods_list and isinstance(goods_list, list) and len(goods_list) > 0 else "未知错误"
-                # 移除"不是好友"的特殊处理，让程序继续尝试领取
-                print_and_flush(f"  ❌ 领取失败: {error_msg}")
-            except Exception as e:
-                print_and_flush(f"  ❌ 领取失败: 未知错误 ({e})")
             fail_count += 1
-        time.sleep(1.0)
 
     print_and_flush(f"\n🎉 领取完成！成功 {success_count} 份，失败 {fail_count} 份")
 
@@ -300,4 +325,123 @@ def auto_gift_flow(session, token, ask_goodsid=49):
     ask_gifts_to_all_friends(session, token, ask_goodsid)
     handle_received_ask_requests(session, token)
     receive_gifts_from_friends(session, token)
-    print_and_flush("✅ 自动流程执行完毕")
\ No newline at end of file
+    print_and_flush("✅ 自动流程执行完毕")
+
+
+# ==================== 异步版本 ====================
+# 与上面的同步函数一一对应，响应处理和输出都走同一组 _handle_* / _report_* 函数，
+# 修改流程时两边一起改；好友列表等读取接口暂无异步版本，放到线程中执行，不阻塞事件循环
+async def ask_gift_async(session, token, friend_id, friend_name, goodsid):
+    """
+    向单个好友发起索要请求（异步版，返回值与 ask_gift 相同）
+    """
+    client = get_async_client(session, token)
+    data = {"friendId": friend_id, "goodsId": goodsid}
+    try:
+        print_and_flush(f"🎁 正在向 {friend_name} 索要...")
+        result = await client.post("user/askGift", data)
+        return _handle_ask_gift(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求异常: {str(e)}")
+        return False
+
+
+async def ask_gifts_to_all_friends_async(session, token, goodsid):
+    """
+    批量向所有好友索要指定资源（异步版）
+    """
+    if goodsid not in GIFT_ITEMS:
+        print_and_flush(f"❌ 无效的资源编号: {goodsid}")
+        return
+    resource_name = GIFT_ITEMS[goodsid]
+    print_and_flush(f"\n📬 开始批量索要【{resource_name}】...")
+
+    friends = await asyncio.to_thread(get_friend_list, session, token)
+    can_ask_list = _askable_friends(friends)
+    if not can_ask_list:
+        return
+
+    success_count = 0
+    for friend in can_ask_list:
+        if await ask_gift_async(session, token, friend["userId"], friend["userName"], goodsid=goodsid):
+            success_count += 1
+    print_and_flush(f"\n🎉 批量索要完成！成功向 {success_count} 人发送请求")
+
+
+async def handle_received_ask_request_async(session, token, requester_id, goods_id):
+    """
+    单次处理一个索要请求（异步版）
+    返回: "success" 成功, "already_done" 已处理, "failed" 失败
+    """
+    client = get_async_client(session, token)
+    data = {"friendId": requester_id, "goodsId": goods_id}
+    try:
+        response = await client.request("user/giveGift", data)
+        return _handle_give_gift(client, response)
+    except Exception as e:
+        print_and_flush(f"❌ 赠送异常: {str(e)}")
+        return "failed"
+
+
+async def handle_received_ask_requests_async(session, token):
+    """
+    自动处理所有【别人向你】发起的索要请求（异步版）
+    """
+    print_and_flush("\n📨 开始处理【别人向你】发起的索要请求...")
+    friends = await asyncio.to_thread(get_friend_give_status, session, token)
+    pending = _pending_ask_requests(friends)
+    if not pending:
+        return
+
+    counts = {"success": 0, "failed": 0, "already_done": 0}
+    for f in pending:
+        result = await handle_received_ask_request_async(session, token, f["userId"], f["goodsId"])
+        _report_give_result(f, result, counts)
+
+    _print_give_summary(counts)
+
+
+async def receive_gift_async(session, token, giver_id):
+    """
+    领取单个好友赠送的资源（异步版，返回值与 receive_gift 相同）
+    """
+    client = get_async_client(session, token)
+    data = {"friendId": giver_id}
+    try:
+        result = await client.post("user/receiveFriendGift", data)
+        return _handle_receive_gift(client, result)
+    except requests.exceptions.RequestException as e:
+        return False, [f"网络请求错误: {str(e)}"]
+    except Exception as e:
+        return False, [str(e)]
+
+
+async def receive_gifts_from_friends_async(session, token):
+    """领取好友赠送的资源（异步版）"""
+    print_and_flush("\n📥 开始检查并领取好友赠送的资源...")
+    
+    my_give_list = await asyncio.to_thread(get_my_give_list, session, token)
+    pending = _pending_gifts(my_give_list)
+    if not pending:
+        return
+
+    success_count = 0
+    fail_count = 0
+    for item in pending:
+        success, goods_list = await receive_gift_async(session, token, item["userId"])  # 传入赠送者ID
+        _report_received(item, success, goods_list)
+        if success:
+            success_count += 1
+        else:
+            fail_count += 1
+
+    print_and_flush(f"\n🎉 领取完成！成功 {success_count} 份，失败 {fail_count} 份")
+
+
+async def auto_gift_flow_async(session, token, ask_goodsid=49):
+    """一键执行资源互赠（异步版，session 传 AsyncQJiangClient 或 None）"""
+    print_and_flush("🔄 开始自动资源交互流程...")
+    await ask_gifts_to_all_friends_async(session, token, ask_goodsid)
+    await handle_received_ask_requests_async(session, token)
+    await receive_gifts_from_friends_async(session, token)
+    print_and_flush("✅ 自动流程执行完毕")
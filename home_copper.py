@@ -1,4 +1,5 @@
 import requests
+from api_client import get_client
 import sys
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
@@ -13,14 +14,13 @@ def collect_home_copper(session, token, user_id):
         print_and_flush(f"❌ 无效的 user_id：{user_id}，请检查 ensure_session_token 返回值顺序")
         return None
 
-    url = "https://q-jiang.myprint.top/api/bas-assets/rentCollection"
+    client = get_client(session, token)
     data = {"userId": user_id}
-    headers = {"Token": token, "Content-Type": "application/json"}
 
     print_and_flush(f"🏠 正在为用户 {user_id} 领取守家铜币...")
 
     try:
-        response = session.post(url, headers=headers, json=data, timeout=10)
+        response = client.request("bas-assets/rentCollection", data)
         response.encoding = 'utf-8'
 
         if response.status_code != 200 or not response.text.strip():
@@ -29,7 +29,7 @@ def collect_home_copper(session, token, user_id):
 
         result = response.json()
 
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             add_copper = result["data"].get("addCopper", 0)
             if add_copper > 0:
                 print_and_flush(f"✅ 领取成功！获得 {add_copper} 铜钱")
@@ -3,12 +3,44 @@
 import sys
 import datetime
 import time
-import json 
+import asyncio
+import contextvars
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from api_client import get_client, get_async_client
+from settings import get_account_settings
+from land_index import get_land_index
 
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
     sys.stdout.flush()
 
+def _handle_get_re_list(client, result):
+    """处理领地资源列表接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        resource_list = result["data"].get("resourceList", [])
+
+        for res in resource_list:
+            name = res.get("name", "未知资源")
+            level = res.get("murRank", 0)
+
+            general_desc = res.get("generalDesc")
+            if general_desc:
+                player = general_desc.get("occupyUserName", "未知玩家")
+                general = general_desc.get("generalName", "无名武将")
+                print_and_flush(f"  🌲 {name} Lv.{level} 🔒 被『{player}』占领，武将：{general}")
+            else:
+                print_and_flush(f"  🌲 {name} Lv.{level} ✅ 空闲")
+
+        return resource_list
+
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 接口返回失败: {msg}")
+        return None
+
+
 def get_re_list(session, token):
     """
     获取用户领地资源列表（简洁单行输出）
@@ -16,146 +48,265 @@ def get_re_list(session, token):
     :param token: 登录 token
     :return: resourceList 列表 或 None
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/reList"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🌍 正在获取【领地资源】信息...")  # 主提示放这里，不重复
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
+        result = client.post("mid-user-resource/reList", {})
+        return _handle_get_re_list(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求领地资源列表异常: {e}")
+        return None
 
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            resource_list = result["data"].get("resourceList", [])
 
-            for res in resource_list:
-                name = res.get("name", "未知资源")
-                level = res.get("murRank", 0)
+def _handle_get_occupy_resource_list(client, result):
+    """处理已占领领地资源接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        # 从新的数据结构中获取 selfArmyInfo
+        army_data = result.get("data", {})
+        occupy_resource_list = army_data.get("selfArmyInfo", [])
 
-                general_desc = res.get("generalDesc")
-                if general_desc:
-                    player = general_desc.get("occupyUserName", "未知玩家")
-                    general = general_desc.get("generalName", "无名武将")
-                    print_and_flush(f"  🌲 {name} Lv.{level} 🔒 被『{player}』占领，武将：{general}")
-                else:
-                    print_and_flush(f"  🌲 {name} Lv.{level} ✅ 空闲")
+        if not occupy_resource_list:
+            print_and_flush("  📭 暂无占领的领地资源")
+            return occupy_resource_list
 
-            return resource_list
+        # 按占领时间排序，最新的在前
+        # 修复：处理 None 值和空字符串的情况
+        occupy_resource_list.sort(
+            key=lambda x: x.get("occupyTime") or "", 
+            reverse=True
+        )
 
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 接口返回失败: {msg}")
-            return None
+        for res in occupy_resource_list:
+            name = res.get("brName", "未知资源")
+            level = res.get("murRank", 0)
+            general_name = res.get("mugName", "无名武将")
+            occupy_time = res.get("occupyTime", "")
+            status_format = res.get("statusFormat", "")
+            arrive_time = res.get("arriveTime", "")
 
-    except Exception as e:
-        print_and_flush(f"❌ 请求领地资源列表异常: {e}")
+            # 计算占领时长（仅对非返回/撤退状态显示）
+            time_info = ""
+            if occupy_time and status_format not in ["返回", "撤退"]:
+                try:
+                    occupy_datetime = datetime.datetime.strptime(occupy_time, "%Y-%m-%d %H:%M:%S")
+                    now = datetime.datetime.now()
+                    duration = now - occupy_datetime
+
+                    days = duration.days
+                    hours, remainder = divmod(duration.seconds, 3600)
+
+                    if days > 0:
+                        time_info = f" ({days}天{hours}小时)"
+                    elif hours > 0:
+                        time_info = f" ({hours}小时)"
+                    # 0小时不显示
+                except ValueError:
+                    # 如果时间格式不正确，就显示原始时间
+                    time_info = f" ({occupy_time})"
+
+            # 添加回家剩余时间信息
+            arrive_info = ""
+            if arrive_time and status_format in ["返回", "撤退"]:
+                try:
+                    arrive_datetime = datetime.datetime.strptime(arrive_time, "%Y-%m-%d %H:%M:%S")
+                    now = datetime.datetime.now()
+                    time_diff = arrive_datetime - now
+
+                    if time_diff.total_seconds() > 0:
+                        hours, remainder = divmod(time_diff.seconds, 3600)
+                        minutes = remainder // 60
+                        if hours > 0:
+                            arrive_info = f" (还需: {hours}小时{minutes}分钟)"
+                        elif minutes > 0:
+                            arrive_info = f" (还需: {minutes}分钟)"
+                        else:
+                            arrive_info = " (即将到达)"
+                    else:
+                        arrive_info = " (即将到达)"
+                except ValueError:
+                    arrive_info = f" (回家时间: {arrive_time})"
+
+            # 检查是否正在返回或撤退
+            if status_format in ["返回", "撤退"]:
+                status_icon = "⏳" if status_format == "返回" else "🚩"
+                # 对于返回/撤退状态，只显示回家剩余时间
+                print_and_flush(f"  ⚔️ {name} Lv.{level} 👤 {general_name} {status_icon} {status_format}{arrive_info}")
+            else:
+                print_and_flush(f"  ⚔️ {name} Lv.{level} 👤 {general_name}{time_info}")
+
+        return occupy_resource_list
+
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 获取占领领地资源失败: {msg}")
         return None
 
 
-def get_occupy_resource_list(session, token):
+# 军队信息快照的最长有效期（秒）：领地可能被其他玩家打下，超过后重新获取
+ARMY_SNAPSHOT_MAX_AGE = 300
+
+
+def _parse_time(value):
+    """将 "YYYY-mm-dd HH:MM:SS" 转换为时间戳，无法解析返回 None"""
+    try:
+        return datetime.datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+class ArmySnapshot:
     """
-    获取用户占领的领地资源列表
-    :param session: requests.Session() 对象
-    :param token: 登录 token
-    :return: selfArmyInfo 列表 或 None
+    单个账号的军队信息（battle/armyInfo 的 selfArmyInfo）快照
+    一次获取后由召回、占领在本地更新，各领地函数都从这里读取；
+    只有超过有效期、有返回中的武将已到家、或需要准确的占领/到家时间而本地更新后不知道时才重新获取
     """
-    url = "https://q-jiang.myprint.top/api/battle/armyInfo"
-    headers = {
-        "Token": token,
-    }
 
-    try:
-        print_and_flush("⚔️ 正在获取【我占领的领地资源】信息...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            # 从新的数据结构中获取 selfArmyInfo
-            army_data = result.get("data", {})
-            occupy_resource_list = army_data.get("selfArmyInfo", [])
-
-            if not occupy_resource_list:
-                print_and_flush("  📭 暂无占领的领地资源")
-                return occupy_resource_list
-
-            # 按占领时间排序，最新的在前
-            # 修复：处理 None 值和空字符串的情况
-            occupy_resource_list.sort(
-                key=lambda x: x.get("occupyTime") or "", 
-                reverse=True
-            )
-
-            for res in occupy_resource_list:
-                name = res.get("brName", "未知资源")
-                level = res.get("murRank", 0)
-                general_name = res.get("mugName", "无名武将")
-                occupy_time = res.get("occupyTime", "")
-                status_format = res.get("statusFormat", "")
-                arrive_time = res.get("arriveTime", "")
-                
-                # 计算占领时长（仅对非返回/撤退状态显示）
-                time_info = ""
-                if occupy_time and status_format not in ["返回", "撤退"]:
-                    try:
-                        occupy_datetime = datetime.datetime.strptime(occupy_time, "%Y-%m-%d %H:%M:%S")
-                        now = datetime.datetime.now()
-                        duration = now - occupy_datetime
-                        
-                        days = duration.days
-                        hours, remainder = divmod(duration.seconds, 3600)
-                        
-                        if days > 0:
-                            time_info = f" ({days}天{hours}小时)"
-                        elif hours > 0:
-                            time_info = f" ({hours}小时)"
-                        # 0小时不显示
-                    except ValueError:
-                        # 如果时间格式不正确，就显示原始时间
-                        time_info = f" ({occupy_time})"
-
-                # 添加回家剩余时间信息
-                arrive_info = ""
-                if arrive_time and status_format in ["返回", "撤退"]:
-                    try:
-                        arrive_datetime = datetime.datetime.strptime(arrive_time, "%Y-%m-%d %H:%M:%S")
-                        now = datetime.datetime.now()
-                        time_diff = arrive_datetime - now
-                        
-                        if time_diff.total_seconds() > 0:
-                            hours, remainder = divmod(time_diff.seconds, 3600)
-                            minutes = remainder // 60
-                            if hours > 0:
-                                arrive_info = f" (还需: {hours}小时{minutes}分钟)"
-                            elif minutes > 0:
-                                arrive_info = f" (还需: {minutes}分钟)"
-                            else:
-                                arrive_info = " (即将到达)"
-                        else:
-                            arrive_info = " (即将到达)"
-                    except ValueError:
-                        arrive_info = f" (回家时间: {arrive_time})"
+    def __init__(self, session, token):
+        self.session = session
+        self.token = token
+        self._entries = None
+        self._fetched_at = 0
+        self._times_unknown = False  # 本地更新过的条目没有服务端的占领/到家时间
+        self._lock = threading.RLock()
 
-                # 检查是否正在返回或撤退
-                if status_format in ["返回", "撤退"]:
-                    status_icon = "⏳" if status_format == "返回" else "🚩"
-                    # 对于返回/撤退状态，只显示回家剩余时间
-                    print_and_flush(f"  ⚔️ {name} Lv.{level} 👤 {general_name} {status_icon} {status_format}{arrive_info}")
-                else:
-                    print_and_flush(f"  ⚔️ {name} Lv.{level} 👤 {general_name}{time_info}")
+    def _stale(self, need_times: bool) -> bool:
+        if self._entries is None:
+            return True
+        now = time.time()
+        if now - self._fetched_at > ARMY_SNAPSHOT_MAX_AGE:
+            return True
+        if need_times and self._times_unknown:
+            return True
+        for res in self._entries:
+            if res.get("statusFormat") in ["返回", "撤退"]:
+                arrive_ts = _parse_time(res.get("arriveTime"))
+                if arrive_ts and arrive_ts <= now:
+                    return True
+        return False
 
-            return occupy_resource_list
+    def refresh(self):
+        """重新获取军队信息（按占领时间排序并打印），失败返回 None"""
+        client = get_client(self.session, self.token)
+        try:
+            print_and_flush("⚔️ 正在获取【我占领的领地资源】信息...")
+            result = client.post("battle/armyInfo", {}, fresh=True)
+            entries = _handle_get_occupy_resource_list(client, result)
+        except Exception as e:
+            print_and_flush(f"❌ 请求占领领地资源列表异常: {e}")
+            return None
+        return self._store(entries)
 
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 获取占领领地资源失败: {msg}")
+    async def refresh_async(self, session=None):
+        """重新获取军队信息（异步版），失败返回 None"""
+        client = get_async_client(session, self.token)
+        try:
+            print_and_flush("⚔️ 正在获取【我占领的领地资源】信息...")
+            result = await client.post("battle/armyInfo", {}, fresh=True)
+            entries = _handle_get_occupy_resource_list(client, result)
+        except Exception as e:
+            print_and_flush(f"❌ 请求占领领地资源列表异常: {e}")
             return None
+        return self._store(entries)
 
-    except Exception as e:
-        print_and_flush(f"❌ 请求占领领地资源列表异常: {e}")
-        return None
+    def _store(self, entries):
+        if entries is not None:
+            with self._lock:
+                self._entries = entries
+                self._fetched_at = time.time()
+                self._times_unknown = False
+        return entries
+
+    def get(self, need_times: bool = True):
+        """
+        读取快照，可能过期时先重新获取
+        :param need_times: 是否需要准确的占领/到家时间（只统计数量和类型时传 False）
+        :return: selfArmyInfo 列表副本 或 None
+        """
+        with self._lock:
+            if self._stale(need_times) and self.refresh() is None:
+                return None
+            return copy.deepcopy(self._entries)
+
+    async def get_async(self, need_times: bool = True, session=None):
+        """
+        读取快照（异步版，与 get 共用同一份快照）；等待请求期间不持有锁
+        :param session: AsyncQJiangClient，可为 None
+        """
+        with self._lock:
+            if not self._stale(need_times):
+                return copy.deepcopy(self._entries)
+        if await self.refresh_async(session) is None:
+            return None
+        with self._lock:
+            return copy.deepcopy(self._entries)
+
+    def record_recall(self, murg_id):
+        """召回成功：对应条目改为返回状态（到家时间要等重新获取后才知道）"""
+        with self._lock:
+            for res in self._entries or []:
+                if res.get("murgId") == murg_id:
+                    res["statusFormat"] = "返回"
+                    res["arriveTime"] = None
+                    self._times_unknown = True
+
+    def record_occupy(self, mur_id, general_id, resource=None, general_name=None):
+        """占领成功：加入一条前往中的条目；不知道资源类型时下次读取重新获取"""
+        with self._lock:
+            if self._entries is None:
+                return
+            if not resource:
+                self._entries = None
+                return
+            self._entries.insert(0, {
+                "murId": mur_id,
+                "mugId": general_id,
+                "brName": resource.get("name", "未知资源"),
+                "murRank": resource.get("murRank", 0),
+                "mugName": general_name or "无名武将",
+                "statusFormat": "前往",
+                "occupyTime": None,
+            })
+            self._times_unknown = True
+
+    def invalidate(self):
+        with self._lock:
+            self._entries = None
+
+
+_army_snapshots = {}
+_army_snapshots_lock = threading.Lock()
+
+
+def get_army_snapshot(session, token) -> ArmySnapshot:
+    """获取账号的军队信息快照（按 token 区分，同一账号的各模块共用）"""
+    with _army_snapshots_lock:
+        snapshot = _army_snapshots.get(token)
+        if snapshot is None:
+            snapshot = ArmySnapshot(session, token)
+            _army_snapshots[token] = snapshot
+        return snapshot
+
+
+def get_occupy_resource_list(session, token):
+    """
+    获取用户占领的领地资源列表（含准确的占领/到家时间，快照可能过期时才请求接口）
+    :param session: requests.Session() 对象
+    :param token: 登录 token
+    :return: selfArmyInfo 列表 或 None
+    """
+    return get_army_snapshot(session, token).get()
+
+
+def _handle_resource_recall(client, result, murg_id):
+    """处理召回接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        print_and_flush(f"✅ 领地资源 ID: {murg_id} 召回成功")
+        return True
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 召回失败: {msg}")
+        return False
 
 
 def resource_recall(session, token, murg_id):
@@ -166,73 +317,90 @@ def resource_recall(session, token, murg_id):
     :param murg_id: 领地资源ID
     :return: 是否成功召回
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/resourceRecall"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
     data = {
         "murgId": murg_id
     }
 
     try:
         print_and_flush(f"🔄 正在召回领地资源 ID: {murg_id}...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            print_and_flush(f"✅ 领地资源 ID: {murg_id} 召回成功")
-            return True
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 召回失败: {msg}")
-            return False
-
+        result = client.post("mid-user-resource/resourceRecall", data)
+        recalled = _handle_resource_recall(client, result, murg_id)
+        if recalled:
+            get_army_snapshot(session, token).record_recall(murg_id)
+        return recalled
     except Exception as e:
         print_and_flush(f"❌ 召回请求异常: {e}")
         return False
 
 
+# 领地占领满8小时召回
+RECALL_AFTER_SECONDS = 8 * 3600
+# 同时进行的召回请求数
+RECALL_MAX_IN_FLIGHT = 4
+
+
+def recall_deadline(res):
+    """
+    领地的召回时间（occupyTime + 8小时）
+    :return: 时间戳；正在返回/撤退或没有占领时间时返回 None
+    """
+    if res.get("statusFormat", "") in ["返回", "撤退"]:
+        return None
+    occupy_ts = _parse_time(res.get("occupyTime"))
+    return occupy_ts + RECALL_AFTER_SECONDS if occupy_ts else None
+
+
+def arrive_deadline(res):
+    """
+    返回中/撤退中武将的到家时间
+    :return: 时间戳；不在返回途中或没有到家时间时返回 None
+    """
+    if res.get("statusFormat", "") not in ["返回", "撤退"]:
+        return None
+    return _parse_time(res.get("arriveTime"))
+
+
 def check_and_recall_resources(session, token, occupy_resource_list):
     """
-    检查并自动召回超过8小时的领地资源
+    检查并自动召回超过8小时的领地资源（到期的领地一批并发召回）
     :param session: requests.Session() 对象
     :param token: 登录 token
     :param occupy_resource_list: 占领的领地资源列表
-    :return: None
+    :return: 成功召回的数量
     """
     if not occupy_resource_list:
-        return
+        return 0
+
+    due = _due_for_recall(occupy_resource_list)
+    recalled_count = 0
+    if due:
+        with ThreadPoolExecutor(max_workers=min(RECALL_MAX_IN_FLIGHT, len(due)), thread_name_prefix="recall") as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, resource_recall, session, token, murg_id)
+                for murg_id in due
+            ]
+            recalled_count = sum(1 for future in futures if future.result())
+    
+    _print_recall_summary(recalled_count)
+    return recalled_count
 
+
+def _due_for_recall(occupy_resource_list):
+    """找出占领已满8小时的领地（同步/异步共用），返回要召回的 murgId"""
     print_and_flush("🔍 检查是否有超过8小时的领地资源需要召回...")
-    now = datetime.datetime.now()
+    now = time.time()
     
-    recalled_count = 0
+    due = []
     for res in occupy_resource_list:
-        occupy_time = res.get("occupyTime", "")
-        murg_id = res.get("murgId")
-        status_format = res.get("statusFormat", "")
-        
-        # 跳过正在返回或撤退的资源
-        if status_format in ["返回", "撤退"]:
-            continue
-        
-        if not occupy_time or not murg_id:
-            continue
-            
-        try:
-            occupy_datetime = datetime.datetime.strptime(occupy_time, "%Y-%m-%d %H:%M:%S")
-            duration = now - occupy_datetime
-            
-            # 如果超过8小时(28800秒)，则自动召回
-            if duration.total_seconds() > 28800:  # 8小时 = 8 * 60 * 60 秒
-                print_and_flush(f"⏰ 发现超过8小时的领地资源: {res.get('brName', '未知资源')}")
-                if resource_recall(session, token, murg_id):
-                    recalled_count += 1
-        except ValueError:
-            # 时间格式错误，跳过
-            continue
-    
+        deadline = recall_deadline(res)
+        if res.get("murgId") and deadline and deadline < now:
+            print_and_flush(f"⏰ 发现超过8小时的领地资源: {res.get('brName', '未知资源')}")
+            due.append(res["murgId"])
+    return due
+
+
+def _print_recall_summary(recalled_count):
     if recalled_count > 0:
         print_and_flush(f"✅ 共召回 {recalled_count} 个领地资源")
     else:
@@ -260,6 +428,45 @@ def get_all_land_resources(session, token):
     return resource_list, occupy_resource_list
 
 
+def _handle_get_friend_land_resources(client, result):
+    """处理好友领地资源接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        resource_list = result["data"].get("resourceList", [])
+
+        # 筛选等级为9的资源，并且只保留农田、森林、草原、山丘、沼泽
+        target_resources = ["农田", "森林", "草原", "山丘", "沼泽"]
+        level_9_resources = [
+            res for res in resource_list 
+            if res.get("murRank") == 9 and res.get("name") in target_resources
+        ]
+
+        if not level_9_resources:
+            print_and_flush("  ❗ 好友没有符合条件的领地资源")
+            return []
+
+        for res in level_9_resources:
+            name = res.get("name", "未知资源")
+            level = res.get("murRank", 0)
+            status = res.get("status")
+
+            general_desc = res.get("generalDesc")
+            if general_desc:
+                player = general_desc.get("occupyUserName", "未知玩家")
+                general = general_desc.get("generalName", "无名武将")
+                print_and_flush(f"  🌲 {name} Lv.{level} 🔒 被『{player}』占领，武将：{general}")
+            elif status == 3:
+                print_and_flush(f"  🌲 {name} Lv.{level} ⏳ 正在被占领中")
+            else:
+                print_and_flush(f"  🌲 {name} Lv.{level} ✅ 空闲")
+
+        return level_9_resources
+
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 获取好友领地资源失败: {msg}")
+        return None
+
+
 def get_friend_land_resources(session, token, user_id):
     """
     获取好友领地资源信息（只显示等级为9的资源）
@@ -268,124 +475,274 @@ def get_friend_land_resources(session, token, user_id):
     :param user_id: 好友用户ID
     :return: resourceList 列表 或 None
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/reList"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
     data = {
         "userId": user_id
     }
 
     try:
         print_and_flush(f"👥 正在获取好友【{user_id}】的领地资源信息...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            resource_list = result["data"].get("resourceList", [])
-            
-            # 筛选等级为9的资源，并且只保留农田、森林、草原、山丘、沼泽
-            target_resources = ["农田", "森林", "草原", "山丘", "沼泽"]
-            level_9_resources = [
-                res for res in resource_list 
-                if res.get("murRank") == 9 and res.get("name") in target_resources
-            ]
-            
-            if not level_9_resources:
-                print_and_flush("  ❗ 好友没有符合条件的领地资源")
-                return []
-
-            for res in level_9_resources:
-                name = res.get("name", "未知资源")
-                level = res.get("murRank", 0)
-                status = res.get("status")
-
-                general_desc = res.get("generalDesc")
-                if general_desc:
-                    player = general_desc.get("occupyUserName", "未知玩家")
-                    general = general_desc.get("generalName", "无名武将")
-                    print_and_flush(f"  🌲 {name} Lv.{level} 🔒 被『{player}』占领，武将：{general}")
-                elif status == 3:
-                    print_and_flush(f"  🌲 {name} Lv.{level} ⏳ 正在被占领中")
-                else:
-                    print_and_flush(f"  🌲 {name} Lv.{level} ✅ 空闲")
-
-            return level_9_resources
-
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 获取好友领地资源失败: {msg}")
-            return None
-
+        result = client.post("mid-user-resource/reList", data)
+        return _handle_get_friend_land_resources(client, result)
     except Exception as e:
         print_and_flush(f"❌ 请求好友领地资源列表异常: {e}")
         return None
 
 
-def scan_users_for_resources(session, token, start_user_id=1, end_user_id=100):
+def _find_free_resources(client, result, user_id):
+    """
+    从某个用户的领地列表中筛选空闲的9级农田、森林、草原、山丘、沼泽（同步/异步扫描共用）
+    :return: 空闲资源列表（每条附带 userId）
+    """
+    free_resources = []
+    if not client.is_success(result):
+        return free_resources
+
+    target_resources = ["农田", "森林", "草原", "山丘", "沼泽"]
+    resource_list = result["data"].get("resourceList", [])
+    
+    # 筛选等级为9的资源，并且只保留农田、森林、草原、山丘、沼泽
+    level_9_resources = [
+        res for res in resource_list 
+        if res.get("murRank") == 9 and res.get("name") in target_resources
+    ]
+    
+    # 查找空闲资源
+    for res in level_9_resources:
+        # 检查是否被他人占领
+        general_desc = res.get("generalDesc")
+        is_occupied_by_other = False
+        
+        if general_desc:
+            occupy_user_name = general_desc.get("occupyUserName")
+            # 如果存在占领用户名且不是空字符串，则认为被他人占领
+            if occupy_user_name:
+                is_occupied_by_other = True
+        
+        # 检查是否空闲（没有被他人占领且不是正在被占领状态）
+        if not is_occupied_by_other and not general_desc and res.get("status") != 3:
+            res["userId"] = user_id  # 添加用户ID信息
+            free_resources.append(res)
+            name = res.get("name", "未知资源")
+            print_and_flush(f"  🎯 发现空闲资源: {name} (用户ID: {user_id})")
+    return free_resources
+
+
+# 扫描用户领地时同时在途的 reList 请求数（总速率仍受 rate_limiter 控制）
+SWEEP_MAX_IN_FLIGHT = 10
+
+
+# 自动探测最大用户ID时每个探测点连续检查几个ID（中间有注销的账号时不至于误判为末尾）
+PROBE_SPAN = 3
+MAX_PROBE_USER_ID = 10000000
+
+
+def _user_exists(client, user_id):
+    """user_id 起连续 PROBE_SPAN 个ID中是否有领地列表非空的用户"""
+    for candidate in range(user_id, user_id + PROBE_SPAN):
+        try:
+            result = client.post("mid-user-resource/reList", {"userId": candidate})
+        except Exception:
+            continue
+        if client.is_success(result) and result["data"].get("resourceList"):
+            return True
+    return False
+
+
+def discover_max_user_id(client, known_max=None, start_user_id=1):
+    """
+    探测最大的有效用户ID：从上次探测值（没有时从100）开始倍增直到无效，再二分
+    :param client: QJiangClient
+    :param known_max: 上次探测到的最大用户ID
+    :param start_user_id: 扫描范围的起始用户ID
+    :return: 最大有效用户ID（至少为 start_user_id）
+    """
+    low = max(start_user_id, known_max or 100)
+    if _user_exists(client, low):
+        high = low * 2
+        while high < MAX_PROBE_USER_ID and _user_exists(client, high):
+            low, high = high, high * 2
+    else:
+        low, high = start_user_id, low
+    while high - low > 1:
+        mid = (low + high) // 2
+        if _user_exists(client, mid):
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def scan_range_user_ids(client):
+    """
+    本轮按游标扫描的用户ID（见 land_index 配置）：范围上限取配置的 max_user_id，未配置时自动探测
+    :return: (游标窗口, 窗口加上窗口外索引中有空闲资源的用户, 最大用户ID)
+    """
+    index = get_land_index()
+    max_user_id = index.max_user_id or index.probed_max_user_id()
+    if not max_user_id:
+        print_and_flush("🔭 正在探测最大用户ID...")
+        max_user_id = discover_max_user_id(client, index.last_known_max_user_id(), index.start_user_id)
+        index.set_probed_max_user_id(max_user_id)
+        print_and_flush(f"🔭 当前最大用户ID约为 {max_user_id}")
+    window = index.scan_window(max_user_id)
+    if window:
+        print_and_flush(f"🧭 本轮扫描用户 {window[0]} 起的 {len(window)} 个ID（共 {index.start_user_id}~{max_user_id}）")
+    return window, window + index.hot_user_ids(window), max_user_id
+
+
+def plan_user_ids(user_ids, needed=None):
+    """
+    先查领地索引，只保留需要重新请求 reList 的用户，并按预计命中率排序（最可能有所需空闲资源的排在最前）
+    :param user_ids: 候选用户ID序列
+    :param needed: 各类型还需占领的数量，None 表示所有类型都需要
+    :return: 需要扫描的用户ID列表
+    """
+    planned, skipped = get_land_index().plan_user_ids(user_ids, needed)
+    if skipped:
+        print_and_flush(f"📇 领地索引: 跳过 {skipped} 个近期已确认无空闲资源的用户，需扫描 {len(planned)} 个")
+    return planned
+
+
+def _record_land_index(client, user_id, result):
+    """reList 成功返回时刷新该用户在领地索引中的记录"""
+    if result is not None and client.is_success(result):
+        get_land_index().record_user(user_id, result["data"].get("resourceList", []))
+
+
+def iter_user_re_lists(client, user_ids, max_in_flight=SWEEP_MAX_IN_FLIGHT):
+    """
+    并发请求多个用户的领地列表，按返回先后逐个产出，调用方拿到一个就能处理一个
+    调用方提前结束（break/close）时，尚未发出的请求会被取消
+    :param client: QJiangClient
+    :param user_ids: 要扫描的用户ID序列
+    :param max_in_flight: 同时在途的请求数上限
+    :return: 生成器，产出 (user_id, result)，请求失败时 result 为 None
+    """
+    ids = iter(user_ids)
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="sweep")
+
+    def submit_more():
+        while len(pending) < max_in_flight:
+            user_id = next(ids, None)
+            if user_id is None:
+                return
+            future = executor.submit(client.post, "mid-user-resource/reList", {"userId": user_id})
+            pending[future] = user_id
+
+    try:
+        submit_more()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                user_id = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 忽略单个用户请求失败，继续检查下一个
+                    print_and_flush(f"  ⚠️ 检查用户 {user_id} 时出错: {e}")
+                    result = None
+                _record_land_index(client, user_id, result)
+                yield user_id, result
+            submit_more()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # 每轮扫描结束写一次索引文件
+        get_land_index().save()
+
+
+def scan_users_for_resources(session, token, start_user_id=None, end_user_id=None, max_in_flight=SWEEP_MAX_IN_FLIGHT):
     """
     扫描用户ID范围，查找空闲的9级农田、森林、草原、山丘、沼泽资源
     :param session: requests.Session() 对象
     :param token: 登录 token
-    :param start_user_id: 起始用户ID
+    :param start_user_id: 起始用户ID（与 end_user_id 都不传时按 land_index 配置的游标扫描）
     :param end_user_id: 结束用户ID
-    :return: 所有找到的空闲资源列表
+    :param max_in_flight: 同时在途的请求数上限
+    :return: 所有找到的空闲资源列表（按用户ID排序）
     """
-    print_and_flush(f"🔍 开始扫描用户 {start_user_id} 到 {end_user_id} 的空闲9级资源...")
-    
-    target_resources = ["农田", "森林", "草原", "山丘", "沼泽"]
     free_resources = []
+    client = get_client(session, token)
     
-    for user_id in range(start_user_id, end_user_id + 1):
-        try:
-            url = "https://q-jiang.myprint.top/api/mid-user-resource/reList"
-            headers = {"Token": token}
-            data = {"userId": user_id}
-            
-            response = session.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get("success") and result.get("code") == "200":
-                resource_list = result["data"].get("resourceList", [])
-                
-                # 筛选等级为9的资源，并且只保留农田、森林、草原、山丘、沼泽
-                level_9_resources = [
-                    res for res in resource_list 
-                    if res.get("murRank") == 9 and res.get("name") in target_resources
-                ]
-                
-                # 查找空闲资源
-                for res in level_9_resources:
-                    # 检查是否被他人占领
-                    general_desc = res.get("generalDesc")
-                    is_occupied_by_other = False
-                    
-                    if general_desc:
-                        occupy_user_name = general_desc.get("occupyUserName")
-                        # 如果存在占领用户名且不是空字符串，则认为被他人占领
-                        if occupy_user_name:
-                            is_occupied_by_other = True
-                    
-                    # 检查是否空闲（没有被他人占领且不是正在被占领状态）
-                    if not is_occupied_by_other and not general_desc and res.get("status") != 3:
-                        res["userId"] = user_id  # 添加用户ID信息
-                        free_resources.append(res)
-                        name = res.get("name", "未知资源")
-                        print_and_flush(f"  🎯 发现空闲资源: {name} (用户ID: {user_id})")
-            
-            # 添加延迟避免请求过于频繁
-            time.sleep(0.1)
-            
-        except Exception as e:
-            # 忽略单个用户请求失败，继续扫描下一个
-            continue
+    window, user_ids, max_user_id = _plan_scan(client, start_user_id, end_user_id)
+    scanned = []
+    for user_id, result in iter_user_re_lists(client, user_ids, max_in_flight):
+        scanned.append(user_id)
+        if result is not None:
+            free_resources.extend(_find_free_resources(client, result, user_id))
+    return _finish_scan(free_resources, window, user_ids, scanned, max_user_id)
+
+
+def _plan_scan(client, start_user_id, end_user_id):
+    """
+    确定本次扫描的用户ID（同步/异步共用，client 为同步客户端，探测最大用户ID时使用）
+    :return: (游标窗口或 None, 需要扫描的用户ID, 最大用户ID)
+    """
+    window = max_user_id = None
+    if start_user_id is None and end_user_id is None:
+        window, candidates, max_user_id = scan_range_user_ids(client)
+        print_and_flush("🔍 开始扫描空闲9级资源...")
+    else:
+        start_user_id = start_user_id or 1
+        end_user_id = end_user_id or start_user_id + 99
+        candidates = range(start_user_id, end_user_id + 1)
+        print_and_flush(f"🔍 开始扫描用户 {start_user_id} 到 {end_user_id} 的空闲9级资源...")
+    return window, plan_user_ids(candidates), max_user_id
+
+
+def _finish_scan(free_resources, window, user_ids, scanned, max_user_id):
+    """扫描结束：推进游标、按用户ID排序并打印（同步/异步共用）"""
+    if window is not None:
+        get_land_index().finish_window(window, user_ids, scanned, max_user_id)
+        get_land_index().save()
     
+    free_resources.sort(key=lambda res: res.get("userId", 0))
     print_and_flush(f"✅ 扫描完成，共找到 {len(free_resources)} 个空闲资源")
     return free_resources
 
 
+def _handle_get_free_generals(client, result):
+    """处理空闲武将接口的返回（同步/异步共用）"""
+    # print_and_flush(f"  📡 API原始返回: {result}")  # 关闭这行的输出
+
+    if client.is_success(result):
+        # 修复：正确处理返回的数据结构
+        # API返回的data字段本身就是一个武将列表，而不是包含generalList字段的字典
+        general_list = result.get("data", [])
+
+        # print_and_flush(f"  📋 武将列表: {general_list}")  # 关闭这行的输出
+
+        if not general_list:
+            print_and_flush("  ❗ 没有空闲武将")
+            return []
+
+        # 确保列表中的每个元素都是字典类型
+        valid_generals = []
+        for i, general in enumerate(general_list):
+            if isinstance(general, dict):
+                valid_generals.append(general)
+            else:
+                print_and_flush(f"  ⚠️  跳过无效的武将数据: {general}")
+
+        if not valid_generals:
+            print_and_flush("  ❗ 没有有效的空闲武将")
+            return []
+
+        print_and_flush(f"  ✅ 找到 {len(valid_generals)} 个空闲武将")
+        for i, general in enumerate(valid_generals):
+            name = general.get("name", "无名武将")  # 注意：字段名是"name"而不是"generalName"
+            rank = general.get("rank", 0)
+            print_and_flush(f"    {i+1}. {name} (等级: {rank})")
+
+        return valid_generals
+
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 获取空闲武将失败: {msg}")
+        return None
+
+
 def get_free_generals(session, token):
     """
     获取空闲武将列表
@@ -393,57 +750,50 @@ def get_free_generals(session, token):
     :param token: 登录 token
     :return: 武将列表 或 None
     """
-    url = "https://q-jiang.myprint.top/api/bas-generals/freeGeneralList"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("👥 正在获取空闲武将列表...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
+        result = client.post("bas-generals/freeGeneralList", {})
+        return _handle_get_free_generals(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求空闲武将列表异常: {e}")
+        return None
 
-        result = response.json()
-        # print_and_flush(f"  📡 API原始返回: {result}")  # 关闭这行的输出
-        
-        if result.get("success") and result.get("code") == "200":
-            # 修复：正确处理返回的数据结构
-            # API返回的data字段本身就是一个武将列表，而不是包含generalList字段的字典
-            general_list = result.get("data", [])
-            
-            # print_and_flush(f"  📋 武将列表: {general_list}")  # 关闭这行的输出
-            
-            if not general_list:
-                print_and_flush("  ❗ 没有空闲武将")
-                return []
-            
-            # 确保列表中的每个元素都是字典类型
-            valid_generals = []
-            for i, general in enumerate(general_list):
-                if isinstance(general, dict):
-                    valid_generals.append(general)
-                else:
-                    print_and_flush(f"  ⚠️  跳过无效的武将数据: {general}")
-            
-            if not valid_generals:
-                print_and_flush("  ❗ 没有有效的空闲武将")
-                return []
-            
-            print_and_flush(f"  ✅ 找到 {len(valid_generals)} 个空闲武将")
-            for i, general in enumerate(valid_generals):
-                name = general.get("name", "无名武将")  # 注意：字段名是"name"而不是"generalName"
-                rank = general.get("rank", 0)
-                print_and_flush(f"    {i+1}. {name} (等级: {rank})")
-            
-            return valid_generals
 
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 获取空闲武将失败: {msg}")
-            return None
+def _handle_get_resource_detail(client, result):
+    """处理领地详细信息接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        detail_data = result["data"]
 
-    except Exception as e:
-        print_and_flush(f"❌ 请求空闲武将列表异常: {e}")
+        # 检查防守武将状态，如果正在行军则返回特殊标识
+        generals_vo = detail_data.get("generalsVo", {})
+        if generals_vo:
+            mug_status_format = generals_vo.get("mugStatusFormat", "")
+            if mug_status_format == "行军中":
+                print_and_flush(f"  ⚠️ 防守武将正在行军中，跳过该资源点")
+                return "under_attack"  # 返回特殊标识表示有行军
+
+        print_and_flush("  ✅ 获取详细信息成功")
+
+        # 显示防守武将信息
+        if generals_vo:
+            general_name = generals_vo.get("name", "未知武将")
+            general_rank = generals_vo.get("rank", 0)
+            general_type = generals_vo.get("typeFormat", "未知类型")
+            print_and_flush(f"  🛡️ 防守武将: {general_name} (Lv.{general_rank}, {general_type})")
+
+        # 显示资源信息
+        resource = detail_data.get("resource", {})
+        if resource:
+            resource_name = resource.get("name", "未知资源")
+            resource_type = resource.get("generalsTypeFormat", "未知类型")
+            print_and_flush(f"  🌲 资源类型: {resource_name} ({resource_type})")
+
+        return detail_data
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 获取领地详细信息失败: {msg}")
         return None
 
 
@@ -456,10 +806,7 @@ def get_resource_detail(session, token, mur_id, user_id):
     :param user_id: 用户ID
     :return: 领地详细信息 或 None
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/resourceDetail"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
     data = {
         "murId": mur_id,
         "userId": user_id
@@ -467,59 +814,44 @@ def get_resource_detail(session, token, mur_id, user_id):
 
     try:
         print_and_flush(f"🔍 正在获取领地详细信息 (murId: {mur_id}, userId: {user_id})...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            detail_data = result["data"]
-            
-            # 检查防守武将状态，如果正在行军则返回特殊标识
-            generals_vo = detail_data.get("generalsVo", {})
-            if generals_vo:
-                mug_status_format = generals_vo.get("mugStatusFormat", "")
-                if mug_status_format == "行军中":
-                    print_and_flush(f"  ⚠️ 防守武将正在行军中，跳过该资源点")
-                    return "under_attack"  # 返回特殊标识表示有行军
-            
-            print_and_flush("  ✅ 获取详细信息成功")
-            
-            # 显示防守武将信息
-            if generals_vo:
-                general_name = generals_vo.get("name", "未知武将")
-                general_rank = generals_vo.get("rank", 0)
-                general_type = generals_vo.get("typeFormat", "未知类型")
-                print_and_flush(f"  🛡️ 防守武将: {general_name} (Lv.{general_rank}, {general_type})")
-            
-            # 显示资源信息
-            resource = detail_data.get("resource", {})
-            if resource:
-                resource_name = resource.get("name", "未知资源")
-                resource_type = resource.get("generalsTypeFormat", "未知类型")
-                print_and_flush(f"  🌲 资源类型: {resource_name} ({resource_type})")
-            
-            return detail_data
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 获取领地详细信息失败: {msg}")
-            return None
-
+        result = client.post("mid-user-resource/resourceDetail", data)
+        return _handle_get_resource_detail(client, result)
     except Exception as e:
         print_and_flush(f"❌ 请求领地详细信息异常: {e}")
         return None
-def occupy_resource(session, token, mur_id, general_id):
+
+# 占领失败消息中表示资源点正在被攻打/有行军的关键字，这类失败直接跳过该资源，无需再查详情
+UNDER_ATTACK_MESSAGES = ("行军", "正在被占领", "攻打", "战斗中")
+
+
+def _handle_occupy_resource(client, result):
+    """处理占领接口的返回（同步/异步共用）"""
+    if client.is_success(result):
+        print_and_flush("  ✅ 资源占领成功")
+        return True
+    else:
+        msg = result.get("msg", "未知错误")
+        print_and_flush(f"❌ 资源占领失败: {msg}")
+        # 检查是否是"超出资源占领上限"错误
+        if "超出资源占领上限" in msg:
+            return "超出资源占领上限"
+        if any(keyword in msg for keyword in UNDER_ATTACK_MESSAGES):
+            return "under_attack"
+        return False
+
+
+def occupy_resource(session, token, mur_id, general_id, resource=None, general_name=None):
     """
     占领资源
     :param session: requests.Session() 对象
     :param token: 登录 token
     :param mur_id: 领地ID
     :param general_id: 武将ID
-    :return: True(成功) / False(其他失败) / "超出资源占领上限"(特定错误)
+    :param resource: reList 中的资源信息（可选，用于成功后在本地更新军队信息快照）
+    :param general_name: 武将名称（可选，同上）
+    :return: True(成功) / False(其他失败) / "超出资源占领上限"(特定错误) / "under_attack"(资源点有行军)
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/resourceOccupy"
-    headers = {
-        "Token": token,
-    }
+    client = get_client(session, token)
     data = {
         "murId": mur_id,
         "mugId": general_id
@@ -527,21 +859,11 @@ def occupy_resource(session, token, mur_id, general_id):
 
     try:
         print_and_flush(f"⚔️ 正在尝试占领资源 (murId: {mur_id}, mugId: {general_id})...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
-            print_and_flush("  ✅ 资源占领成功")
-            return True
-        else:
-            msg = result.get("msg", "未知错误")
-            print_and_flush(f"❌ 资源占领失败: {msg}")
-            # 检查是否是"超出资源占领上限"错误
-            if "超出资源占领上限" in msg:
-                return "超出资源占领上限"
-            return False
-
+        result = client.post("mid-user-resource/resourceOccupy", data)
+        outcome = _handle_occupy_resource(client, result)
+        if outcome is True:
+            get_army_snapshot(session, token).record_occupy(mur_id, general_id, resource, general_name)
+        return outcome
     except Exception as e:
         print_and_flush(f"❌ 请求资源占领异常: {e}")
         return False
@@ -556,9 +878,14 @@ def get_current_occupied_count(session, token):
     """
     print_and_flush("📊 正在统计当前已占用的领地资源数量...")
     
-    # 获取已占领的资源
-    occupy_resource_list = get_occupy_resource_list(session, token)
+    # 获取已占领的资源（只统计数量，本地更新过的快照即可）
+    occupy_resource_list = get_army_snapshot(session, token).get(need_times=False)
     
+    return _count_occupied(occupy_resource_list)
+
+
+def _count_occupied(occupy_resource_list):
+    """统计并打印占用名额的资源数量（同步/异步共用）"""
     if not occupy_resource_list:
         print_and_flush("  ✅ 当前没有占用任何资源")
         return 0
@@ -576,206 +903,676 @@ def get_current_occupied_count(session, token):
     return occupied_count
 
 
-# ... existing code ...
-def auto_occupy_resources_gradually(session, token, account_index=None):
+def _current_distribution(occupy_resource_list):
+    """统计当前各类型资源的占用情况（只统计非"返回"状态的资源）"""
+    current_distribution = {"农田": 0, "森林": 0, "草原": 0, "山丘": 0, "沼泽": 0}
+    for res in occupy_resource_list or []:
+        status_format = res.get("statusFormat", "")
+        if status_format != "返回":
+            resource_name = res.get("brName", "未知资源")
+            if resource_name in current_distribution:
+                current_distribution[resource_name] += 1
+    return current_distribution
+
+
+def optimized_distributions(accounts):
     """
-    逐个检查并占领资源，减少服务器压力
-    增加对"超出资源占领上限"错误的处理
-    :param account_index: 账号索引，用于获取对应账号的配置
+    按实测产出批量计算目标配比（见 yield_optimizer.py），所有账号共用一次拟合
+    :param accounts: [(账号索引, session, token, settings.AccountSettings)]，
+                     只处理开启了 optimize_resource_distribution 的账号
+    :return: ({账号索引: 目标配比}, 本次读取的资源数量)；未开启或无法计算的账号不在配比中，
+             资源数量在占领结束后交给 record_yield_samples 记录
     """
-    print_and_flush("🚀 开始逐个占领资源流程...")
-    
-    # 从配置文件获取目标配比，优先使用当前账号的配置
-    try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-        
-        # 如果提供了账号索引，则使用该账号的配置
-        if account_index is not None and 0 <= account_index < len(config.get("accounts", [])):
-            target_distribution = config["accounts"][account_index]["config"].get("target_resource_distribution", {
-                "农田": 9,
-                "森林": 0,
-                "草原": 0,
-                "山丘": 0,
-                "沼泽": 0
-            })
-        else:
-            # 如果没有提供账号索引或索引无效，使用全局配置
-            target_distribution = config.get("target_resource_distribution", {
-                "农田": 9,
-                "森林": 0,
-                "草原": 0,
-                "山丘": 0,
-                "沼泽": 0
-            })
-    except Exception as e:
-        # 如果配置文件不存在或格式错误，使用默认值
-        print_and_flush(f"⚠️ 读取配置文件失败: {e}，使用默认配置")
-        target_distribution = {
-            "农田": 9,
-            "森林": 0,
-            "草原": 0,
-            "山丘": 0,
-            "沼泽": 0
-        }
-    
-    # 1. 获取当前已占用的资源数量和类型分布
-    occupy_resource_list = get_occupy_resource_list(session, token)
+    from yield_optimizer import get_yield_optimizer
+
+    states = []
+    samples = {}
+    measured_at = time.time()
+    for index, session, token, settings in accounts:
+        if not settings.optimize_resource_distribution:
+            continue
+        if not settings.tel:
+            # 产出记录按手机号区分账号，没有手机号时无法和其他账号的记录区分开
+            print_and_flush("⚠️ 账号没有手机号，无法记录产出，沿用配置的目标配比")
+            continue
+        try:
+            result = get_client(session, token).post("bas-assets/userInfo", {})
+        except Exception as e:
+            print_and_flush(f"⚠️ 获取用户信息失败，沿用配置的目标配比: {e}")
+            continue
+        user_info = (result.get("data") or {}).get("userInfo") or {}
+        fields = {key: value for key, value in user_info.items() if isinstance(value, (int, float)) and not isinstance(value, bool)}
+        total_slots = sum(settings.target_resource_distribution.values())
+        states.append((index, settings.tel, fields, total_slots))
+        samples[index] = (settings.tel, session, token, fields, measured_at)
+    if not states:
+        return {}, samples
+
+    started = time.perf_counter()
+    results = get_yield_optimizer().optimize([(tel, fields, total) for _, tel, fields, total in states])
+    distributions = {index: results[tel] for index, tel, _, _ in states if tel in results}
+    print_and_flush(f"📐 按实测产出计算目标配比（{len(states)} 个账号，耗时 {(time.perf_counter() - started) * 1000:.1f} 毫秒）")
+    return distributions, samples
+
+
+def record_yield_samples(samples):
+    """
+    占领结束后记录产出样本：占领前读取的资源数量 + 占领后持有的各类领地块数
+    （下一次记录前的产出由占领后持有的领地产生）
+    :param samples: optimized_distributions 返回的资源数量
+    """
+    if not samples:
+        return
+    from yield_optimizer import get_yield_optimizer
+
+    entries = []
+    for tel, session, token, fields, _ in samples.values():
+        occupy_resource_list = get_army_snapshot(session, token).get(need_times=False)
+        if occupy_resource_list is None:
+            continue
+        entries.append((tel, fields, _current_distribution(occupy_resource_list)))
+    if entries:
+        get_yield_optimizer().record(entries, min(sample[4] for sample in samples.values()))
 
-    # 统计当前各类型资源的占用情况
-    current_distribution = {"农田": 0, "森林": 0, "草原": 0, "山丘": 0, "沼泽": 0}
-    if occupy_resource_list:
-        for res in occupy_resource_list:
-            status_format = res.get("statusFormat", "")
-            # 只统计非"返回"状态的资源
-            if status_format != "返回":
-                resource_name = res.get("brName", "未知资源")
-                if resource_name in current_distribution:
-                    current_distribution[resource_name] += 1
 
-    print_and_flush(f"📊 当前资源分布: 农田{current_distribution['农田']}/9, 森林{current_distribution['森林']}/0, 草原{current_distribution['草原']}/0, 山丘{current_distribution['山丘']}/0, 沼泽{current_distribution['沼泽']}/0")
+def _needed_distribution(occupy_resource_list, target_distribution):
+    """
+    统计当前各类型资源的占用情况，计算还需要占领的各类资源数量
+    :return: (各类型还需占领的数量, 合计)
+    """
+    current_distribution = _current_distribution(occupy_resource_list)
+
+    progress = ", ".join(f"{name}{count}/{target_distribution.get(name, 0)}" for name, count in current_distribution.items())
+    print_and_flush(f"📊 当前资源分布: {progress}")
 
-    # 计算还需要占领的各类资源数量
     needed_distribution = {}
     total_needed = 0
-    for resource_type, target_count in target_distribution.items():
-        needed_count = max(0, target_count - current_distribution[resource_type])
+    for resource_type, current_count in current_distribution.items():
+        needed_count = max(0, target_distribution.get(resource_type, 0) - current_count)
         needed_distribution[resource_type] = needed_count
         total_needed += needed_count
+    return needed_distribution, total_needed
+
+
+# 同时进行的占领请求数（每块资源先查详情再占领，不同资源之间并发）
+OCCUPY_MAX_IN_FLIGHT = 4
+# 同一块资源占领失败后最多换几个武将尝试
+OCCUPY_MAX_ATTEMPTS = 2
+
+
+def _format_needed(needed):
+    return f"农田{needed['农田']}块, 森林{needed['森林']}块, 草原{needed['草原']}块, 山丘{needed['山丘']}块, 沼泽{needed['沼泽']}块"
+
+
+def _usable_generals(free_generals):
+    """
+    可派出占领的空闲武将（等级高的优先），等级为1的武将逐个跳过
+    :param free_generals: get_free_generals 返回的武将列表
+    """
+    usable = []
+    for general in free_generals or []:
+        if not isinstance(general, dict) or not general.get("mugId"):
+            continue
+        if general.get("rank", 0) == 1:
+            print_and_flush(f"  ⚠️ 武将 {general.get('name', '无名武将')} 等级为1，不派出占领")
+            continue
+        usable.append(general)
+    usable.sort(key=lambda general: general.get("rank", 0), reverse=True)
+    return usable
+
+
+class OccupationPlanner:
+    """
+    单个账号的占领计划
+    扫描中发现的空闲资源逐个分配一名空闲武将，不同资源的占领请求在线程池中并发进行；
+    占领失败时武将退回、资源换一名武将再试，遇到"超出资源占领上限"后不再分配
+    只在调用方线程中分配和处理结果，线程池里只执行详情查询和占领请求
+    """
+
+    def __init__(self, index, session, token, needed, generals, executor, wrap=None):
+        """
+        :param index: 账号索引（单账号流程可为 None）
+        :param needed: 各类型还需占领的数量（会被修改：分配出去即扣减，失败时退回）
+        :param generals: 可派出的武将列表（会被修改）
+        :param executor: 执行占领请求的线程池
+        :param wrap: wrap(账号索引, 函数) -> 结果，占领请求和结果处理都在其中执行（给输出加账号前缀等），默认直接调用
+        """
+        self.index = index
+        self.session = session
+        self.token = token
+        self.needed = needed
+        self.generals = generals
+        self.executor = executor
+        self.wrap = wrap or (lambda index, func: func())
+        self.occupied = 0
+        self.exceeded_limit = False
+        self._pending = {}  # future -> (资源, 用户ID, 武将, 第几次尝试)
+
+    @property
+    def label(self) -> str:
+        return f"账号{self.index + 1} " if self.index is not None else ""
+
+    def wants(self, resource_name) -> int:
+        """还能为该类型资源分配多少名武将"""
+        if self.exceeded_limit or not self.generals:
+            return 0
+        return self.needed.get(resource_name, 0)
+
+    def remaining(self) -> int:
+        """还能分配出去的占领数（不含进行中的请求）"""
+        if self.exceeded_limit:
+            return 0
+        return min(sum(self.needed.values()), len(self.generals))
+
+    def busy(self) -> bool:
+        return bool(self._pending)
+
+    def dispatch(self, res, user_id, attempt: int = 1):
+        """为资源分配一名武将并发出占领请求"""
+        general = self.generals.pop(0)
+        self.needed[res.get("name")] -= 1
+        # 复制调用方的上下文，账号标签等 contextvars 能带入工作线程
+        ctx = contextvars.copy_context()
+        future = self.executor.submit(ctx.run, self.wrap, self.index, lambda: self._occupy(res, user_id, general))
+        self._pending[future] = (res, user_id, general, attempt)
+
+    def _occupy(self, res, user_id, general):
+        """
+        reList 已显示资源空闲（无占领信息且不是正在被占领状态），直接发出占领请求；
+        只有失败原因不明时才查详情，判断是资源点有行军（跳过）还是这名武将被拒绝（换武将重试）
+        """
+        mur_id = res.get("murId")
+        print_and_flush(f"\n📍 {self.label}占领 {res.get('name', '未知资源')} (用户ID: {user_id})，武将: {general.get('name', '无名武将')} (等级: {general.get('rank', 0)})")
+        outcome = occupy_resource(self.session, self.token, mur_id, general.get("mugId"), res, general.get("name"))
+        if outcome is not False:
+            if outcome == "under_attack":
+                print_and_flush("  ⚠️ 资源点有行军，跳过该资源")
+            return outcome
+        detail = get_resource_detail(self.session, self.token, mur_id, user_id)
+        if detail == "under_attack":
+            print_and_flush("  ⚠️ 资源点有行军，跳过该资源")
+            return "under_attack"
+        if not detail:
+            print_and_flush("  ⚠️ 无法获取详细信息，跳过该资源")
+            return None
+        return False
+
+    def harvest(self, wait_all: bool = False):
+        """
+        处理已完成的占领请求
+        :param wait_all: 为 True 时等待所有请求（含重试）结束
+        """
+        while self._pending:
+            done = [future for future in self._pending if future.done()]
+            if not done:
+                if not wait_all:
+                    return
+                done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                res, user_id, general, attempt = self._pending.pop(future)
+                self.wrap(self.index, lambda: self._settle(future, res, user_id, general, attempt))
+
+    def _settle(self, future, res, user_id, general, attempt):
+        resource_name = res.get("name")
+        try:
+            outcome = future.result()
+        except Exception as e:
+            print_and_flush(f"  ❌ 占领请求异常: {e}")
+            outcome = False
+
+        if outcome is True:
+            self.occupied += 1
+            get_land_index().mark_claimed(user_id, res.get("murId"))
+            print_and_flush(f"  ✅ {self.label}成功占领 {resource_name}，尚未分配: {_format_needed(self.needed)}")
+            return
+
+        # 没占到：需求和武将都退回
+        self.needed[resource_name] += 1
+        self.generals.append(general)
+        if outcome == "超出资源占领上限":
+            print_and_flush(f"🚫 {self.label}超出资源占领上限，停止继续占领")
+            self.exceeded_limit = True
+        elif outcome == "under_attack":
+            get_land_index().mark_claimed(user_id, res.get("murId"))
+        elif outcome is False and attempt < OCCUPY_MAX_ATTEMPTS and len(self.generals) > 1 and self.wants(resource_name) > 0:
+            # 服务端拒绝了这名武将，换下一名武将再试这块资源
+            print_and_flush(f"  🔁 {self.label}占领失败，换一名武将重试该资源")
+            self.dispatch(res, user_id, attempt + 1)
+        else:
+            print_and_flush(f"  ❌ {self.label}占领失败，继续查找下一个资源")
+
+
+def _sweep_and_occupy(client, planners, user_ids, needed):
+    """
+    共用一次扫描为一个或多个账号占领资源：每块空闲资源分配给该类型还缺得最多的账号（相同时按账号顺序），
+    每块资源只请求一次；所有账号都分配完并确认结果后提前结束扫描
+    :param planners: [OccupationPlanner]
+    :param user_ids: 要扫描的用户ID序列，None 时按 land_index 配置的游标扫描，结束后移动游标
+    :param needed: 用于排列扫描顺序的各类型需求
+    :return: 分配过的资源数
+    """
+    requested = set()  # 已分配过的 (userId, murId)
+    window = None
+    if user_ids is None:
+        window, user_ids, max_user_id = scan_range_user_ids(client)
+    planned = plan_user_ids(user_ids, needed)
+    scanned = []
+    sweep = iter_user_re_lists(client, planned)
+    try:
+        for user_id, result in sweep:
+            scanned.append(user_id)
+            for planner in planners:
+                planner.harvest()
+            if result is not None and client.is_success(result):
+                for res in result["data"].get("resourceList", []):
+                    resource_name = res.get("name", "未知资源")
+                    # 只考虑空闲（没有被占领且不是正在被占领状态）的9级目标资源
+                    if res.get("murRank") != 9 or res.get("generalDesc") or res.get("status") == 3:
+                        continue
+                    planner = max(planners, key=lambda p: p.wants(resource_name))
+                    if planner.wants(resource_name) <= 0:
+                        continue
+                    key = (user_id, res.get("murId"))
+                    if not res.get("murId") or key in requested:
+                        continue
+                    requested.add(key)
+                    print_and_flush(f"  🎯 发现空闲资源: {resource_name} (用户ID: {user_id})")
+                    planner.dispatch(res, user_id)
+            if all(planner.remaining() <= 0 for planner in planners):
+                # 全部分配出去后等结果：失败退回的需求还要继续扫描
+                for planner in planners:
+                    planner.harvest(wait_all=True)
+                if all(planner.remaining() <= 0 for planner in planners):
+                    break
+        for planner in planners:
+            planner.harvest(wait_all=True)
+    finally:
+        # 提前结束时取消尚未发出的扫描请求
+        sweep.close()
+        if window is not None:
+            # 下次从本窗口中没扫到的用户继续
+            get_land_index().finish_window(window, planned, scanned, max_user_id)
+            get_land_index().save()
+    return len(requested)
+
+
+# ... existing code ...
+def auto_occupy_resources_gradually(session, token, account_index=None, settings=None):
+    """
+    并发扫描用户领地，发现所需的空闲资源就分配一名空闲武将去占领，多块资源的占领并发进行
+    增加对"超出资源占领上限"错误的处理
+    :param account_index: 账号索引，未传 settings 时用于获取对应账号的配置
+    :param settings: 账号配置（settings.AccountSettings）
+    :return: 有空闲武将但没找到空闲资源而未能占领的数量（守护模式据此安排稍后重试）
+    """
+    print_and_flush("🚀 开始逐个占领资源流程...")
     
-    if total_needed <= 0:
-        print_and_flush("✅ 已达到目标资源配比，无需继续占领")
-        return
-    
-    print_and_flush(f"🎯 需要占领: 农田{needed_distribution['农田']}块, 森林{needed_distribution['森林']}块, 草原{needed_distribution['草原']}块, 山丘{needed_distribution['山丘']}块, 沼泽{needed_distribution['沼泽']}块")
-    
-    # 2. 获取空闲武将（只获取一次，在整个流程中使用同一个武将）
-    free_generals = get_free_generals(session, token)
-    
-    # 检查是否有空闲武将
-    if not free_generals:
-        print_and_flush("🔚 没有空闲武将，流程结束")
-        return
-        
-    if not isinstance(free_generals, list) or len(free_generals) == 0:
-        print_and_flush("🔚 没有可用的空闲武将，流程结束")
-        return
-    
-    # 3. 选择第一个武将
-    selected_general = free_generals[0]
-    if not isinstance(selected_general, dict):
-        print_and_flush("❌ 无法获取有效的武将信息，流程结束")
-        return
-        
-    general_id = selected_general.get("mugId")
-    general_name = selected_general.get("name", "无名武将")  # 修正字段名
-    general_rank = selected_general.get("rank", 0)
+    # 目标配比（账号配置优先，其次全局配置）
+    if settings is None:
+        settings = get_account_settings(account_index)
+    target_distribution = dict(settings.target_resource_distribution)
     
-    # 检查必要信息是否存在
-    if not general_id:
-        print_and_flush("❌ 无法获取武将ID，流程结束")
-        return
+    # 1. 获取当前已占用的资源数量和类型分布（只统计数量和类型，本地更新过的快照即可）
+    occupy_resource_list = get_army_snapshot(session, token).get(need_times=False)
+    samples = {}
+    if settings.optimize_resource_distribution:
+        optimized, samples = optimized_distributions([(account_index, session, token, settings)])
+        if account_index in optimized:
+            target_distribution = optimized[account_index]
+            print_and_flush(f"📐 本轮目标配比: {_format_needed(target_distribution)}")
+    try:
+        return _occupy_towards(session, token, account_index, occupy_resource_list, target_distribution)
+    finally:
+        # 占领结束后再记录，样本中的领地块数才是接下来实际持有的
+        record_yield_samples(samples)
+
+
+def _occupy_towards(session, token, account_index, occupy_resource_list, target_distribution):
+    """按目标配比补足缺少的资源，返回未能占领的数量"""
+    needed_distribution, total_needed = _needed_distribution(occupy_resource_list, target_distribution)
     
-    # 如果第一个武将rank为1，则结束整个流程
-    if general_rank == 1:
-        print_and_flush(f"⚠️  第一个武将 {general_name} 等级为1，结束自动占领流程")
-        return
+    if total_needed <= 0:
+        print_and_flush("✅ 已达到目标资源配比，无需继续占领")
+        return 0
     
-    print_and_flush(f"🎯 选择武将: {general_name} (ID: {general_id}, 等级: {general_rank})")
+    print_and_flush(f"🎯 需要占领: {_format_needed(needed_distribution)}")
     
-    # 4. 逐个用户ID检查，发现空闲资源立即占领
-    occupied_count = 0
-    user_id = 1
+    # 2. 获取空闲武将，等级为1的武将逐个跳过
+    generals = _usable_generals(get_free_generals(session, token))
+    if not generals:
+        print_and_flush("🔚 没有可派出的空闲武将，流程结束")
+        return 0
     
-    # 新增变量：记录是否遇到"超出资源占领上限"错误
-    exceeded_limit = False
+    print_and_flush(f"🎯 可派出武将 {len(generals)} 名，本轮最多占领 {min(total_needed, len(generals))} 块资源")
     
-    while user_id <= 100 and total_needed > 0 and not exceeded_limit:
-        try:
-            # 检查当前用户ID是否有空闲资源
-            url = "https://q-jiang.myprint.top/api/mid-user-resource/reList"
-            headers = {"Token": token}
-            data = {"userId": user_id}
-            
-            response = session.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            if result.get("success") and result.get("code") == "200":
-                resource_list = result["data"].get("resourceList", [])
-                
-                # 筛选等级为9的资源，并且只保留农田、森林、草原、山丘、沼泽
-                target_resources = ["农田", "森林", "草原", "山丘", "沼泽"]
-                level_9_resources = [
-                    res for res in resource_list 
-                    if res.get("murRank") == 9 and res.get("name") in target_resources
-                ]
-                
-                # 检查是否有符合需求的空闲资源
-                for res in level_9_resources:
-                    resource_name = res.get("name", "未知资源")
-                    
-                    # 检查是否还需要这种类型的资源
-                    if needed_distribution.get(resource_name, 0) <= 0:
-                        continue
-                    
-                    # 检查是否空闲（没有被占领且不是正在被占领状态）
-                    if not res.get("generalDesc") and res.get("status") != 3:
-                        # 发现空闲资源，立即尝试占领
-                        mur_id = res.get("murId")
-                        
-                        # 确保murId存在
-                        if not mur_id:
-                            print_and_flush(f"  ⚠️ 资源缺少ID，跳过该资源")
-                            continue
-                        
-                        print_and_flush(f"\n📍 发现空闲资源: {resource_name} (用户ID: {user_id})")
-                        
-                        # 获取详细信息
-                        detail = get_resource_detail(session, token, mur_id, user_id)
-                        
-                        # 如果返回"under_attack"，表示有行军，跳过该资源
-                        if detail == "under_attack":
-                            print_and_flush("  ⚠️ 资源点有行军，跳过该资源")
-                            continue
-                        
-                        if not detail:
-                            print_and_flush("  ⚠️ 无法获取详细信息，跳过该资源")
-                            continue
-                        
-                        # 尝试占领
-                        occupy_result = occupy_resource(session, token, mur_id, general_id)
-                        if occupy_result is True:
-                            occupied_count += 1
-                            needed_distribution[resource_name] -= 1
-                            total_needed -= 1
-                            print_and_flush(f"  ✅ 成功占领，还需占领: 农田{needed_distribution['农田']}块, 森林{needed_distribution['森林']}块, 草原{needed_distribution['草原']}块, 山丘{needed_distribution['山丘']}块, 沼泽{needed_distribution['沼泽']}块")
-                            
-                            # 检查是否已达到目标
-                            if total_needed <= 0:
-                                print_and_flush("✅ 已达到目标资源配比")
-                                print_and_flush(f"🏁 逐个占领流程结束，共成功占领 {occupied_count} 个资源")
-                                return
-                        elif occupy_result == "超出资源占领上限":
-                            # 遇到"超出资源占领上限"错误，设置标志并跳出循环
-                            print_and_flush("🚫 超出资源占领上限，停止继续占领")
-                            exceeded_limit = True
-                            break
-                        else:
-                            print_and_flush("  ❌ 占领失败，继续查找下一个资源")
-            
-            # 添加延迟避免请求过于频繁
-            time.sleep(0.5)
-            
-        except Exception as e:
-            # 忽略单个用户请求失败，继续检查下一个
-            print_and_flush(f"  ⚠️ 检查用户 {user_id} 时出错: {e}")
-            pass
-        
-        user_id += 1
+    # 3. 并发扫描用户ID，哪个用户的领地列表先返回就先检查，发现空闲资源立即分配武将占领
+    client = get_client(session, token)
+    with ThreadPoolExecutor(max_workers=OCCUPY_MAX_IN_FLIGHT, thread_name_prefix="occupy") as executor:
+        planner = OccupationPlanner(account_index, session, token, needed_distribution, generals, executor)
+        _sweep_and_occupy(client, [planner], None, needed_distribution)
     
-    if exceeded_limit:
-        print_and_flush("🏁 由于超出资源占领上限，提前结束占领流程")
+    if planner.exceeded_limit:
+        print_and_flush(f"🏁 由于超出资源占领上限，提前结束占领流程，共成功占领 {planner.occupied} 个资源")
+    elif sum(needed_distribution.values()) <= 0:
+        print_and_flush("✅ 已达到目标资源配比")
+        print_and_flush(f"🏁 逐个占领流程结束，共成功占领 {planner.occupied} 个资源")
     else:
-        print_and_flush(f"🏁 逐个占领流程结束，共成功占领 {occupied_count} 个资源")
-# ... existing code ...
\ No newline at end of file
+        print_and_flush(f"🏁 逐个占领流程结束，共成功占领 {planner.occupied} 个资源")
+    return planner.remaining()
+# ... existing code ...
+
+
+def coordinated_occupy_resources(accounts, wrap=None, user_ids=None):
+    """
+    多账号协同占领：所有账号共用一次扫描，发现的空闲资源按各账号的目标配比和空闲武将数分配，
+    每块资源只由一个账号请求，扫描流量与账号数量无关
+    :param accounts: [(账号索引, session, token, settings.AccountSettings)]
+    :param wrap: wrap(账号索引, 函数) -> 结果，用于给输出加账号前缀等，默认直接调用
+    :param user_ids: 要扫描的用户ID序列，默认按 land_index 配置的游标扫描
+    :return: {账号索引: 成功占领数量}
+    """
+    wrap = wrap or (lambda index, func: func())
+    print_and_flush("🤝 开始多账号协同占领资源...")
+
+    def collect_demand(session, token, occupy_resource_list, target_distribution):
+        needed, total_needed = _needed_distribution(occupy_resource_list, target_distribution)
+        if total_needed <= 0:
+            print_and_flush("✅ 已达到目标资源配比，无需继续占领")
+            return None
+        generals = _usable_generals(get_free_generals(session, token))
+        if not generals:
+            print_and_flush("🔚 没有可派出的空闲武将")
+            return None
+        return needed, generals
+
+    results = {index: 0 for index, _, _, _ in accounts}
+    with ThreadPoolExecutor(max_workers=OCCUPY_MAX_IN_FLIGHT, thread_name_prefix="occupy") as executor:
+        armies = {
+            index: wrap(index, lambda: get_army_snapshot(session, token).get(need_times=False))
+            for index, session, token, _ in accounts
+        }
+        # 开启了按产出计算配比的账号一起批量计算（产出样本在占领结束后记录）
+        optimized, samples = optimized_distributions(accounts)
+        planners = []
+        for index, session, token, settings in accounts:
+            target_distribution = optimized.get(index, settings.target_resource_distribution)
+            demand = wrap(index, lambda: collect_demand(session, token, armies[index], target_distribution))
+            if demand:
+                planners.append(OccupationPlanner(index, session, token, demand[0], demand[1], executor, wrap))
+
+        if not planners:
+            print_and_flush("🏁 没有账号需要占领资源")
+            record_yield_samples(samples)
+            return results
+
+        print_and_flush(f"🎯 {len(planners)} 个账号共需占领 {sum(p.remaining() for p in planners)} 块资源，开始共享扫描")
+        total_needed = {name: sum(p.wants(name) for p in planners) for name in ("农田", "森林", "草原", "山丘", "沼泽")}
+        client = get_client(planners[0].session, planners[0].token)
+        try:
+            requested = _sweep_and_occupy(client, planners, user_ids, total_needed)
+        finally:
+            record_yield_samples(samples)
+
+    for planner in planners:
+        results[planner.index] = planner.occupied
+    summary = "，".join(f"账号{p.index + 1} {p.occupied} 块" for p in planners)
+    print_and_flush(f"🏁 协同占领结束，共请求 {requested} 块资源，成功占领: {summary}")
+    return results
+
+
+# ==================== 异步版本 ====================
+# 与上面的同步函数一一对应，返回值相同；响应处理和输出走同一组 _handle_* 等函数，
+# 军队信息与同步版共用同一份 ArmySnapshot，修改流程时两边一起改
+async def get_re_list_async(session, token):
+    """
+    获取用户领地资源列表（简洁单行输出，异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :return: resourceList 列表 或 None
+    """
+    client = get_async_client(session, token)
+
+    try:
+        print_and_flush("🌍 正在获取【领地资源】信息...")  # 主提示放这里，不重复
+        result = await client.post("mid-user-resource/reList", {})
+        return _handle_get_re_list(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求领地资源列表异常: {e}")
+        return None
+
+
+async def get_occupy_resource_list_async(session, token):
+    """
+    获取用户占领的领地资源列表（异步版，与同步版共用快照）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :return: selfArmyInfo 列表 或 None
+    """
+    return await get_army_snapshot(session, token).get_async(session=session)
+
+
+async def resource_recall_async(session, token, murg_id):
+    """
+    召回领地资源（异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param murg_id: 领地资源ID
+    :return: 是否成功召回
+    """
+    client = get_async_client(session, token)
+    data = {
+        "murgId": murg_id
+    }
+
+    try:
+        print_and_flush(f"🔄 正在召回领地资源 ID: {murg_id}...")
+        result = await client.post("mid-user-resource/resourceRecall", data)
+        recalled = _handle_resource_recall(client, result, murg_id)
+        if recalled:
+            get_army_snapshot(session, token).record_recall(murg_id)
+        return recalled
+    except Exception as e:
+        print_and_flush(f"❌ 召回请求异常: {e}")
+        return False
+
+
+async def check_and_recall_resources_async(session, token, occupy_resource_list):
+    """
+    检查并自动召回超过8小时的领地资源（异步版，最多 RECALL_MAX_IN_FLIGHT 个召回请求同时进行）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param occupy_resource_list: 占领的领地资源列表
+    :return: 成功召回的数量
+    """
+    if not occupy_resource_list:
+        return 0
+
+    due = _due_for_recall(occupy_resource_list)
+    semaphore = asyncio.Semaphore(RECALL_MAX_IN_FLIGHT)
+
+    async def recall_one(murg_id):
+        async with semaphore:
+            return await resource_recall_async(session, token, murg_id)
+
+    results = await asyncio.gather(*(recall_one(murg_id) for murg_id in due))
+    recalled_count = sum(1 for ok in results if ok)
+
+    _print_recall_summary(recalled_count)
+    return recalled_count
+
+
+async def get_all_land_resources_async(session, token):
+    """
+    获取所有领地资源信息（异步版，两个列表同时请求）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :return: (resource_list, occupy_resource_list) 或 (None, None)
+    """
+    print_and_flush("🌍 正在获取【全部领地资源】信息...")
+
+    resource_list, occupy_resource_list = await asyncio.gather(
+        get_re_list_async(session, token),
+        get_occupy_resource_list_async(session, token),
+    )
+
+    # 检查并召回超过8小时的资源
+    await check_and_recall_resources_async(session, token, occupy_resource_list)
+
+    return resource_list, occupy_resource_list
+
+
+async def get_friend_land_resources_async(session, token, user_id):
+    """
+    获取好友领地资源信息（只显示等级为9的资源，异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param user_id: 好友用户ID
+    :return: resourceList 列表 或 None
+    """
+    client = get_async_client(session, token)
+    data = {
+        "userId": user_id
+    }
+
+    try:
+        print_and_flush(f"👥 正在获取好友【{user_id}】的领地资源信息...")
+        result = await client.post("mid-user-resource/reList", data)
+        return _handle_get_friend_land_resources(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求好友领地资源列表异常: {e}")
+        return None
+
+
+async def scan_users_for_resources_async(session, token, start_user_id=None, end_user_id=None, max_in_flight=SWEEP_MAX_IN_FLIGHT):
+    """
+    扫描用户ID范围，查找空闲的9级资源（异步版，最多 max_in_flight 个请求同时进行）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param start_user_id: 起始用户ID（与 end_user_id 都不传时按 land_index 配置的游标扫描）
+    :param end_user_id: 结束用户ID
+    :param max_in_flight: 同时进行的请求数上限
+    :return: 所有找到的空闲资源列表（按用户ID排序）
+    """
+    free_resources = []
+    client = get_async_client(session, token)
+    # 探测最大用户ID是少量串行请求，放到线程中用同步客户端完成
+    window, user_ids, max_user_id = await asyncio.to_thread(
+        _plan_scan, get_client(client, token), start_user_id, end_user_id
+    )
+    semaphore = asyncio.Semaphore(max(1, max_in_flight))
+    scanned = []
+
+    async def scan_one(user_id):
+        async with semaphore:
+            try:
+                result = await client.post("mid-user-resource/reList", {"userId": user_id})
+            except Exception as e:
+                # 忽略单个用户请求失败，继续检查下一个
+                print_and_flush(f"  ⚠️ 检查用户 {user_id} 时出错: {e}")
+                result = None
+        # 按返回先后处理，与同步版的 iter_user_re_lists 一致
+        scanned.append(user_id)
+        _record_land_index(client, user_id, result)
+        if result is not None:
+            free_resources.extend(_find_free_resources(client, result, user_id))
+
+    try:
+        await asyncio.gather(*(scan_one(user_id) for user_id in user_ids))
+    finally:
+        # 每轮扫描结束写一次索引文件
+        get_land_index().save()
+    return _finish_scan(free_resources, window, user_ids, scanned, max_user_id)
+
+
+async def get_free_generals_async(session, token):
+    """
+    获取空闲武将列表（异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :return: 武将列表 或 None
+    """
+    client = get_async_client(session, token)
+
+    try:
+        print_and_flush("👥 正在获取空闲武将列表...")
+        result = await client.post("bas-generals/freeGeneralList", {})
+        return _handle_get_free_generals(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求空闲武将列表异常: {e}")
+        return None
+
+
+async def get_resource_detail_async(session, token, mur_id, user_id):
+    """
+    获取9级领地详细信息（异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param mur_id: 领地ID
+    :param user_id: 用户ID
+    :return: 领地详细信息 或 None
+    """
+    client = get_async_client(session, token)
+    data = {
+        "murId": mur_id,
+        "userId": user_id
+    }
+
+    try:
+        print_and_flush(f"🔍 正在获取领地详细信息 (murId: {mur_id}, userId: {user_id})...")
+        result = await client.post("mid-user-resource/resourceDetail", data)
+        return _handle_get_resource_detail(client, result)
+    except Exception as e:
+        print_and_flush(f"❌ 请求领地详细信息异常: {e}")
+        return None
+
+
+async def occupy_resource_async(session, token, mur_id, general_id, resource=None, general_name=None):
+    """
+    占领资源（异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :param mur_id: 领地ID
+    :param general_id: 武将ID
+    :param resource: reList 中的资源信息（可选，用于成功后在本地更新军队信息快照）
+    :param general_name: 武将名称（可选，同上）
+    :return: True(成功) / False(其他失败) / "超出资源占领上限"(特定错误) / "under_attack"(资源点有行军)
+    """
+    client = get_async_client(session, token)
+    data = {
+        "murId": mur_id,
+        "mugId": general_id
+    }
+
+    try:
+        print_and_flush(f"⚔️ 正在尝试占领资源 (murId: {mur_id}, mugId: {general_id})...")
+        result = await client.post("mid-user-resource/resourceOccupy", data)
+        outcome = _handle_occupy_resource(client, result)
+        if outcome is True:
+            get_army_snapshot(session, token).record_occupy(mur_id, general_id, resource, general_name)
+        return outcome
+    except Exception as e:
+        print_and_flush(f"❌ 请求资源占领异常: {e}")
+        return False
+
+
+async def get_current_occupied_count_async(session, token):
+    """
+    获取当前已占领和行军中的资源数量（异步版）
+    :param session: AsyncQJiangClient，可为 None
+    :param token: 登录 token
+    :return: 已占用的资源数量
+    """
+    print_and_flush("📊 正在统计当前已占用的领地资源数量...")
+
+    # 获取已占领的资源（只统计数量，本地更新过的快照即可）
+    occupy_resource_list = await get_army_snapshot(session, token).get_async(need_times=False, session=session)
+    return _count_occupied(occupy_resource_list)
+
+
+async def auto_occupy_resources_gradually_async(session, token, account_index=None, settings=None):
+    """
+    按目标配比逐步占领资源（异步版，返回值与 auto_occupy_resources_gradually 相同）
+    占领计划需要在扫描过程中逐个分配武将，暂无纯异步实现，整个流程在线程中执行，不阻塞事件循环
+    :param session: AsyncQJiangClient，可为 None
+    """
+    return await asyncio.to_thread(auto_occupy_resources_gradually, session, token, account_index, settings)
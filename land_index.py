@@ -0,0 +1,310 @@
+# land_index.py
+# 功能：领地资源索引（跨运行、跨账号共用）
+# 记录每个用户的9级农田/森林/草原/山丘/沼泽：类型、等级、占领者、状态和最后一次看到的时间；
+# 扫描前先查索引，只重新请求可能空闲、从未扫描过或信息已过期的用户，其余用户直接跳过
+import json
+import os
+import sys
+import threading
+import time
+
+LAND_INDEX_FILE = "land_index.json"
+TARGET_RESOURCES = ("农田", "森林", "草原", "山丘", "沼泽")
+TARGET_RANK = 9
+
+# 命中统计：各用户出现空闲资源的次数按半衰期衰减，越久以前的命中权重越低
+HIT_HALF_LIFE_SECONDS = 3 * 24 * 3600
+PRIOR_HIT_RATE = 0.1  # 没有历史记录时假定的命中率
+PRIOR_WEIGHT = 2      # 先验相当于多少次扫描
+
+# 默认刷新策略，可在 config.json 的 land_index 中覆盖
+DEFAULT_LAND_INDEX = {
+    "enabled": True,
+    "occupied_recheck_minutes": 60,  # 目标资源都被占领的用户，多久后重新检查
+    "empty_recheck_hours": 24,       # 没有目标资源的用户，多久后重新检查
+    "start_user_id": 1,              # 扫描范围的起始用户ID
+    "max_user_id": 0,                # 扫描范围的最大用户ID，0 表示自动探测
+    "batch_size": 100,               # 每轮从游标开始扫描多少个用户ID
+    "probe_interval_hours": 24,      # 自动探测最大用户ID的间隔
+}
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+def is_target_plot(res: dict) -> bool:
+    """是否为需要关注的9级农田/森林/草原/山丘/沼泽"""
+    return res.get("murRank") == TARGET_RANK and res.get("name") in TARGET_RESOURCES
+
+
+def is_plot_free(plot: dict) -> bool:
+    """没有占领信息且不处于"正在被占领"状态"""
+    return not plot.get("occupant") and not plot.get("occupied") and plot.get("status") != 3
+
+
+def _update_stats(stats: dict, free_types, now: float) -> dict:
+    """
+    把一次扫描结果计入用户的命中统计（扫描次数和各类型命中次数先按时间衰减再累加）
+    :param stats: 原统计，可为 None
+    :param free_types: 本次发现空闲的资源类型
+    """
+    stats = dict(stats or {"probes": 0, "hits": {}, "last_hit": {}, "updated": now})
+    decay = 0.5 ** (max(0.0, now - stats.get("updated", now)) / HIT_HALF_LIFE_SECONDS)
+    hits = {name: count * decay for name, count in stats.get("hits", {}).items()}
+    last_hit = dict(stats.get("last_hit", {}))
+    for name in set(free_types):
+        hits[name] = hits.get(name, 0) + 1
+        last_hit[name] = now
+    stats.update(
+        probes=round(stats.get("probes", 0) * decay + 1, 4),
+        hits={name: round(count, 4) for name, count in hits.items() if count >= 0.001},
+        last_hit=last_hit,
+        updated=now,
+    )
+    return stats
+
+
+def expected_hit_rate(stats: dict, wanted, now: float) -> float:
+    """
+    按历史统计估计扫描该用户一次能找到所需类型空闲资源的概率（各类型命中率之和）
+    :param stats: 用户的命中统计，没有时按先验命中率估计
+    :param wanted: 还需要的资源类型
+    """
+    wanted = list(wanted)
+    if not stats:
+        return PRIOR_HIT_RATE * len(wanted)
+    decay = 0.5 ** (max(0.0, now - stats.get("updated", now)) / HIT_HALF_LIFE_SECONDS)
+    probes = stats.get("probes", 0) * decay
+    hits = stats.get("hits", {})
+    return sum(
+        (hits.get(name, 0) * decay + PRIOR_HIT_RATE * PRIOR_WEIGHT) / (probes + PRIOR_WEIGHT)
+        for name in wanted
+    )
+
+
+class LandIndex:
+    """
+    领地资源索引（线程安全）
+    文件结构: {"users": {"<userId>": {"last_seen": 时间戳, "plots": {"<murId>": {...}}, "stats": 命中统计}}}
+    """
+
+    def __init__(self, path: str = LAND_INDEX_FILE, settings: dict = None):
+        merged = dict(DEFAULT_LAND_INDEX)
+        merged.update(settings or {})
+        self.path = path
+        self.enabled = bool(merged["enabled"])
+        self.occupied_recheck = float(merged["occupied_recheck_minutes"]) * 60
+        self.empty_recheck = float(merged["empty_recheck_hours"]) * 3600
+        self.start_user_id = max(1, int(merged["start_user_id"]))
+        self.max_user_id = int(merged["max_user_id"] or 0)
+        self.batch_size = max(1, int(merged["batch_size"]))
+        self.probe_interval = float(merged["probe_interval_hours"]) * 3600
+        self._lock = threading.RLock()
+        self._users = None
+        self._scan = {}  # {"cursor": 下一轮起始用户ID, "max_user_id": 探测到的最大用户ID, "probed_at": 探测时间}
+        self._dirty = False
+
+    def _load(self) -> dict:
+        if self._users is None:
+            self._users = {}
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if isinstance(data, dict):
+                        self._users = data.get("users", {})
+                        self._scan = data.get("scan", {})
+            except Exception as e:
+                print_and_flush(f"⚠️ 读取领地索引失败: {e}")
+        return self._users
+
+    def save(self):
+        """有更新时写回文件（每轮扫描结束调用一次）"""
+        with self._lock:
+            if not self._dirty or self._users is None:
+                return
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"users": self._users, "scan": self._scan}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except Exception as e:
+                print_and_flush(f"⚠️ 保存领地索引失败: {e}")
+
+    def record_user(self, user_id, resource_list):
+        """
+        用某个用户最新的领地列表（reList 返回的 resourceList）刷新索引
+        :param user_id: 用户ID
+        :param resource_list: 该用户的全部领地资源
+        """
+        now = time.time()
+        plots = {}
+        free_types = []
+        for res in resource_list or []:
+            if not is_target_plot(res) or not res.get("murId"):
+                continue
+            general_desc = res.get("generalDesc") or {}
+            plots[str(res["murId"])] = {
+                "name": res.get("name"),
+                "rank": res.get("murRank"),
+                "occupant": general_desc.get("occupyUserName") or "",
+                "occupied": bool(general_desc),
+                "status": res.get("status"),
+                "last_seen": now,
+            }
+            if is_plot_free(plots[str(res["murId"])]):
+                free_types.append(res.get("name"))
+        with self._lock:
+            users = self._load()
+            stats = _update_stats((users.get(str(user_id)) or {}).get("stats"), free_types, now)
+            users[str(user_id)] = {"last_seen": now, "plots": plots, "stats": stats}
+            self._dirty = True
+
+    def mark_claimed(self, user_id, mur_id):
+        """本程序刚占领（或派兵前往）的资源标记为已占用，其他账号不会再去抢"""
+        with self._lock:
+            user = self._load().get(str(user_id))
+            if not user:
+                return
+            plot = user["plots"].get(str(mur_id))
+            if plot:
+                plot.update(occupied=True, status=3, last_seen=time.time())
+                self._dirty = True
+
+    def free_plots(self, user_id) -> list:
+        """索引中该用户可能空闲的资源"""
+        with self._lock:
+            user = self._load().get(str(user_id)) or {}
+            return [
+                dict(plot, murId=int(mur_id) if str(mur_id).isdigit() else mur_id, userId=user_id)
+                for mur_id, plot in user.get("plots", {}).items() if is_plot_free(plot)
+            ]
+
+    def probed_max_user_id(self, now: float = None):
+        """
+        最近一次自动探测到的最大用户ID
+        :return: 用户ID；没有探测过或已超过探测间隔时返回 None
+        """
+        now = now or time.time()
+        with self._lock:
+            self._load()
+            if self._scan.get("max_user_id") and now - self._scan.get("probed_at", 0) < self.probe_interval:
+                return self._scan["max_user_id"]
+        return None
+
+    def last_known_max_user_id(self):
+        with self._lock:
+            self._load()
+            return self._scan.get("max_user_id")
+
+    def set_probed_max_user_id(self, max_user_id: int):
+        with self._lock:
+            self._load()
+            self._scan.update(max_user_id=max_user_id, probed_at=time.time())
+            self._dirty = True
+
+    def scan_window(self, max_user_id: int) -> list:
+        """
+        本轮按游标扫描的用户ID：从上次停下的位置开始取 batch_size 个，超过 max_user_id 后回到起始ID
+        """
+        span = max_user_id - self.start_user_id + 1
+        if span <= 0:
+            return []
+        with self._lock:
+            self._load()
+            cursor = self._scan.get("cursor", self.start_user_id)
+        if not self.start_user_id <= cursor <= max_user_id:
+            cursor = self.start_user_id
+        return [self.start_user_id + (cursor - self.start_user_id + i) % span for i in range(min(self.batch_size, span))]
+
+    def finish_window(self, window: list, planned, scanned, max_user_id: int):
+        """
+        扫描结束后移动游标：停在窗口中第一个需要扫描但没扫到的用户（提前结束时下次从这里继续），
+        窗口全部完成时移到窗口之后
+        """
+        planned, scanned = set(planned), set(scanned)
+        next_id = None
+        for user_id in window:
+            if user_id in planned and user_id not in scanned:
+                next_id = user_id
+                break
+        if next_id is None and window:
+            next_id = window[-1] + 1
+            if next_id > max_user_id:
+                next_id = self.start_user_id
+        if next_id is not None:
+            with self._lock:
+                self._load()
+                self._scan["cursor"] = next_id
+                self._dirty = True
+
+    def hot_user_ids(self, exclude=()) -> list:
+        """窗口之外、索引中上次看到有空闲目标资源的用户（每轮都值得再看一眼）"""
+        exclude = {str(user_id) for user_id in exclude}
+        with self._lock:
+            return [
+                int(user_id) for user_id, user in self._load().items()
+                if user_id not in exclude and user_id.isdigit()
+                and any(is_plot_free(plot) for plot in user.get("plots", {}).values())
+            ]
+
+    def plan_user_ids(self, user_ids, needed: dict = None, now: float = None):
+        """
+        决定本轮需要请求哪些用户的领地列表，以及请求顺序
+        目标资源全被占领且最近检查过、或最近确认没有目标资源的用户跳过；
+        其余用户按预计命中率从高到低排列：索引中已有所需类型空闲资源的最优先，
+        其次按历史上在该用户处找到所需类型空闲资源的频率（越近的命中权重越高）
+        :param needed: 各类型还需占领的数量，None 表示所有类型都需要
+        :return: (需要扫描的用户ID列表, 跳过的用户数)
+        """
+        user_ids = list(user_ids)
+        if not self.enabled:
+            return user_ids, 0
+        now = now or time.time()
+        wanted = [name for name in TARGET_RESOURCES if needed is None or needed.get(name, 0) > 0]
+        scored = []
+        skipped = 0
+        with self._lock:
+            users = self._load()
+            for user_id in user_ids:
+                user = users.get(str(user_id))
+                if user is None:
+                    scored.append((expected_hit_rate(None, wanted, now), user_id))
+                    continue
+                plots = user.get("plots", {}).values()
+                age = now - user.get("last_seen", 0)
+                free_names = {plot.get("name") for plot in plots if is_plot_free(plot)}
+                if not free_names and not ((plots and age >= self.occupied_recheck) or (not plots and age >= self.empty_recheck)):
+                    skipped += 1
+                    continue
+                score = expected_hit_rate(user.get("stats"), wanted, now)
+                if free_names.intersection(wanted):
+                    score += len(wanted)  # 上次看到时就是空闲的所需资源，排在所有按统计估计的用户之前
+                scored.append((score, user_id))
+        # sorted 是稳定排序，预计命中率相同时保持原来的用户ID顺序
+        return [user_id for _, user_id in sorted(scored, key=lambda item: -item[0])], skipped
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_land_index() -> LandIndex:
+    """获取全局共享的领地索引（所有账号共用，首次使用时按 config.json 的 land_index 配置创建）"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            settings = None
+            try:
+                from settings import get_config
+                settings = get_config().get("land_index")
+            except Exception:
+                pass
+            _index = LandIndex(settings=settings)
+        return _index
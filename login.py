@@ -1,27 +1,18 @@
 # login.py
 import requests
 import sys
-DEFAULT_USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/138.0.0.0 Safari/537.36"
-)
+from api_client import get_client, DEFAULT_USER_AGENT
 UA = DEFAULT_USER_AGENT
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
     sys.stdout.flush()
-def login(tel, pwd):
+def login(tel, pwd, session=None):
     """
     使用手机号和密码登录，返回 {'token': str, 'user_id': int, 'user_name': str}
+    传入 session 时复用该账号的连接池，否则临时新建一个
     """
-    session = requests.Session()
-    session.headers.update({
-        "User-Agent": DEFAULT_USER_AGENT,
-        "Accept": "application/json, text/plain, */*",
-        "Connection": "keep-alive"
-    })
+    client = get_client(session if session is not None else requests.Session())
 
-    url = "https://q-jiang.myprint.top/api/user/login"
     payload = {
         "tel": tel,
         "pwd": pwd
@@ -29,14 +20,14 @@ def login(tel, pwd):
 
     try:
         print_and_flush("🚪 正在登录...")
-        response = session.post(url, json=payload, timeout=10)
+        response = client.request("user/login", payload)
 
         if response.status_code != 200:
             print_and_flush(f"❌ 请求失败，状态码: {response.status_code}")
             return None
 
         result = response.json()
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             token = data.get("token")
             user_info = data.get("userInfo", {})
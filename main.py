@@ -1,12 +1,18 @@
 import os
 import time
-import json
 import requests
+from api_client import get_client
+from response_cache import configure_response_cache, cache_stats_text
+from settings import get_config, ConfigError, CONFIG_FILE
+from rate_limiter import configure_rate_limiter, get_rate_limiter
 import traceback
 from typing import Optional, Any
 import threading
 import sys
 import io
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from task_graph import TaskGraph, current_task
 
 # 设置环境变量以确保UTF-8编码
 os.environ['PYTHONIOENCODING'] = 'utf-8'
@@ -27,6 +33,49 @@ if os.name == 'nt':
     except:
         pass
 
+# 当前线程正在执行的账号标签（并发模式下用于给输出加前缀）
+_account_tag = contextvars.ContextVar("account_tag", default="")
+
+class AccountTaggedStream:
+    """
+    按账号（以及账号内并行的任务阶段）给输出的每一行加上前缀
+    每个线程先缓存不完整的行，凑满一行后再整行写出，避免多个账号的输出交错在同一行
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def write(self, text):
+        tag = "/".join(t for t in (_account_tag.get(), current_task.get()) if t)
+        if not tag:
+            with self._lock:
+                return self._stream.write(text)
+
+        pending = getattr(self._local, "pending", "") + text
+        lines = pending.split("\n")
+        self._local.pending = lines.pop()
+        if lines:
+            with self._lock:
+                self._stream.write("".join(f"[{tag}] {line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def install_tagged_streams():
+    """
+    输出按账号/任务阶段加前缀，避免并发时日志无法区分
+    """
+    if not isinstance(sys.stdout, AccountTaggedStream):
+        sys.stdout = AccountTaggedStream(sys.stdout)
+    if not isinstance(sys.stderr, AccountTaggedStream):
+        sys.stderr = AccountTaggedStream(sys.stderr)
+
 def traceback_print_and_flush_exc():
     traceback.print_exc()
     sys.stdout.flush()
@@ -43,35 +92,32 @@ def print_and_flush(*args, **kwargs):
 # ========== 配置区 ========== 
 def load_config():
     """
-    加载配置文件
+    加载配置文件（解析与校验见 settings.py，运行期间只在文件修改后重新解析）
     """
-    config_file = "config.json"
-    
-    if not os.path.exists(config_file):
-        # 未检测到config.json文件
-        print_and_flush(f"❌ 未检测到 config.json 配置文件")
-        print_and_flush("📝 请使用 account_config.py 生成配置文件")
-        print_and_flush("运行命令: python account_config.py")
-        sys.exit(1)
-    
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
-    except json.JSONDecodeError as e:
-        print_and_flush(f"❌ 配置文件格式错误: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print_and_flush(f"❌ 读取配置文件失败: {e}")
+        return get_config()
+    except ConfigError as e:
+        if not os.path.exists(CONFIG_FILE):
+            # 未检测到config.json文件
+            print_and_flush(f"❌ 未检测到 config.json 配置文件")
+            print_and_flush("📝 请使用 account_config.py 生成配置文件")
+            print_and_flush("运行命令: python account_config.py")
+        else:
+            print_and_flush(f"❌ 配置文件有误: {e}")
         sys.exit(1)
 
 config = load_config()
-ACCOUNTS = config["accounts"]
-TOKEN_FILES = [f"user_token_{i+1}.json" for i in range(len(ACCOUNTS))]  # 为每个账号创建独立的token文件
-GIFT_ITEMS = config["gift_items"]
-DEFAULT_GOODSID = config["default_goodsid"]
-AUTO_MODE = config["auto_mode"]
-INPUT_TIMEOUT = config["input_timeout"]
+configure_rate_limiter(config.rate_limit)  # 全局/账号/接口三级限流，缺省值见 rate_limiter.DEFAULT_RATE_LIMIT
+configure_response_cache(config.response_cache)  # 只读接口缓存，缺省有效期见 response_cache.DEFAULT_CACHE_TTL
+ACCOUNTS = config.raw["accounts"]
+TOKEN_FILES = [f"user_token_{i+1}.json" for i in range(len(ACCOUNTS))]  # 旧版各账号的token文件，首次运行时导入 token_store.json
+GIFT_ITEMS = config.gift_items
+DEFAULT_GOODSID = config.default_goodsid
+AUTO_MODE = config.auto_mode
+INPUT_TIMEOUT = config.input_timeout
+MAX_CONCURRENT_ACCOUNTS = config.max_concurrent_accounts  # 同时执行的账号数，1 表示逐个执行
+MAX_PARALLEL_PHASES = config.max_parallel_phases  # 单个账号内同时执行的任务阶段数，1 表示按原顺序逐个执行
+COORDINATED_LAND = config.coordinated_land_occupy and len(ACCOUNTS) > 1  # 多账号协同占领：所有账号完成后统一扫描并分配领地
 # ===========================
 
 print_and_flush(" 程序初始化中...")  # 添加初始化提示
@@ -79,8 +125,8 @@ print_and_flush(" 程序初始化中...")  # 添加初始化提示
 # 其余代码保持不变...
 try:
     print_and_flush(" 正在加载模块...")
-    from login import login
-    from landResources import get_re_list, get_occupy_resource_list, get_all_land_resources
+    from token_store import ensure_session_token  # 统一的token存储：优先复用已保存的有效token
+    from landResources import get_re_list, get_occupy_resource_list, get_all_land_resources, auto_occupy_resources_gradually, coordinated_occupy_resources
     from generalCard import get_pub_general_list, recruit_general, format_general_info
     from summonCard import get_general_list, train_general
     from market import get_market_info
@@ -89,7 +135,7 @@ try:
     from home_copper import collect_home_copper
     from customs_battle import customs_battle
     from daily_tasks import display_daily_tasks, claim_all_available_rewards
-    from email_manager import display_emails, process_all_customs_emails, get_all_attachments, delete_claimed_and_expired_emails  
+    from email_manager import process_inbox
     from friend import auto_accept_friend_requests
     from pack import get_pack_info, auto_use_battle_card
 except ImportError as e:
@@ -99,45 +145,6 @@ except ImportError as e:
     exit(1)
 
 
-def ensure_session_token(session: requests.Session, tel: str, pwd: str, token_file: str):
-    """
-    确保 session 中有有效的 token，并返回 user_id
-    """
-    print_and_flush(" 正在登录...")
-    try:
-        login_result = login(tel, pwd)
-        if login_result:
-            new_token = None
-            new_user_id = None
-
-            if isinstance(login_result, dict):
-                new_token = login_result.get("token") or (login_result.get("data") or {}).get("token")
-                new_user_id = login_result.get("user_id") or (login_result.get("data") or {}).get("user_id")
-            elif isinstance(login_result, (list, tuple)) and len(login_result) > 0:
-                new_token = login_result[0]
-                if len(login_result) > 1:
-                    new_user_id = login_result[1]
-            elif isinstance(login_result, str):
-                new_token = login_result
-
-            if not isinstance(new_user_id, (str, int)) or not str(new_user_id).strip():
-                print_and_flush(" 登录成功但未返回有效 user_id")
-                new_user_id = None
-
-            if new_token:
-                print_and_flush(f" 登录成功！")
-                return session, new_token, new_user_id
-            else:
-                print_and_flush(" 登录未返回有效 token")
-        else:
-            print_and_flush(" 登录失败")
-    except Exception as e:
-        print_and_flush(f" 登录过程出错: {e}")
-        traceback_print_and_flush_exc()
-
-    print_and_flush(" 无法获取 token，程序终止。")
-    return session, None, None
-
 def perform_training_cycle(session: requests.Session, token: str, pub_list):
     """
     执行一轮完整的招募->训练->提魂流程
@@ -222,19 +229,11 @@ def perform_training_cycle(session: requests.Session, token: str, pub_list):
     return mugId
 
 
-def check_response_success(response):
-    """
-    检查API响应是否成功
-    """
-    if isinstance(response, dict):
-        # 检查是否包含成功标识
-        code_success = response.get("code") == 200
-        status_success = response.get("status") == "success"
-        msg_success = response.get("msg") in ["成功", "通过", "ok", "OK"]  # 添加"通过"作为成功标识
-        success_field = response.get("success") is True
-        
-        return code_success or status_success or msg_success or success_field
-    return False
+# 协同占领模式下各账号召回完成后登记在这里，所有账号结束后统一分配领地
+_land_accounts = []
+_land_accounts_lock = threading.Lock()
+
+
 def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
     """
     为单个账号运行所有任务
@@ -250,232 +249,252 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
         print_and_flush(f" Token 已加载（前12位）：{str(token)[:12]}...")
         print_and_flush("-" * 50)
         
-        # 获取背包信息并使用闯关卡（放在闯关之前）
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush(" 背包信息及闯关卡使用")
-        print_and_flush("=" * 50)
-        try:
-            # 先获取背包信息
-            pack_data = get_pack_info(session, token)
-            # 如果获取成功，则尝试使用一个闯关卡
-            # if pack_data and pack_data.get("packGoodsVos"):
-            #     auto_use_battle_card(session, token, pack_data["packGoodsVos"])
-        except Exception as e:
-            print_and_flush(f" 背包信息获取或闯关卡使用失败: {e}")
-            traceback_print_and_flush_exc()
+        # 各阶段声明依赖关系，互不依赖的阶段在同一账号内并行执行
+        account_config = get_config().account(account_index)
+        graph = TaskGraph()
 
-        # 闯关任务
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush(" 开始闯关任务...")
-        print_and_flush("=" * 50)
-        try:
-            # 获取当前账号的配置
-            account_config = ACCOUNTS[account_index].get("config", {})
-            battle_settings = account_config.get("customs_battle_settings", {"difficulty": 3, "level": 8, "times": 10})
-            
-            # 获取当前账号的难度、关卡和次数设置
-            diff = battle_settings.get("difficulty", 3)
-            level = battle_settings.get("level", 8)
-            config_times = battle_settings.get("times", 10)
-            
-            # 检查背包是否有闯关卡 - 基于 goodsId == 133 精准识别
-            pack_data = get_pack_info(session, token)
-            battle_cards_count = 0
-            battle_card_items = []  # 保存所有闯关卡物品，包含 mpgId 信息
-
-            if pack_data and pack_data.get("packGoodsVos"):
-                for item in pack_data["packGoodsVos"]:
-                    # 精准识别：goodsId == 133 的为闯关卡
-                    if item.get("goodsId") == 133 and item.get("name") == "闯关卡":
-                        item_count = item.get("num", 0)
-                        battle_cards_count += item_count  # 累加所有数量
-                        battle_card_items.append(item)   # 保留完整物品信息，包含 mpgId
-                        print_and_flush(f"🔍 发现闯关卡: mpgId={item.get('mpgId')}, 数量={item_count}")
-
-            print_and_flush(f"📊 总共识别到闯关卡: {battle_cards_count}张 (ID=133)")
-
-            # 系统每天有6次基础机会
-            base_daily_opportunities = 6
-            
-            # 每张闯关卡提供4次机会
-            opportunities_per_card = 4
-            
-            # 计算总共需要的次数
-            total_needed = config_times
-            
-            # 计算还需要多少次机会
-            remaining_needed = max(0, total_needed - base_daily_opportunities)
-            
-            # 计算需要使用多少张闯关卡（不能超过拥有的数量）
-            cards_to_use = min(battle_cards_count, (remaining_needed + opportunities_per_card - 1) // opportunities_per_card if remaining_needed > 0 else 0)
-            
-            # 计算实际可用次数
-            total_available_times = base_daily_opportunities + (cards_to_use * opportunities_per_card)
-            
-            # 实际挑战次数 = min(配置次数, 实际可用次数)
-            actual_times = min(config_times, total_available_times)
-            
-            print_and_flush(f"📊 系统每日基础机会: {base_daily_opportunities}次")
-            print_and_flush(f"   配置要求: {config_times}次")
-            print_and_flush(f"   拥有闯关卡: {battle_cards_count}张 (ID: 133)")
-            print_and_flush(f"   需要补充: {max(0, config_times - base_daily_opportunities)}次")
-            print_and_flush(f"   可使用: {cards_to_use}张 (每张提供{opportunities_per_card}次机会)")
-            print_and_flush(f"   实际可用: {total_available_times}次 (基础{base_daily_opportunities}次 + 卡片{cards_to_use * opportunities_per_card}次)")
-            print_and_flush(f"   实际执行: {actual_times}次")
-            
-            # 实际使用闯关卡（如果需要）
-            if cards_to_use > 0 and battle_card_items:
-                print_and_flush(f"🎮 正在使用 {cards_to_use} 张闯关卡...")
-                
-                headers = {"Token": token}
-                
-                                # 使用闯关卡，优先使用第一个找到的物品
-                first_item = battle_card_items[0] if battle_card_items else None
-                if first_item:
-                    # 根据API响应，正确的字段是 mpgId，而不是 id
-                    mpgId = first_item.get("mpgId")
-                    if mpgId:
-                        print_and_flush(f"✅ 使用物品ID: {mpgId}")
-                        data = {"mpgId": mpgId, "goodsId": 133, "num": cards_to_use}
+        def pack_phase():
+            # 获取背包信息并使用闯关卡（放在闯关之前）
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush(" 背包信息及闯关卡使用")
+            print_and_flush("=" * 50)
+            try:
+                # 先获取背包信息，结果供闯关任务复用
+                pack_data = get_pack_info(session, token)
+                # 如果获取成功，则尝试使用一个闯关卡
+                # if pack_data and pack_data.get("packGoodsVos"):
+                #     auto_use_battle_card(session, token, pack_data["packGoodsVos"])
+                return pack_data
+            except Exception as e:
+                print_and_flush(f" 背包信息获取或闯关卡使用失败: {e}")
+                traceback_print_and_flush_exc()
+
+        def customs_phase():
+            # 闯关任务
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush(" 开始闯关任务...")
+            print_and_flush("=" * 50)
+            try:
+                battle_settings = account_config.customs_battle_settings
+
+                # 获取当前账号的难度、关卡和次数设置
+                diff = battle_settings.get("difficulty", 3)
+                level = battle_settings.get("level", 8)
+                config_times = battle_settings.get("times", 10)
+
+                # 检查背包是否有闯关卡 - 基于 goodsId == 133 精准识别（背包任务失败时再取一次）
+                pack_data = graph.result("背包") or get_pack_info(session, token)
+                battle_cards_count = 0
+                battle_card_items = []  # 保存所有闯关卡物品，包含 mpgId 信息
+
+                if pack_data and pack_data.get("packGoodsVos"):
+                    for item in pack_data["packGoodsVos"]:
+                        # 精准识别：goodsId == 133 的为闯关卡
+                        if item.get("goodsId") == 133 and item.get("name") == "闯关卡":
+                            item_count = item.get("num", 0)
+                            battle_cards_count += item_count  # 累加所有数量
+                            battle_card_items.append(item)   # 保留完整物品信息，包含 mpgId
+                            print_and_flush(f"🔍 发现闯关卡: mpgId={item.get('mpgId')}, 数量={item_count}")
+
+                print_and_flush(f"📊 总共识别到闯关卡: {battle_cards_count}张 (ID=133)")
+
+                # 系统每天有6次基础机会
+                base_daily_opportunities = 6
+
+                # 每张闯关卡提供4次机会
+                opportunities_per_card = 4
+
+                # 计算总共需要的次数
+                total_needed = config_times
+
+                # 计算还需要多少次机会
+                remaining_needed = max(0, total_needed - base_daily_opportunities)
+
+                # 计算需要使用多少张闯关卡（不能超过拥有的数量）
+                cards_to_use = min(battle_cards_count, (remaining_needed + opportunities_per_card - 1) // opportunities_per_card if remaining_needed > 0 else 0)
+
+                # 计算实际可用次数
+                total_available_times = base_daily_opportunities + (cards_to_use * opportunities_per_card)
+
+                # 实际挑战次数 = min(配置次数, 实际可用次数)
+                actual_times = min(config_times, total_available_times)
+
+                print_and_flush(f"📊 系统每日基础机会: {base_daily_opportunities}次")
+                print_and_flush(f"   配置要求: {config_times}次")
+                print_and_flush(f"   拥有闯关卡: {battle_cards_count}张 (ID: 133)")
+                print_and_flush(f"   需要补充: {max(0, config_times - base_daily_opportunities)}次")
+                print_and_flush(f"   可使用: {cards_to_use}张 (每张提供{opportunities_per_card}次机会)")
+                print_and_flush(f"   实际可用: {total_available_times}次 (基础{base_daily_opportunities}次 + 卡片{cards_to_use * opportunities_per_card}次)")
+                print_and_flush(f"   实际执行: {actual_times}次")
+
+                # 实际使用闯关卡（如果需要）
+                if cards_to_use > 0 and battle_card_items:
+                    print_and_flush(f"🎮 正在使用 {cards_to_use} 张闯关卡...")
+
+                    client = get_client(session, token)
+
+                                    # 使用闯关卡，优先使用第一个找到的物品
+                    first_item = battle_card_items[0] if battle_card_items else None
+                    if first_item:
+                        # 根据API响应，正确的字段是 mpgId，而不是 id
+                        mpgId = first_item.get("mpgId")
+                        if mpgId:
+                            print_and_flush(f"✅ 使用物品ID: {mpgId}")
+                            data = {"mpgId": mpgId, "goodsId": 133, "num": cards_to_use}
+                        else:
+                            print_and_flush("⚠️ 无法获取物品mpgId，使用备用方式")
+                            data = {"goodsId": 133, "num": cards_to_use}
                     else:
-                        print_and_flush("⚠️ 无法获取物品mpgId，使用备用方式")
+                        print_and_flush("⚠️ 未找到有效的闯关卡物品")
                         data = {"goodsId": 133, "num": cards_to_use}
+
+                    try:
+                        result = client.request("mid-user-pack/splitGoods", data).json()
+
+                        # print_and_flush(f"📊 API响应内容: {result}")  # 隐藏详细响应内容输出
+
+                        if client.is_success(result):
+                            print_and_flush(f"✅ 成功使用 {cards_to_use} 张闯关卡")
+                        else:
+                            print_and_flush(f"❌ 使用闯关卡失败: {result.get('msg', '未知错误')}")
+                    except Exception as e:
+                        print_and_flush(f"❌ 使用闯关卡时出现异常: {e}")
+                        traceback_print_and_flush_exc()
+                elif not battle_card_items:
+                    print_and_flush("❌ 未找到背包中的闯关卡")
                 else:
-                    print_and_flush("⚠️ 未找到有效的闯关卡物品")
-                    data = {"goodsId": 133, "num": cards_to_use}
+                    print_and_flush("✅ 不需要使用闯关卡")
 
-                try:
-                    response = requests.post(
-                        "https://q-jiang.myprint.top/api/mid-user-pack/splitGoods",  # 修正API端点
-                        json=data,
-                        headers=headers,
-                        timeout=10
-                    )
-                    result = response.json()
-                    
-                    # print_and_flush(f"📊 API响应内容: {result}")  # 隐藏详细响应内容输出
-                    
-                    if check_response_success(result):
-                        print_and_flush(f"✅ 成功使用 {cards_to_use} 张闯关卡")
-                    else:
-                        print_and_flush(f"❌ 使用闯关卡失败: {result.get('msg', '未知错误')}")
-                except Exception as e:
-                    print_and_flush(f"❌ 使用闯关卡时出现异常: {e}")
-                    traceback_print_and_flush_exc()
-            elif not battle_card_items:
-                print_and_flush("❌ 未找到背包中的闯关卡")
-            else:
-                print_and_flush("✅ 不需要使用闯关卡")
-            
-            # 传递具体的难度和关卡参数
-            customs_battle(session, token, user_id, total_times=actual_times, diff=diff, level=level)
-        except Exception as e:
-            print_and_flush(f" 关卡战斗出错: {e}")
-            traceback_print_and_flush_exc()
-        
-        # 领取任务奖励
-        try:
+                # 传递具体的难度和关卡参数
+                customs_battle(session, token, user_id, total_times=actual_times, diff=diff, level=level)
+            except Exception as e:
+                print_and_flush(f" 关卡战斗出错: {e}")
+                traceback_print_and_flush_exc()
+
+        def market_phase():
+            print_and_flush("🔍 市场")
+            try:
+                get_market_info(session, token)
+            except Exception as e:
+                print_and_flush(f" {e}")
+                traceback_print_and_flush_exc()
+
+        def land_phase():
+            # 修改：使用新的函数获取所有领地资源并自动召回
+            try:
+                get_all_land_resources(session, token)
+                if COORDINATED_LAND:
+                    with _land_accounts_lock:
+                        _land_accounts.append((account_index, session, token, account_config))
+                    print_and_flush(" 协同占领模式：所有账号完成后统一分配领地")
+                else:
+                    # 传递当前账号的配置
+                    auto_occupy_resources_gradually(session, token, account_index, settings=account_config)
+            except Exception as e:
+                print_and_flush(f" 获取领地资源失败: {e}")
+                traceback_print_and_flush_exc()
+
+        def month_sign_phase():
+            print_and_flush("=" * 50)
+            print_and_flush(" 每月签到")
+            print_and_flush("=" * 50)
+            try:
+                auto_daily_check_in(session, token)
+            except Exception as e:
+                print_and_flush(f" 签到失败: {e}")
+                traceback_print_and_flush_exc()
+
+        def week_sign_phase():
+            # 添加周签到功能
             print_and_flush("\n" + "=" * 50)
-            print_and_flush(" 领取日常任务奖励")
+            print_and_flush(" 每周签到")
             print_and_flush("=" * 50)
-            claim_all_available_rewards(session, token)
-        except Exception as e:
-            print_and_flush(f" 领取任务奖励失败: {e}")
-            traceback_print_and_flush_exc()
+            try:
+                auto_continuous_check_in(session, token)
+            except Exception as e:
+                print_and_flush(f" 周签到失败: {e}")
+                traceback_print_and_flush_exc()
 
-        # 其余代码保持不变...
-        print_and_flush("🔍 市场")
-        try:
-            get_market_info(session, token)
-        except Exception as e:
-            print_and_flush(f" {e}")
-            traceback_print_and_flush_exc()
-        time.sleep(1)
+        def friends_phase():
+            # 添加自动同意好友申请功能
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush("🤝 自动同意好友申请")
+            print_and_flush("=" * 50)
+            try:
+                auto_accept_friend_requests(session, token)
+            except Exception as e:
+                print_and_flush(f" 处理好友申请出错: {e}")
+                traceback_print_and_flush_exc()
 
-        # 修改：使用新的函数获取所有领地资源并自动召回
-        try:
-            get_all_land_resources(session, token)
-            # 传递账号索引以使用当前账号的配置
-            auto_occupy_resources_gradually(session, token, account_index)
-        except Exception as e:
-            print_and_flush(f" 获取领地资源失败: {e}")
-            traceback_print_and_flush_exc()
+        def gifts_phase():
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush("📨 好友资源互赠")
+            print_and_flush("=" * 50)
+            # 自动选择默认资源进行互赠
+            # 使用当前账号的配置而不是全局配置
+            goodsid = account_config.default_goodsid  # 如果账号配置中没有，则使用全局默认值
+            print_and_flush(f" 自动选择资源: {GIFT_ITEMS.get(str(goodsid), '未知资源')}")
 
-        print_and_flush("=" * 50)
-        print_and_flush(" 每月签到")
-        print_and_flush("=" * 50)
-        try:
-            auto_daily_check_in(session, token)
-        except Exception as e:
-            print_and_flush(f" 签到失败: {e}")
-            traceback_print_and_flush_exc()
-        time.sleep(1.5)
-        
-        # 添加周签到功能
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush(" 每周签到")
-        print_and_flush("=" * 50)
-        try:
-            auto_continuous_check_in(session, token)
-        except Exception as e:
-            print_and_flush(f" 周签到失败: {e}")
-            traceback_print_and_flush_exc()
-        time.sleep(1.5)
+            if str(goodsid) in GIFT_ITEMS:
+                try:
+                    ask_gifts_to_all_friends(session, token, goodsid)
+                    handle_received_ask_requests(session, token)
+                    receive_gifts_from_friends(session, token)
+                except Exception as e:
+                    print_and_flush(f" 好友互赠流程出错: {e}")
+                    traceback_print_and_flush_exc()
 
-        # 添加自动同意好友申请功能
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush("🤝 自动同意好友申请")
-        print_and_flush("=" * 50)
-        try:
-            auto_accept_friend_requests(session, token)
-        except Exception as e:
-            print_and_flush(f" 处理好友申请出错: {e}")
-            traceback_print_and_flush_exc()
-        time.sleep(1.5)
-
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush("📨 好友资源互赠")
-        print_and_flush("=" * 50)
-        # 自动选择默认资源进行互赠
-        # 使用当前账号的配置而不是全局配置
-        account_config = ACCOUNTS[account_index].get("config", {})
-        goodsid = account_config.get("default_goodsid", DEFAULT_GOODSID)  # 如果账号配置中没有，则使用全局默认值
-        print_and_flush(f" 自动选择资源: {GIFT_ITEMS.get(str(goodsid), '未知资源')}")
-        
-        if str(goodsid) in GIFT_ITEMS:
+        def home_copper_phase():
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush("🏠 领取守家铜币")
+            print_and_flush("=" * 50)
+            if isinstance(user_id, (int, str)) and str(user_id).strip():
+                try:
+                    collect_home_copper(session, token, user_id)
+                except Exception as e:
+                    print_and_flush(f" 领取守家铜币失败: {e}")
+                    traceback_print_and_flush_exc()
+            else:
+                print_and_flush(f" 跳过领取守家铜币：user_id 无效 ({user_id})")
+
+        def rewards_phase():
+            # 领取任务奖励
             try:
-                ask_gifts_to_all_friends(session, token, goodsid)
-                handle_received_ask_requests(session, token)
-                receive_gifts_from_friends(session, token)
+                print_and_flush("\n" + "=" * 50)
+                print_and_flush(" 领取日常任务奖励")
+                print_and_flush("=" * 50)
+                claim_all_available_rewards(session, token)
             except Exception as e:
-                print_and_flush(f" 好友互赠流程出错: {e}")
+                print_and_flush(f" 领取任务奖励失败: {e}")
                 traceback_print_and_flush_exc()
 
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush("🏠 领取守家铜币")
-        print_and_flush("=" * 50)
-        if isinstance(user_id, (int, str)) and str(user_id).strip():
+        def email_phase():
+            # 新增：邮件处理
+            print_and_flush("\n" + "=" * 50)
+            print_and_flush(" 邮件处理")
+            print_and_flush("=" * 50)
             try:
-                collect_home_copper(session, token, user_id)
+                # 展示、领取、删除共用一次邮件列表
+                process_inbox(session, token)
             except Exception as e:
-                print_and_flush(f" 领取守家铜币失败: {e}")
+                print_and_flush(f" 处理邮件失败: {e}")
                 traceback_print_and_flush_exc()
-        else:
-            print_and_flush(f" 跳过领取守家铜币：user_id 无效 ({user_id})")
 
-        # 新增：邮件处理
-        print_and_flush("\n" + "=" * 50)
-        print_and_flush(" 邮件处理")
-        print_and_flush("=" * 50)
-        try:
-            display_emails(session, token)
-            print_and_flush("\n📎 正在领取普通邮件附件...")
-            get_all_attachments(session, token)
-            delete_claimed_and_expired_emails(session, token)
-        except Exception as e:
-            print_and_flush(f" 处理邮件失败: {e}")
-            traceback_print_and_flush_exc()
-        time.sleep(1)
+        graph.add("背包", pack_phase)
+        graph.add("闯关", customs_phase, deps=["背包"])
+        graph.add("市场", market_phase)
+        graph.add("领地", land_phase)
+        graph.add("月签到", month_sign_phase)
+        graph.add("周签到", week_sign_phase)
+        graph.add("好友申请", friends_phase)
+        # 先同意好友申请，新好友也能参与互赠
+        graph.add("好友互赠", gifts_phase, deps=["好友申请"])
+        graph.add("守家铜币", home_copper_phase)
+        # 日常任务奖励要等会推进任务进度的阶段全部完成后再领取
+        graph.add("任务奖励", rewards_phase, deps=["闯关", "市场", "领地", "月签到", "周签到", "好友互赠", "守家铜币"])
+        # 邮件最后处理，任务奖励等发到邮箱的附件可以一并领取
+        graph.add("邮件", email_phase, deps=["任务奖励"])
+        graph.run(MAX_PARALLEL_PHASES)
 
         print_and_flush(f"\n 账号 {account_index + 1} 所有任务完成")
         
@@ -484,6 +503,67 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
     except Exception as e:
         print_and_flush(f"\n 账号 {account_index + 1} 程序运行过程中出现未处理的异常: {e}")
         traceback_print_and_flush_exc()
+
+
+def _run_tagged_account(account_index: int, account: dict):
+    """
+    在工作线程中运行单个账号，输出统一加上账号前缀
+    """
+    tag_token = _account_tag.set(f"账号{account_index + 1}")
+    started = time.time()
+    try:
+        token_file = TOKEN_FILES[account_index] if account_index < len(TOKEN_FILES) else f"user_token_{account_index+1}.json"
+        run_account_tasks(account_index, account["tel"], account["pwd"], token_file)
+        print_and_flush(f"⏱️ 耗时 {time.time() - started:.1f} 秒")
+    finally:
+        _account_tag.reset(tag_token)
+
+def _run_tagged(account_index: int, func):
+    """在当前线程中以账号前缀执行 func"""
+    tag_token = _account_tag.set(f"账号{account_index + 1}")
+    try:
+        return func()
+    finally:
+        _account_tag.reset(tag_token)
+
+def claim_rewards_after_land(land_accounts, wrap):
+    """
+    协同占领在所有账号的任务奖励阶段之后才进行，占领推进的任务进度在这里补领
+    （此时邮件阶段已经结束，奖励附件留到下次运行领取）
+    """
+    for account_index, session, token, _ in sorted(land_accounts, key=lambda item: item[0]):
+        def claim():
+            try:
+                print_and_flush(" 协同占领后补领日常任务奖励")
+                claim_all_available_rewards(session, token)
+            except Exception as e:
+                print_and_flush(f" 领取任务奖励失败: {e}")
+                traceback_print_and_flush_exc()
+        wrap(account_index, claim)
+
+def run_accounts_concurrently(max_workers: int):
+    """
+    使用有上限的线程池并发执行所有账号
+    每个账号在 run_account_tasks 中创建自己的 requests.Session，互不共享连接
+    """
+    install_tagged_streams()
+
+    workers = min(max_workers, len(ACCOUNTS))
+    print_and_flush(f"🚀 并发模式：最多同时执行 {workers} 个账号")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account") as executor:
+        futures = {
+            executor.submit(_run_tagged_account, i, account): i
+            for i, account in enumerate(ACCOUNTS)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print_and_flush(f" 账号 {i+1} 执行出错: {e}")
+                traceback_print_and_flush_exc()
+
 def main():
     print_and_flush(" 开始执行多账号每日任务...")
     print_and_flush(f" {time.strftime('%Y年%m月%d日 %H:%M:%S')}")
@@ -495,28 +575,92 @@ def main():
         print_and_flush(" 没有配置任何账号，程序退出")
         return
 
-    # 为每个账号运行任务
-    for i, account in enumerate(ACCOUNTS):
-        tel = account["tel"]
-        pwd = account["pwd"]
-        token_file = TOKEN_FILES[i] if i < len(TOKEN_FILES) else f"user_token_{i+1}.json"
-        
+    if MAX_PARALLEL_PHASES > 1:
+        install_tagged_streams()
+
+    if MAX_CONCURRENT_ACCOUNTS > 1 and len(ACCOUNTS) > 1:
+        run_accounts_concurrently(MAX_CONCURRENT_ACCOUNTS)
+    else:
+        # 为每个账号运行任务
+        for i, account in enumerate(ACCOUNTS):
+            tel = account["tel"]
+            pwd = account["pwd"]
+            token_file = TOKEN_FILES[i] if i < len(TOKEN_FILES) else f"user_token_{i+1}.json"
+            
+            try:
+                run_account_tasks(i, tel, pwd, token_file)
+            except Exception as e:
+                print_and_flush(f" 账号 {i+1} 执行出错: {e}")
+                traceback_print_and_flush_exc()
+            
+            # 账号间间隔时间
+            if i < len(ACCOUNTS) - 1:  # 不是最后一个账号
+                print_and_flush(f"\n⏳ 等待 5 秒后执行下一个账号...")
+                time.sleep(5)
+
+    if COORDINATED_LAND and _land_accounts:
+        print_and_flush(f"\n{'='*60}")
+        install_tagged_streams()  # 分配到各账号的占领输出按账号加前缀
         try:
-            run_account_tasks(i, tel, pwd, token_file)
+            coordinated_occupy_resources(sorted(_land_accounts, key=lambda item: item[0]), wrap=_run_tagged)
         except Exception as e:
-            print_and_flush(f" 账号 {i+1} 执行出错: {e}")
+            print_and_flush(f" 协同占领失败: {e}")
             traceback_print_and_flush_exc()
-        
-        # 账号间间隔时间
-        if i < len(ACCOUNTS) - 1:  # 不是最后一个账号
-            print_and_flush(f"\n⏳ 等待 5 秒后执行下一个账号...")
-            time.sleep(5)
+        claim_rewards_after_land(_land_accounts, _run_tagged)
 
     print_and_flush(f"\n{'='*60}")
     print_and_flush("🎉 所有账号任务执行完毕")
+    print_and_flush(f"📈 请求统计: {get_rate_limiter().format_stats()}")
+    print_and_flush(f"🗃️ 缓存统计: {cache_stats_text()}")
     print_and_flush(f"{'='*60}")
 
+def run_daemon():
+    """
+    守护模式：登录所有账号后常驻运行，只在领地满8小时、武将到家、训练结束、市场满仓时执行对应动作
+    每日任务（签到、邮件、好友等）仍由定时运行 main.py 完成
+    """
+    from scheduler import Scheduler, AccountContext, DEFAULT_HANDLERS
+
+    install_tagged_streams()
+    print_and_flush(" 守护模式启动...")
+    print_and_flush(f" {time.strftime('%Y年%m月%d日 %H:%M:%S')}")
+
+    contexts = {}
+    for i, account in enumerate(ACCOUNTS):
+        tag_token = _account_tag.set(f"账号{i + 1}")
+        try:
+            token_file = TOKEN_FILES[i] if i < len(TOKEN_FILES) else f"user_token_{i+1}.json"
+            session, token, user_id = ensure_session_token(requests.Session(), account["tel"], account["pwd"], token_file)
+            if token:
+                contexts[i] = AccountContext(i, session, token, user_id)
+            else:
+                print_and_flush(" 无法获取有效token，守护模式跳过此账号")
+        finally:
+            _account_tag.reset(tag_token)
+
+    if not contexts:
+        print_and_flush(" 没有可用的账号，守护模式退出")
+        return
+
+    scheduler = Scheduler(contexts, max_workers=MAX_CONCURRENT_ACCOUNTS, wrap=_run_tagged)
+    now = time.time()
+    for index in contexts:
+        # 启动时每类事件先执行一次，之后按游戏返回的时间安排
+        for kind in DEFAULT_HANDLERS:
+            scheduler.schedule(index, kind, now)
+
+    print_and_flush(f"👥 {len(contexts)} 个账号进入守护模式，按 Ctrl+C 退出")
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.stop()
+        print_and_flush("\n 守护模式已退出")
+        print_and_flush(f"📈 请求统计: {get_rate_limiter().format_stats()}")
+
 if __name__ == "__main__":
     # 设置环境变量表示在Web环境中运行
     os.environ['RUN_IN_WEB'] = 'true'
-    main()
\ No newline at end of file
+    if "--daemon" in sys.argv:
+        run_daemon()
+    else:
+        main()
\ No newline at end of file
@@ -1,9 +1,14 @@
 # market.py
 import requests
+from api_client import get_client
 import sys
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
     sys.stdout.flush()
+# 兑换银票：保留的铜钱数量，每张银票消耗的铜钱（另消耗1粮食）
+SILVER_TICKET_COPPER_RESERVE = 1000000
+SILVER_TICKET_COPPER_COST = 100
+
 # 中文字段映射（已移除 userId）
 MARKET_FIELDS = {
     "rank": "市场等级",
@@ -19,22 +24,13 @@ def get_user_info(session, token):
     """
     获取用户个人信息
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/userInfo"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取用户个人信息...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("bas-assets/userInfo", {})
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result["data"]
             user_info = data.get("userInfo", {})
             
@@ -79,15 +75,14 @@ def auto_change_silver_ticket(session, token):
     army_provisions = user_info.get("armyProvisions", 0)
     
     # 计算可兑换的铜钱数量（保留100万）
-    reserve_copper = 1000000
-    available_copper = max(0, copper - reserve_copper)
+    available_copper = max(0, copper - SILVER_TICKET_COPPER_RESERVE)
     
-    if available_copper < 100:
+    if available_copper < SILVER_TICKET_COPPER_COST:
         print_and_flush("保留一百万铜钱后ℹ️  可用铜钱不足100，无法兑换银票")
         return False
     
     # 计算可兑换的银票数量（受铜钱和粮食限制）
-    max_by_copper = available_copper // 100
+    max_by_copper = available_copper // SILVER_TICKET_COPPER_COST
     max_by_provisions = army_provisions
     num_to_exchange = min(max_by_copper, max_by_provisions)
     
@@ -102,22 +97,13 @@ def get_market_info(session, token):
     """
     获取市场信息，判断是否可征收，并计算距离满还剩多少时间
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/marketInfo"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取市场信息...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("bas-assets/marketInfo", {})
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result["data"]
             user_market = data.get("userMarket", {})
 
@@ -180,22 +166,13 @@ def levy_copper(session, token):
     """
     发送征收请求
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/levy"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     data = {"u": 1, "i": 1}  # 根据实际需求调整数据
 
     try:
         print_and_flush("🚀 正在发送征收请求...")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
+        result = client.post("bas-assets/levy", data)
+        if client.is_success(result):
             print_and_flush("征收请求发送成功！")
             return True
         else:
@@ -215,23 +192,14 @@ def change_silver_ticket(session, token, num=15):
     :param token: 用户token
     :param num: 兑换银票数量，默认15张
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/changeSilverTicket"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     data = {"num": num}  # 使用num参数，表示兑换银票的数量
 
     try:
         print_and_flush(f"🔄 正在兑换银票... (兑换数量: {num}张)")
         print_and_flush(f"📌 将消耗 {num * 100} 铜钱和 {num} 粮食")
-        response = session.post(url, headers=headers, json=data)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success") and result.get("code") == "200":
+        result = client.post("bas-assets/changeSilverTicket", data)
+        if client.is_success(result):
             print_and_flush("✅ 银票兑换成功！")
             return True
         else:
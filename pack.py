@@ -1,5 +1,6 @@
 # pack.py
 import requests
+from api_client import get_client
 import sys
 
 def print_and_flush(*args, **kwargs):
@@ -10,24 +11,16 @@ def compose_general_card_fragments(session, token, mpg_id):
     """
     合成将卡碎片
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pack/composeGoods"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     
     payload = {
         "mpgId": mpg_id
     }
     
     try:
-        response = session.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("mid-user-pack/composeGoods", payload)
         
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             return True, result.get("msg", "合成成功")
         else:
             return False, result.get("msg", "合成失败")
@@ -38,13 +31,7 @@ def use_item(session, token, mpg_id, goods_id, num):
     """
     使用物品接口
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pack/splitGoods"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
     
     payload = {
         "mpgId": mpg_id,
@@ -53,11 +40,9 @@ def use_item(session, token, mpg_id, goods_id, num):
     }
     
     try:
-        response = session.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("mid-user-pack/splitGoods", payload)
         
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             return True, result.get("msg", "使用成功")
         else:
             return False, result.get("msg", "使用失败")
@@ -156,22 +141,13 @@ def get_pack_info(session, token):
     """
     获取背包信息
     """
-    url = "https://q-jiang.myprint.top/api/mid-user-pack/pack"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
+    client = get_client(session, token)
 
     try:
         print_and_flush("🔍 正在获取背包信息...")
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-
-        result = response.json()
+        result = client.post("mid-user-pack/pack", {})
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             
             print_and_flush("✅ 背包信息获取成功！")
@@ -1,6 +1,7 @@
 # file:刷战功.py
 import requests
 import json
+from api_client import get_client
 import time
 
 def login(tel, pwd):
@@ -14,19 +15,14 @@ def login(tel, pwd):
     Returns:
         dict: 登录结果，包含token等信息
     """
-    url = "https://q-jiang.myprint.top/api/user/login"
-    headers = {
-        'Content-Type': 'application/json'
-    }
+    client = get_client(None, None)
     payload = {
         "tel": tel,  # 替换为实际电话号码
         "pwd": pwd       # 替换为实际密码
     }
     
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        return response.json()
+        return client.post("user/login", payload)
     except requests.exceptions.RequestException as e:
         print(f"登录请求失败: {e}")
         return None
@@ -42,17 +38,8 @@ def fetch_other_player_info(user_id, token=None):
     Returns:
         dict: API响应结果
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/otherPlayerInfo"
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
-    }
+    client = get_client(None, token)
     
-    # 添加认证信息
-    if token:
-        headers['token'] = token  # 注意这里使用的是token而不是Authorization
-        # headers['Authorization'] = f'Bearer {token}'
-        
     payload = {
         "userId": user_id
     }
@@ -61,7 +48,7 @@ def fetch_other_player_info(user_id, token=None):
         # print(f"发送请求到: {url}")
         # print(f"请求参数: {payload}")
         
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
+        response = client.request("bas-assets/otherPlayerInfo", payload)
         # print(f"响应状态码: {response.status_code}")
         # print(f"响应内容长度: {len(response.text)} 字符")
         
@@ -97,19 +84,12 @@ def fetch_general_list(token=None):
     """
     获取武将列表
     """
-    url = "https://q-jiang.myprint.top/api/bas-generals/freeGeneralList"
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
-    }
-    
-    if token:
-        headers['token'] = token
+    client = get_client(None, token)
     
     try:
         # 使用 POST 方法而不是 GET 方法
-        response = requests.post(url, headers=headers, data=json.dumps({}))
-        print(f"获取武将列表: {url}")
+        response = client.request("bas-generals/freeGeneralList", {})
+        print(f"获取武将列表: {client.url('bas-generals/freeGeneralList')}")
         print(f"响应状态码: {response.status_code}")
         print(f"响应内容长度: {len(response.text)} 字符")
         
@@ -138,24 +118,15 @@ def occupy_city(mug_id, user_id, token=None):
     """
     攻打城市接口
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/occupyCityer"
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
-    }
+    client = get_client(None, token)
     
-    if token:
-        headers['token'] = token
-        
     payload = {
         "mugId": mug_id,
         "userId": user_id
     }
     
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("bas-assets/occupyCityer", payload)
         # 调试输出，确认战功值位置
         # print(f"完整响应: {json.dumps(result, ensure_ascii=False)[:200]}...")
         return result
@@ -166,23 +137,14 @@ def retreat_from_city(user_id, token=None):
     """
     从城市撤离接口
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/retreatOtherDefenCityer"
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
-    }
+    client = get_client(None, token)
     
-    if token:
-        headers['token'] = token
-        
     payload = {
         "userId": user_id
     }
     
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        return response.json()
+        return client.post("bas-assets/retreatOtherDefenCityer", payload)
     except requests.exceptions.RequestException as e:
         print(f"请求失败: {e}")
         return None
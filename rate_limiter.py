@@ -0,0 +1,335 @@
+# rate_limiter.py
+# 功能：令牌桶限流 + AIMD 自适应并发
+# 所有接口请求都经过这里：全局一个桶，每个账号一个桶，个别需要放慢的接口再单独加桶
+# 取代原先散落在各模块里的固定 time.sleep；同时按服务端的繁忙信号自动调整同时在途的请求数
+import asyncio
+import threading
+import time
+from collections import deque
+
+# 默认限流参数（每秒请求数 / 突发容量），可在 config.json 的 rate_limit 中覆盖
+DEFAULT_RATE_LIMIT = {
+    "global_rate": 20,     # 所有账号合计每秒请求数
+    "global_burst": 20,
+    "account_rate": 5,     # 单个账号每秒请求数
+    "account_burst": 5,
+    # 单个账号对特定接口的额外限制（好友互赠类接口服务端较敏感，保持原先约 1 次/秒的节奏）
+    "endpoints": {
+        "user/askGift": 0.8,
+        "user/giveGift": 1,
+        "user/receiveFriendGift": 1,
+        "user/agreeFriend": 1,
+    },
+    # AIMD 自适应并发：无拥塞时并发上限缓慢增加，出现繁忙信号时减半
+    "adaptive": {
+        "enabled": True,
+        "initial": 8,              # 初始并发上限
+        "min": 1,
+        "max": 64,
+        "decrease_factor": 0.5,    # 拥塞时并发上限乘以该系数
+        "latency_spike_factor": 3.0,  # 响应耗时超过平均值的倍数视为拥塞
+    },
+}
+
+# 服务端表示繁忙的提示语
+BUSY_MESSAGES = ("系统繁忙", "请稍后重试")
+
+
+class TokenBucket:
+    """
+    令牌桶
+    令牌按 rate 个/秒 恒速补充，最多攒 capacity 个；取不到令牌时预约下一个令牌并返回需要等待的秒数，
+    多个线程/协程按预约顺序依次放行
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        :param rate: 每秒补充的令牌数，<= 0 表示不限流
+        :param capacity: 桶容量（允许的突发请求数），默认等于 max(1, rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预约令牌
+        :return: 需要等待的秒数（0 表示立即可用）
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class AIMDConcurrencyLimiter:
+    """
+    AIMD（加性增、乘性减）自适应并发控制
+    - 每个成功请求让并发上限增加 1/上限（约每轮增加 1）
+    - 遇到繁忙提示、HTTP 429/5xx、网络异常或耗时突增时，上限乘以 decrease_factor；
+      同一轮内的多个拥塞信号只减一次，避免一次抖动把上限打到底
+    stats() 返回当前上限、在途数、实时速率等计数，便于调参
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=64, decrease_factor=0.5,
+                 latency_spike_factor=3.0, enabled=True):
+        self.enabled = enabled
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._latency_avg = None
+        self._last_decrease = 0.0
+        self._recent = deque()  # 最近请求完成时间，用于计算实时速率
+        self.counters = {
+            "requests": 0,
+            "success": 0,
+            "busy": 0,          # 系统繁忙/请稍后重试
+            "http_429": 0,
+            "http_5xx": 0,
+            "errors": 0,        # 网络异常/超时
+            "latency_spikes": 0,
+            "decreases": 0,
+        }
+
+    def _try_enter(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        """阻塞直到在途请求数低于当前并发上限"""
+        if not self.enabled:
+            return
+        with self._cond:
+            while not self._try_enter():
+                self._cond.wait()
+
+    async def acquire_async(self):
+        """协程版 acquire"""
+        if not self.enabled:
+            return
+        while True:
+            with self._cond:
+                if self._try_enter():
+                    return
+            await asyncio.sleep(0.05)
+
+    def release(self, latency: float, status_code: int = None, busy: bool = False, error: bool = False):
+        """
+        请求结束后登记结果并调整并发上限
+        :param latency: 请求耗时（秒）
+        :param status_code: HTTP 状态码，网络异常时为 None
+        :param busy: 响应内容是否为繁忙提示
+        :param error: 是否网络异常/超时
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            now = time.monotonic()
+            self.counters["requests"] += 1
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > 10:
+                self._recent.popleft()
+
+            congested = False
+            if error:
+                self.counters["errors"] += 1
+                congested = True
+            elif status_code == 429:
+                self.counters["http_429"] += 1
+                congested = True
+            elif status_code is not None and status_code >= 500:
+                self.counters["http_5xx"] += 1
+                congested = True
+            elif busy:
+                self.counters["busy"] += 1
+                congested = True
+
+            if not congested and self._latency_avg is not None and self.counters["requests"] > 10 \
+                    and latency > self._latency_avg * self.latency_spike_factor:
+                self.counters["latency_spikes"] += 1
+                congested = True
+
+            if not error:
+                # 耗时平均值只用正常完成的请求更新（指数滑动平均）
+                self._latency_avg = latency if self._latency_avg is None else self._latency_avg * 0.9 + latency * 0.1
+
+            if congested:
+                # 一个平均耗时窗口内只减一次
+                window = max(self._latency_avg or 0.0, 0.2)
+                if now - self._last_decrease >= window:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self.counters["decreases"] += 1
+            else:
+                self.counters["success"] += 1
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """当前并发上限、在途请求数、近10秒速率及各类计数"""
+        with self._cond:
+            now = time.monotonic()
+            recent = [t for t in self._recent if now - t <= 10]
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "rate_per_sec": round(len(recent) / 10, 2),
+                "latency_avg_ms": round((self._latency_avg or 0) * 1000),
+                **self.counters,
+            }
+
+    def format_stats(self) -> str:
+        st = self.stats()
+        return (f"并发上限 {st['limit']} | 在途 {st['in_flight']} | 近10秒 {st['rate_per_sec']} 次/秒 | "
+                f"平均耗时 {st['latency_avg_ms']}ms | 请求 {st['requests']} 成功 {st['success']} | "
+                f"繁忙 {st['busy']} 429 {st['http_429']} 5xx {st['http_5xx']} 异常 {st['errors']} "
+                f"耗时突增 {st['latency_spikes']} | 降速 {st['decreases']} 次")
+
+
+class RateLimiter:
+    """
+    全局 + 单账号 + 单账号单接口 三级限流
+    一次请求需要同时拿到所有相关桶的令牌，等待时间取其中最长的一个
+    """
+
+    def __init__(self, global_rate=20, global_burst=None, account_rate=5, account_burst=None, endpoints=None,
+                 adaptive=None):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        adaptive = adaptive or {}
+        # 全局共享的自适应并发控制（所有账号一起探测服务端能承受的速率）
+        self.concurrency = AIMDConcurrencyLimiter(
+            initial=adaptive.get("initial", 8),
+            min_limit=adaptive.get("min", 1),
+            max_limit=adaptive.get("max", 64),
+            decrease_factor=adaptive.get("decrease_factor", 0.5),
+            latency_spike_factor=adaptive.get("latency_spike_factor", 3.0),
+            enabled=adaptive.get("enabled", True),
+        )
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.endpoints = dict(endpoints or {})
+        self._account_buckets = {}
+        self._endpoint_buckets = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings: dict = None):
+        """
+        根据 config.json 中的 rate_limit 配置创建限流器，缺省项使用 DEFAULT_RATE_LIMIT
+        """
+        merged = dict(DEFAULT_RATE_LIMIT)
+        merged["endpoints"] = dict(DEFAULT_RATE_LIMIT["endpoints"])
+        merged["adaptive"] = dict(DEFAULT_RATE_LIMIT["adaptive"])
+        if settings:
+            for key, value in settings.items():
+                if key in ("endpoints", "adaptive") and isinstance(value, dict):
+                    merged[key].update(value)
+                else:
+                    merged[key] = value
+        return cls(
+            global_rate=merged["global_rate"],
+            global_burst=merged.get("global_burst"),
+            account_rate=merged["account_rate"],
+            account_burst=merged.get("account_burst"),
+            endpoints=merged["endpoints"],
+            adaptive=merged["adaptive"],
+        )
+
+    def _account_bucket(self, account) -> TokenBucket:
+        bucket = self._account_buckets.get(account)
+        if bucket is None:
+            with self._lock:
+                bucket = self._account_buckets.setdefault(
+                    account, TokenBucket(self.account_rate, self.account_burst)
+                )
+        return bucket
+
+    def _endpoint_bucket(self, account, path: str):
+        rate = self.endpoints.get(path)
+        if rate is None:
+            return None
+        key = (account, path)
+        bucket = self._endpoint_buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                # 单接口限制按固定节奏放行，不允许突发
+                bucket = self._endpoint_buckets.setdefault(key, TokenBucket(rate, 1))
+        return bucket
+
+    def reserve(self, account, path: str = "") -> float:
+        """
+        为一次请求预约令牌
+        :param account: 账号标识（一般为 token）
+        :param path: 接口路径
+        :return: 需要等待的秒数
+        """
+        path = path.strip("/")
+        waits = [self.global_bucket.reserve(), self._account_bucket(account).reserve()]
+        endpoint_bucket = self._endpoint_bucket(account, path)
+        if endpoint_bucket is not None:
+            waits.append(endpoint_bucket.reserve())
+        return max(waits)
+
+    def acquire(self, account, path: str = ""):
+        """阻塞直到允许发出请求（先等并发名额，再等令牌）；请求结束后必须调用 release"""
+        self.concurrency.acquire()
+        wait = self.reserve(account, path)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, account, path: str = ""):
+        """协程版 acquire，等待期间不阻塞事件循环"""
+        await self.concurrency.acquire_async()
+        wait = self.reserve(account, path)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, latency: float, status_code: int = None, text: str = "", error: bool = False):
+        """
+        登记请求结果，交给 AIMD 调整并发上限
+        :param latency: 请求耗时（秒）
+        :param status_code: HTTP 状态码，网络异常时为 None
+        :param text: 响应内容（用于识别"系统繁忙"等提示）
+        :param error: 是否网络异常/超时
+        """
+        busy = bool(text) and any(msg in text for msg in BUSY_MESSAGES)
+        self.concurrency.release(latency, status_code=status_code, busy=busy, error=error)
+
+    def stats(self) -> dict:
+        return self.concurrency.stats()
+
+    def format_stats(self) -> str:
+        return self.concurrency.format_stats()
+
+
+_limiter = RateLimiter.from_config()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取全局共享的限流器"""
+    return _limiter
+
+
+def configure_rate_limiter(settings: dict = None) -> RateLimiter:
+    """
+    按配置重建全局限流器（程序启动时调用一次）
+    :param settings: config.json 中的 rate_limit 字段
+    """
+    global _limiter
+    _limiter = RateLimiter.from_config(settings)
+    return _limiter
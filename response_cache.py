@@ -0,0 +1,184 @@
+# response_cache.py
+# 功能：只读接口的响应缓存（单次运行内有效）
+# 用户信息、军队信息、好友列表、武将列表等接口在一次运行中会被多个模块反复请求，
+# 这里按账号缓存成功的响应，过期或有写操作改变了相关数据时自动失效
+import copy
+import json
+import threading
+import time
+
+# 可缓存的只读接口及其有效期（秒），可在 config.json 的 response_cache.ttl 中覆盖
+DEFAULT_CACHE_TTL = {
+    "bas-assets/userInfo": 60,
+    "battle/armyInfo": 60,
+    "user/friendList": 120,
+    "bas-generals/index": 60,
+    "bas-generals/freeGeneralList": 30,
+}
+
+# 写接口 -> 需要失效的缓存接口
+INVALIDATIONS = {
+    "bas-generals/trainGeneral": ("bas-generals/index", "bas-generals/freeGeneralList"),
+    "bas-generals/finishTrain": ("bas-generals/index", "bas-generals/freeGeneralList"),
+    "bas-generals/extractSoul": ("bas-generals/index", "bas-generals/freeGeneralList"),
+    "mid-user-pub/recruitGeneral": ("bas-generals/index", "bas-generals/freeGeneralList"),
+    "mid-user-resource/resourceOccupy": ("battle/armyInfo", "bas-generals/freeGeneralList", "bas-generals/index"),
+    "mid-user-resource/resourceRecall": ("battle/armyInfo", "bas-generals/freeGeneralList", "bas-generals/index"),
+    "user/agreeFriend": ("user/friendList",),
+    "user/askGift": ("user/friendList",),
+    "user/giveGift": ("user/friendList",),
+    "user/receiveFriendGift": ("user/friendList",),
+}
+
+# 不改变任何数据的接口（未列出的非缓存接口一律视为写操作，会让用户信息缓存失效，
+# 因为领奖、兑换、征收、训练等几乎所有写操作都会改变资源数量）
+READ_ONLY_ENDPOINTS = {
+    "mid-user-resource/reList",
+    "mid-user-resource/resourceDetail",
+    "bas-assets/arenaRankList",
+    "bas-assets/arenaInfo",
+    "bas-assets/arenaAwardList",
+    "bas-assets/marketInfo",
+    "bas-assets/monthOnLine",
+    "bas-assets/continuousOnLine",
+    "bas-assets/otherPlayerInfo",
+    "mid-user-pack/pack",
+    "mid-user-pub/pubGeneralList",
+    "user/askGiftList",
+    "user/giveGiftList",
+    "user/askFriendList",
+    "user-email/list",
+    "user-email/customsEmailRewardInfo",
+    "activity/getRiChangRenWu",
+    "user/login",
+}
+
+USER_INFO_ENDPOINT = "bas-assets/userInfo"
+
+
+class ResponseCache:
+    """
+    单个账号的响应缓存
+    键为 (接口, 请求体)，值为成功响应的 JSON；读取时返回副本，调用方修改不会污染缓存
+    """
+
+    def __init__(self, ttl: dict = None, enabled: bool = True):
+        self.ttl = dict(DEFAULT_CACHE_TTL if ttl is None else ttl)
+        self.enabled = enabled
+        self._entries = {}  # (endpoint, payload_key) -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def cacheable(self, endpoint: str) -> bool:
+        return self.enabled and self.ttl.get(endpoint, 0) > 0
+
+    @staticmethod
+    def _key(endpoint: str, payload):
+        return endpoint, json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+
+    def get(self, endpoint: str, payload=None):
+        """
+        读取缓存
+        :return: 缓存的响应副本，未命中或已过期返回 None
+        """
+        if not self.cacheable(endpoint):
+            return None
+        key = self._key(endpoint, payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, endpoint: str, payload, value):
+        """保存成功的响应"""
+        if not self.cacheable(endpoint):
+            return
+        key = self._key(endpoint, payload)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl[endpoint], copy.deepcopy(value))
+
+    def invalidate(self, *endpoints):
+        """使指定接口的所有缓存失效，不传参数时清空全部"""
+        with self._lock:
+            if not endpoints:
+                self._entries.clear()
+                return
+            stale = [key for key in self._entries if key[0] in endpoints]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def on_request(self, endpoint: str):
+        """
+        请求发出后调用：写接口让相关缓存失效
+        :param endpoint: 接口路径（如 "mid-user-resource/resourceOccupy"）
+        """
+        if endpoint in self.ttl or endpoint in READ_ONLY_ENDPOINTS:
+            return
+        targets = set(INVALIDATIONS.get(endpoint, ()))
+        targets.add(USER_INFO_ENDPOINT)
+        self.invalidate(*targets)
+
+
+class _CacheRegistry:
+    """按账号（token）管理缓存，同一账号的同步/异步客户端共享同一份缓存"""
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.ttl = dict(DEFAULT_CACHE_TTL)
+        self.ttl.update(settings.get("ttl") or {})
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def get(self, token) -> ResponseCache:
+        with self._lock:
+            cache = self._caches.get(token)
+            if cache is None:
+                cache = ResponseCache(self.ttl, enabled=self.enabled and bool(token))
+                self._caches[token] = cache
+            return cache
+
+    def stats(self) -> dict:
+        with self._lock:
+            caches = list(self._caches.values())
+        return {
+            "hits": sum(c.hits for c in caches),
+            "misses": sum(c.misses for c in caches),
+            "invalidations": sum(c.invalidations for c in caches),
+        }
+
+    def format_stats(self) -> str:
+        st = self.stats()
+        total = st["hits"] + st["misses"]
+        ratio = f"{st['hits'] * 100 // total}%" if total else "-"
+        return f"命中 {st['hits']} / 未命中 {st['misses']}（命中率 {ratio}）| 写操作失效 {st['invalidations']} 条"
+
+
+_registry = _CacheRegistry()
+
+
+def get_response_cache(token) -> ResponseCache:
+    """获取账号对应的响应缓存（token 为空时返回不缓存的实例）"""
+    return _registry.get(token)
+
+
+def configure_response_cache(settings: dict = None):
+    """
+    按配置重建缓存（程序启动时调用一次）
+    :param settings: config.json 中的 response_cache 字段，如 {"enabled": true, "ttl": {"bas-assets/userInfo": 60}}
+    """
+    global _registry
+    _registry = _CacheRegistry(settings)
+    return _registry
+
+
+def cache_stats_text() -> str:
+    """本次运行的缓存命中统计"""
+    return _registry.format_stats()
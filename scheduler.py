@@ -0,0 +1,289 @@
+# scheduler.py
+# 功能：常驻调度（守护模式）
+# 所有账号的定时事件放在同一个最小堆里，到期时只执行对应的动作，执行完再根据游戏返回的时间安排下一次：
+#   - 领地召回：占领满8小时（occupyTime + 8h），到期的领地一批召回
+#   - 武将到家：返回中的武将到达（arriveTime），到家后立即重新派出占领；有空闲武将但暂无空闲资源时稍后重试
+#   - 训练结束：训练槽 trainTime 到期，收获并补满训练槽
+#   - 市场满仓：按每秒1铜钱推算铜钱满的时间，届时征收
+import datetime
+import heapq
+import itertools
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+IDLE_RECHECK_SECONDS = 3600      # 没有待办事件时多久重新检查一次
+RETRY_SECONDS = 300              # 动作出错或接口失败后多久重试
+DUE_SLACK_SECONDS = 5            # 到期后多等几秒，避免服务端时间略慢导致"尚未结束"
+MIN_INTERVAL_SECONDS = 60        # 同一事件两次执行的最短间隔（到期时间已过但动作没生效时避免空转）
+
+KIND_LAND_RECALL = "land_recall"
+KIND_GENERAL_ARRIVE = "general_arrive"
+KIND_TRAIN = "train"
+KIND_MARKET = "market"
+
+KIND_NAMES = {
+    KIND_LAND_RECALL: "领地召回",
+    KIND_GENERAL_ARRIVE: "武将到家",
+    KIND_TRAIN: "训练结束",
+    KIND_MARKET: "市场满仓",
+}
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+def _parse_ts(value):
+    """将 "YYYY-mm-dd HH:MM:SS" 或时间戳（秒/毫秒）转换为时间戳，无法解析返回 None"""
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)) or str(value).isdigit():
+        ts = int(value)
+        return ts // 1000 if ts > 10 ** 12 else ts
+    try:
+        return datetime.datetime.strptime(str(value).strip(), "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        return None
+
+
+def _format_ts(ts) -> str:
+    return time.strftime("%m-%d %H:%M:%S", time.localtime(ts))
+
+
+class AccountContext:
+    """守护模式下单个账号的会话信息"""
+
+    def __init__(self, index: int, session, token, user_id=None):
+        self.index = index
+        self.session = session
+        self.token = token
+        self.user_id = user_id
+
+    @property
+    def settings(self):
+        # 每次取最新配置：config.json 修改后无需重启守护进程
+        from settings import get_account_settings
+        return get_account_settings(self.index)
+
+
+# ========== 各类事件的动作 ==========
+# 每个动作执行完返回 {事件类型: 下次到期时间戳}，值为 None 表示取消该事件
+
+def _land_timers(occupy_resource_list):
+    """根据军队信息计算下一次召回时间（occupyTime + 8h）和最早的武将到家时间（arriveTime）"""
+    from landResources import recall_deadline, arrive_deadline
+
+    recalls = [recall_deadline(res) for res in occupy_resource_list or []]
+    arrivals = [arrive_deadline(res) for res in occupy_resource_list or []]
+    next_recall = min((ts for ts in recalls if ts), default=None)
+    next_arrive = min((ts for ts in arrivals if ts), default=None)
+    return next_recall, next_arrive
+
+
+def _land_schedule(ctx, now):
+    from landResources import get_occupy_resource_list
+
+    occupy_resource_list = get_occupy_resource_list(ctx.session, ctx.token)
+    if occupy_resource_list is None:
+        return {KIND_LAND_RECALL: now + RETRY_SECONDS}
+    next_recall, next_arrive = _land_timers(occupy_resource_list)
+    return {
+        KIND_LAND_RECALL: next_recall or now + IDLE_RECHECK_SECONDS,
+        KIND_GENERAL_ARRIVE: next_arrive,
+    }
+
+
+def run_land_recall(ctx):
+    """召回占领满8小时的领地（到期的一批并发召回），并按召回后武将的到家时间安排重新派出"""
+    from landResources import get_occupy_resource_list, check_and_recall_resources
+
+    occupy_resource_list = get_occupy_resource_list(ctx.session, ctx.token)
+    if occupy_resource_list is None:
+        return {KIND_LAND_RECALL: time.time() + RETRY_SECONDS}
+    check_and_recall_resources(ctx.session, ctx.token, occupy_resource_list)
+    # 召回会让军队信息缓存失效，这里拿到的是召回后的状态（含到家时间）
+    return _land_schedule(ctx, time.time())
+
+
+def run_general_arrive(ctx):
+    """
+    武将到家后按目标配比重新占领
+    有空闲武将但暂时没找到空闲资源时，不等下一个武将到家，RETRY_SECONDS 后再扫描一次
+    """
+    from landResources import auto_occupy_resources_gradually
+
+    unfilled = auto_occupy_resources_gradually(ctx.session, ctx.token, ctx.index, settings=ctx.settings)
+    now = time.time()
+    timers = _land_schedule(ctx, now)
+    if unfilled:
+        retry_at = now + RETRY_SECONDS
+        next_arrive = timers.get(KIND_GENERAL_ARRIVE)
+        timers[KIND_GENERAL_ARRIVE] = min(next_arrive, retry_at) if next_arrive else retry_at
+    return timers
+
+
+def run_train(ctx):
+    """收获训练结束的武将并补满训练槽，按最早结束的训练槽安排下一次"""
+    from summonCard import get_general_list, auto_train_generals
+
+    now = time.time()
+    generals = get_general_list(ctx.session, ctx.token)
+    if not generals:
+        return {KIND_TRAIN: now + RETRY_SECONDS}
+    settings = ctx.settings
+    auto_train_generals(ctx.session, ctx.token, generals, max_trains=settings.max_train_slots,
+                        account_index=ctx.index, settings=settings)
+
+    generals = get_general_list(ctx.session, ctx.token) or []
+    ends = [_parse_ts(gen.get("trainTime")) for gen in generals if gen.get("trainStatus") == 1]
+    ends = [ts for ts in ends if ts]
+    return {KIND_TRAIN: min(ends) if ends else time.time() + IDLE_RECHECK_SECONDS}
+
+
+def run_market(ctx):
+    """市场铜钱满时征收（get_market_info 在铜钱已满时会自动征收），并推算下次满仓时间"""
+    from market import get_market_info
+
+    now = time.time()
+    data = get_market_info(ctx.session, ctx.token)
+    if not data:
+        return {KIND_MARKET: now + RETRY_SECONDS}
+    user_market = data.get("userMarket", {})
+    current_copper = user_market.get("copper", 0) or 0
+    max_copper = user_market.get("maxCopper", 0) or 0
+    if max_copper <= 0:
+        return {KIND_MARKET: now + IDLE_RECHECK_SECONDS}
+    # 每秒积攒1铜钱；本次已满则已征收，重新从0开始积攒
+    remaining = max_copper - current_copper if current_copper < max_copper else max_copper
+    return {KIND_MARKET: now + remaining}
+
+
+DEFAULT_HANDLERS = {
+    KIND_LAND_RECALL: run_land_recall,
+    KIND_GENERAL_ARRIVE: run_general_arrive,
+    KIND_TRAIN: run_train,
+    KIND_MARKET: run_market,
+}
+
+
+class Scheduler:
+    """
+    所有账号共用的定时器堆
+    每个 (账号, 事件类型) 只保留一个定时器，重新安排时旧的自动作废；
+    同一账号的动作串行执行（共用一个会话和同一批武将），不同账号的动作在线程池中并行
+    """
+
+    def __init__(self, contexts, handlers=None, max_workers: int = 1, wrap=None):
+        """
+        :param contexts: {账号索引: AccountContext}
+        :param handlers: {事件类型: 动作函数}，默认 DEFAULT_HANDLERS
+        :param max_workers: 同时执行动作的账号数
+        :param wrap: wrap(账号索引, 函数) -> 结果，用于给输出加账号前缀等，默认直接调用
+        """
+        self.contexts = contexts
+        self.handlers = handlers or DEFAULT_HANDLERS
+        self.max_workers = max(1, max_workers)
+        self.wrap = wrap or (lambda index, func: func())
+        self._heap = []              # (到期时间, 序号, 账号索引, 事件类型)
+        self._versions = {}          # (账号索引, 事件类型) -> 当前有效的序号
+        self._seq = itertools.count()
+        self._busy = set()           # 正在执行动作的账号
+        self._cond = threading.Condition()
+        self._stopped = False
+
+    def schedule(self, index: int, kind: str, due: float):
+        """安排（或重新安排）事件，due 为 None 时取消"""
+        with self._cond:
+            if due is None:
+                self._versions.pop((index, kind), None)
+                return
+            seq = next(self._seq)
+            self._versions[(index, kind)] = seq
+            heapq.heappush(self._heap, (due, seq, index, kind))
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def pending(self):
+        """当前有效的定时器列表 [(到期时间, 账号索引, 事件类型)]"""
+        with self._cond:
+            return sorted(
+                (due, index, kind) for due, seq, index, kind in self._heap
+                if self._versions.get((index, kind)) == seq
+            )
+
+    def _next_ready(self):
+        """取出一个已到期且账号空闲的事件，没有时返回需要等待的秒数"""
+        now = time.time()
+        deferred = []
+        try:
+            while self._heap:
+                due, seq, index, kind = self._heap[0]
+                if self._versions.get((index, kind)) != seq:
+                    heapq.heappop(self._heap)  # 已被重新安排或取消
+                    continue
+                if due > now:
+                    return None, due - now
+                heapq.heappop(self._heap)
+                if index in self._busy:
+                    deferred.append((due, seq, index, kind))
+                    continue
+                del self._versions[(index, kind)]
+                return (index, kind), 0
+            return None, None
+        finally:
+            # 账号忙的事件放回堆中，等该账号的动作结束后再执行
+            for entry in deferred:
+                heapq.heappush(self._heap, entry)
+
+    def _execute(self, index: int, kind: str):
+        ctx = self.contexts[index]
+        results = {}
+        try:
+            results = self.wrap(index, lambda: self._run_handler(ctx, kind)) or {}
+        except Exception as e:
+            print_and_flush(f"❌ 账号{index + 1} {KIND_NAMES.get(kind, kind)} 执行出错: {e}")
+            traceback.print_exc()
+            results = {kind: time.time() + RETRY_SECONDS}
+        finally:
+            with self._cond:
+                self._busy.discard(index)
+                self._cond.notify()
+        now = time.time()
+        for next_kind, due in results.items():
+            if due is not None:
+                due = max(due + DUE_SLACK_SECONDS, now + MIN_INTERVAL_SECONDS)
+            self.schedule(index, next_kind, due)
+
+    def _run_handler(self, ctx, kind):
+        print_and_flush(f"\n⏰ [{KIND_NAMES.get(kind, kind)}] 到期，开始执行")
+        results = self.handlers[kind](ctx) or {}
+        plan = [f"{KIND_NAMES.get(k, k)} {_format_ts(v)}" for k, v in results.items() if v]
+        if plan:
+            print_and_flush(f"🗓️ 下次: {'，'.join(plan)}")
+        return results
+
+    def run(self):
+        """阻塞运行直到 stop() 被调用"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="daemon") as executor:
+            while True:
+                with self._cond:
+                    if self._stopped:
+                        break
+                    ready, wait = self._next_ready()
+                    if ready is None:
+                        self._cond.wait(timeout=wait)
+                        continue
+                    index, kind = ready
+                    self._busy.add(index)
+                executor.submit(self._execute, index, kind)
@@ -0,0 +1,246 @@
+# settings.py
+# 功能：config.json 的统一读取
+# 程序运行期间只解析一次，文件修改时间变化后才重新加载；
+# 解析结果校验后转换为带类型的全局配置和每个账号的配置（账号配置 > 全局配置 > 默认值）
+import copy
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+CONFIG_FILE = "config.json"
+
+RESOURCE_TYPES = ("农田", "森林", "草原", "山丘", "沼泽")
+DEFAULT_TARGET_DISTRIBUTION = {"农田": 9, "森林": 0, "草原": 0, "山丘": 0, "沼泽": 0}
+DEFAULT_ARENA_PRIORITY = [{"id": 56, "name": "蓝武魂", "points": 1500}]
+DEFAULT_BATTLE_SETTINGS = {"difficulty": 3, "level": 8, "times": 10}
+DEFAULT_GOODSID = 51
+DEFAULT_MAX_TRAIN_SLOTS = 2
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+class ConfigError(ValueError):
+    """配置文件不存在或内容不合法"""
+
+
+@dataclass
+class AccountSettings:
+    """单个账号解析后的配置"""
+    index: Optional[int]
+    tel: str = ""
+    pwd: str = field(default="", repr=False)
+    default_goodsid: int = DEFAULT_GOODSID
+    enable_arena_exchange: bool = False
+    arena_exchange_priority: List[Dict[str, Any]] = field(default_factory=lambda: copy.deepcopy(DEFAULT_ARENA_PRIORITY))
+    target_resource_distribution: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_TARGET_DISTRIBUTION))
+    max_train_slots: int = DEFAULT_MAX_TRAIN_SLOTS
+    optimize_resource_distribution: bool = False  # 按实测产出自动计算配比（总块数沿用 target_resource_distribution）
+    customs_battle_settings: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_BATTLE_SETTINGS))
+    raw: Dict[str, Any] = field(default_factory=dict)  # 账号 config 原始内容（供尚未建模的字段使用）
+
+    def get(self, key: str, default=None):
+        """按原始字段名读取（兼容旧代码中 account_config.get(...) 的写法）"""
+        if hasattr(self, key) and key not in ("index", "tel", "pwd", "raw"):
+            return getattr(self, key)
+        return self.raw.get(key, default)
+
+
+@dataclass
+class AppConfig:
+    """解析后的完整配置"""
+    accounts: List[AccountSettings]
+    gift_items: Dict[str, str]
+    default_goodsid: int
+    auto_mode: bool
+    input_timeout: int
+    max_concurrent_accounts: int = 1
+    max_parallel_phases: int = 4
+    coordinated_land_occupy: bool = False  # 多账号共用一次领地扫描，按配比统一分配空闲资源
+    unprocessable_email_ttl_hours: float = 168.0  # 无法处理邮件记录的保留时间，过后重新尝试
+    rate_limit: Optional[Dict[str, Any]] = None
+    response_cache: Optional[Dict[str, Any]] = None
+    resource_optimizer: Optional[Dict[str, Any]] = None
+    defaults: Optional[AccountSettings] = None  # 仅由全局配置解析出的账号设置
+    raw: Dict[str, Any] = field(default_factory=dict)
+    mtime: float = 0.0
+
+    def account(self, index: Optional[int] = None) -> AccountSettings:
+        """
+        获取账号配置
+        :param index: 账号索引，None 或越界时返回仅由全局配置解析出的设置
+        """
+        if index is not None and 0 <= index < len(self.accounts):
+            return self.accounts[index]
+        return self.defaults or AccountSettings(index=None)
+
+    def get(self, key: str, default=None):
+        return self.raw.get(key, default)
+
+
+def _as_int(value, name: str, minimum: int = None) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name} 应为整数，实际为 {value!r}")
+    if minimum is not None and number < minimum:
+        raise ConfigError(f"{name} 不能小于 {minimum}，实际为 {number}")
+    return number
+
+
+def _as_positive_float(value, name: str) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name} 应为数字，实际为 {value!r}")
+    if not 0 < number < float("inf"):
+        raise ConfigError(f"{name} 应大于 0，实际为 {value!r}")
+    return number
+
+
+def _pick(key: str, account_conf: dict, global_conf: dict, default):
+    if key in account_conf:
+        return copy.deepcopy(account_conf[key])
+    if key in global_conf:
+        return copy.deepcopy(global_conf[key])
+    return copy.deepcopy(default)
+
+
+def _resolve_account(index, account: dict, global_conf: dict) -> AccountSettings:
+    where = f"账号{index + 1}" if index is not None else "全局配置"
+    conf = account.get("config") or {}
+    if not isinstance(conf, dict):
+        raise ConfigError(f"{where} 的 config 应为对象")
+
+    distribution = _pick("target_resource_distribution", conf, global_conf, DEFAULT_TARGET_DISTRIBUTION)
+    if not isinstance(distribution, dict):
+        raise ConfigError(f"{where} 的 target_resource_distribution 应为对象")
+    unknown = [name for name in distribution if name not in RESOURCE_TYPES]
+    if unknown:
+        raise ConfigError(f"{where} 的 target_resource_distribution 含未知资源类型: {', '.join(unknown)}")
+    # 未列出的资源类型按 0 处理
+    distribution = {name: _as_int(distribution.get(name, 0), f"{where} 的 {name} 目标数量", 0) for name in RESOURCE_TYPES}
+
+    priority = _pick("arena_exchange_priority", conf, global_conf, DEFAULT_ARENA_PRIORITY)
+    if not isinstance(priority, list) or not priority:
+        raise ConfigError(f"{where} 的 arena_exchange_priority 应为非空列表")
+    for item in priority:
+        if not isinstance(item, dict) or "id" not in item:
+            raise ConfigError(f"{where} 的 arena_exchange_priority 每项都需要 id")
+        item.setdefault("name", f"物品{item['id']}")
+        item.setdefault("points", 0)
+
+    battle = dict(DEFAULT_BATTLE_SETTINGS)
+    battle.update(_pick("customs_battle_settings", conf, global_conf, {}) or {})
+
+    return AccountSettings(
+        index=index,
+        tel=str(account.get("tel", "")),
+        pwd=str(account.get("pwd", "")),
+        default_goodsid=_as_int(_pick("default_goodsid", conf, global_conf, DEFAULT_GOODSID), f"{where} 的 default_goodsid"),
+        enable_arena_exchange=bool(_pick("enable_arena_exchange", conf, global_conf, False)),
+        arena_exchange_priority=priority,
+        target_resource_distribution=distribution,
+        max_train_slots=_as_int(_pick("max_train_slots", conf, global_conf, DEFAULT_MAX_TRAIN_SLOTS), f"{where} 的 max_train_slots", 0),
+        optimize_resource_distribution=bool(_pick("optimize_resource_distribution", conf, global_conf, False)),
+        customs_battle_settings=battle,
+        raw=conf,
+    )
+
+
+def parse_config(raw: dict, mtime: float = 0.0) -> AppConfig:
+    """
+    校验并解析配置内容
+    :param raw: config.json 解析出的字典
+    :raises ConfigError: 缺少必填项或字段类型不正确
+    """
+    if not isinstance(raw, dict):
+        raise ConfigError("配置文件顶层应为对象")
+    for key in ("accounts", "gift_items", "default_goodsid", "auto_mode", "input_timeout"):
+        if key not in raw:
+            raise ConfigError(f"缺少配置项 {key}")
+    accounts = raw["accounts"]
+    if not isinstance(accounts, list):
+        raise ConfigError("accounts 应为列表")
+    for i, account in enumerate(accounts):
+        if not isinstance(account, dict) or not account.get("tel") or "pwd" not in account:
+            raise ConfigError(f"账号{i + 1} 缺少 tel 或 pwd")
+
+    return AppConfig(
+        accounts=[_resolve_account(i, account, raw) for i, account in enumerate(accounts)],
+        gift_items=dict(raw["gift_items"]),
+        default_goodsid=_as_int(raw["default_goodsid"], "default_goodsid"),
+        auto_mode=bool(raw["auto_mode"]),
+        input_timeout=_as_int(raw["input_timeout"], "input_timeout", 0),
+        max_concurrent_accounts=max(1, _as_int(raw.get("max_concurrent_accounts", 1), "max_concurrent_accounts")),
+        max_parallel_phases=max(1, _as_int(raw.get("max_parallel_phases", 4), "max_parallel_phases")),
+        coordinated_land_occupy=bool(raw.get("coordinated_land_occupy", False)),
+        unprocessable_email_ttl_hours=_as_positive_float(raw.get("unprocessable_email_ttl_hours", 168), "unprocessable_email_ttl_hours"),
+        rate_limit=raw.get("rate_limit"),
+        response_cache=raw.get("response_cache"),
+        resource_optimizer=raw.get("resource_optimizer"),
+        defaults=_resolve_account(None, {}, raw),
+        raw=raw,
+        mtime=mtime,
+    )
+
+
+class ConfigLoader:
+    """按修改时间缓存的配置加载器（线程安全）"""
+
+    def __init__(self, path: str = CONFIG_FILE):
+        self.path = path
+        self._config = None
+        self._lock = threading.Lock()
+
+    def get(self) -> AppConfig:
+        """
+        获取配置，文件修改时间未变时直接返回已解析的结果
+        :raises ConfigError: 文件不存在或内容不合法
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._config is not None:
+                return self._config
+            raise ConfigError(f"未检测到 {self.path} 配置文件")
+
+        with self._lock:
+            if self._config is None or self._config.mtime != mtime:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        raw = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ConfigError(f"配置文件格式错误: {e}")
+                except OSError as e:
+                    raise ConfigError(f"读取配置文件失败: {e}")
+                self._config = parse_config(raw, mtime)
+            return self._config
+
+
+_loader = ConfigLoader()
+
+
+def get_config() -> AppConfig:
+    """获取全局配置（只在 config.json 修改后重新解析）"""
+    return _loader.get()
+
+
+def get_account_settings(account_index: Optional[int] = None) -> AccountSettings:
+    """
+    获取账号配置，读取失败时返回默认设置
+    :param account_index: 账号索引
+    """
+    try:
+        return get_config().account(account_index)
+    except ConfigError as e:
+        print_and_flush(f"⚠️ 读取配置文件失败: {e}，使用默认配置")
+        return AccountSettings(index=account_index)
@@ -3,14 +3,15 @@
 # 特点：隐藏 goodsId / mpgId 等技术字段，仅输出用户可见信息
 
 import requests
+from api_client import get_client
 from datetime import datetime
 import sys
 
 # 🌐 接口地址
-MONTH_ONLINE_URL = "https://q-jiang.myprint.top/api/bas-assets/monthOnLine"
-SIGN_IN_URL = "https://q-jiang.myprint.top/api/bas-assets/receiveMonthOnLineGoods"
-CONTINUOUS_ONLINE_URL = "https://q-jiang.myprint.top/api/bas-assets/continuousOnLine"
-RECEIVE_ONLINE_REWARD_URL = "https://q-jiang.myprint.top/api/bas-assets/receiveOnLineReward"
+MONTH_ONLINE_URL = "bas-assets/monthOnLine"
+SIGN_IN_URL = "bas-assets/receiveMonthOnLineGoods"
+CONTINUOUS_ONLINE_URL = "bas-assets/continuousOnLine"
+RECEIVE_ONLINE_REWARD_URL = "bas-assets/receiveOnLineReward"
 
 def print_and_flush(*args, **kwargs):
     print(*args, **kwargs)
@@ -25,17 +26,12 @@ def get_sign_in_info(session, token):
     """
     print_and_flush("🔍 正在获取签到信息...")
     
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     
     try:
-        response = session.post(MONTH_ONLINE_URL, headers=headers, json={})
-        response.raise_for_status()
-        result = response.json()
+        result = client.post(MONTH_ONLINE_URL, {})
         
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             print_and_flush("✅ 签到信息获取成功")
             return data
@@ -81,18 +77,13 @@ def daily_check_in(session, token, day=None):
 
     print_and_flush(f"\n📅 正在尝试签到：{day} 号 ...")
 
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     payload = {"day": day}
 
     try:
-        response = session.post(SIGN_IN_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post(SIGN_IN_URL, payload)
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             goods_list = data.get("goodsList", [])
 
@@ -141,17 +132,12 @@ def get_continuous_sign_in_info(session, token):
     """
     print_and_flush("🔍 正在获取连续签到信息...")
     
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     
     try:
-        response = session.post(CONTINUOUS_ONLINE_URL, headers=headers, json={})
-        response.raise_for_status()
-        result = response.json()
+        result = client.post(CONTINUOUS_ONLINE_URL, {})
         
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             print_and_flush("✅ 连续签到信息获取成功")
             return data
@@ -197,18 +183,13 @@ def continuous_check_in(session, token, day=None):
 
     print_and_flush(f"\n📅 正在尝试领取连续签到奖励：星期 {day} ...")
 
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json"
-    }
+    client = get_client(session, token)
     payload = {"day": day}
 
     try:
-        response = session.post(RECEIVE_ONLINE_REWARD_URL, headers=headers, json=payload)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post(RECEIVE_ONLINE_REWARD_URL, payload)
 
-        if result.get("success") and result.get("code") == "200":
+        if client.is_success(result):
             data = result.get("data", {})
             goods_list = data.get("goodsList", [])
 
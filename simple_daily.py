@@ -3,11 +3,15 @@
 
 import os
 import time
-import json
 import requests
+from response_cache import configure_response_cache
+from settings import get_config, ConfigError, CONFIG_FILE
+from rate_limiter import configure_rate_limiter
 import traceback
 import sys
 import io
+import threading
+import contextvars
 
 
 # 设置环境变量以确保UTF-8编码
@@ -29,6 +33,54 @@ if os.name == 'nt':
     except:
         pass
 
+# 协同占领时各账号的占领请求并发执行，用账号标签给输出加前缀
+_account_tag = contextvars.ContextVar("account_tag", default="")
+
+class AccountTaggedStream:
+    """
+    按账号给输出的每一行加上前缀（同 main.py）
+    每个线程先缓存不完整的行，凑满一行后再整行写出，避免多个账号的输出交错在同一行
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def write(self, text):
+        tag = _account_tag.get()
+        if not tag:
+            with self._lock:
+                return self._stream.write(text)
+
+        pending = getattr(self._local, "pending", "") + text
+        lines = pending.split("\n")
+        self._local.pending = lines.pop()
+        if lines:
+            with self._lock:
+                self._stream.write("".join(f"[{tag}] {line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def install_tagged_streams():
+    if not isinstance(sys.stdout, AccountTaggedStream):
+        sys.stdout = AccountTaggedStream(sys.stdout)
+    if not isinstance(sys.stderr, AccountTaggedStream):
+        sys.stderr = AccountTaggedStream(sys.stderr)
+
+def _run_tagged(account_index: int, func):
+    """在当前线程中以账号前缀执行 func"""
+    tag_token = _account_tag.set(f"账号{account_index + 1}")
+    try:
+        return func()
+    finally:
+        _account_tag.reset(tag_token)
+
 def traceback_print_and_flush_exc():
     traceback.print_exc()
     sys.stdout.flush()
@@ -41,68 +93,31 @@ def print_and_flush(*args, **kwargs):
         # stdout 被关闭时忽略输出 
         pass
 
-def is_token_valid(session: requests.Session, token: str) -> bool:
-    """
-    检查token是否有效
-    通过访问一个需要认证的接口来判断
-    """
-    if not token:
-        return False
-        
-    url = "https://q-jiang.myprint.top/api/mid-user-resource/reList"
-    headers = {
-        "Token": token,
-        "Content-Type": "application/json",
-        "Origin": "https://q-jiang.myprint.top",
-        "Referer": "https://q-jiang.myprint.top/"
-    }
-    
-    try:
-        response = session.post(url, headers=headers, json={}, timeout=10)
-        result = response.json()
-        
-        # 如果返回code为200且success为True，则token有效
-        if result.get("success") and str(result.get("code")) == "200":
-            return True
-        # 如果返回需要重新登录的错误码或消息
-        elif str(result.get("code")) in ["401", "403"] or "登录" in str(result.get("msg", "")):
-            return False
-        # 其他情况认为token有效
-        return True
-    except Exception as e:
-        # 网络异常等情况下，默认认为token可能无效
-        return False
-
 # ========== 配置区 ========== 
 def load_config():
     """
-    加载配置文件
+    加载配置文件（解析与校验见 settings.py，运行期间只在文件修改后重新解析）
     """
-    config_file = "config.json"
-    
-    if not os.path.exists(config_file):
-        # 未检测到config.json文件
-        print_and_flush(f"❌ 未检测到 config.json 配置文件")
-        print_and_flush("📝 请使用 account_config.py 生成配置文件")
-        print_and_flush("运行命令: python account_config.py")
-        sys.exit(1)
-    
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        return config
-    except json.JSONDecodeError as e:
-        print_and_flush(f"❌ 配置文件格式错误: {e}")
-        sys.exit(1)
-    except Exception as e:
-        print_and_flush(f"❌ 读取配置文件失败: {e}")
+        return get_config()
+    except ConfigError as e:
+        if not os.path.exists(CONFIG_FILE):
+            # 未检测到config.json文件
+            print_and_flush(f"❌ 未检测到 config.json 配置文件")
+            print_and_flush("📝 请使用 account_config.py 生成配置文件")
+            print_and_flush("运行命令: python account_config.py")
+        else:
+            print_and_flush(f"❌ 配置文件有误: {e}")
         sys.exit(1)
 
 config = load_config()
-ACCOUNTS = config["accounts"]
-TOKEN_FILES = [f"user_token_{i+1}.json" for i in range(len(ACCOUNTS))]  # 为每个账号创建独立的token文件
-GIFT_ITEMS = config["gift_items"]
-DEFAULT_GOODSID = config["default_goodsid"]
+configure_rate_limiter(config.rate_limit)  # 全局/账号/接口三级限流，缺省值见 rate_limiter.DEFAULT_RATE_LIMIT
+configure_response_cache(config.response_cache)  # 只读接口缓存，缺省有效期见 response_cache.DEFAULT_CACHE_TTL
+ACCOUNTS = config.raw["accounts"]
+TOKEN_FILES = [f"user_token_{i+1}.json" for i in range(len(ACCOUNTS))]  # 旧版各账号的token文件，首次运行时导入 token_store.json
+GIFT_ITEMS = config.gift_items
+DEFAULT_GOODSID = config.default_goodsid
+COORDINATED_LAND = config.coordinated_land_occupy and len(ACCOUNTS) > 1  # 多账号协同占领：所有账号完成后统一扫描并分配领地
 # ===========================
 
 print_and_flush(" 程序初始化中...")
@@ -110,11 +125,11 @@ print_and_flush(" 程序初始化中...")
 # 导入必要的模块
 try:
     print_and_flush(" 正在加载模块...")
-    from login import login
+    from token_store import ensure_session_token  # 统一的token存储：优先复用已保存的有效token
     # 领地资源相关功能
-    from landResources import get_all_land_resources, auto_occupy_resources_gradually
+    from landResources import get_all_land_resources, auto_occupy_resources_gradually, coordinated_occupy_resources
     # 邮件管理相关功能
-    from email_manager import display_emails, process_all_customs_emails, get_all_attachments, delete_claimed_and_expired_emails  
+    from email_manager import process_inbox
     # 好友相关功能
     from friend import auto_accept_friend_requests
     # 守家铜币相关功能
@@ -137,80 +152,9 @@ except ImportError as e:
     traceback_print_and_flush_exc()
     exit(1)
 
-def ensure_session_token(session: requests.Session, tel: str, pwd: str, token_file: str):
-    """
-    确保 session 中有有效的 token，并返回 user_id
-    添加了token有效性检查，避免重复登录
-    """
-    token = None
-    user_id = None
-    
-    # 首先尝试从文件读取保存的token
-    try:
-        if os.path.exists(token_file):
-            with open(token_file, 'r', encoding='utf-8') as f:
-                token_data = json.load(f)
-                token = token_data.get("token")
-                user_id = token_data.get("user_id")
-                print_and_flush(f" 从文件加载token: {token_file}")
-    except Exception as e:
-        print_and_flush(f" 读取token文件失败: {e}")
-    
-    # 检查token是否有效
-    if token and is_token_valid(session, token):
-        print_and_flush(" 检测到有效token，无需重新登录")
-        return session, token, user_id
-    else:
-        print_and_flush(" Token无效或不存在，正在登录...")
-    
-    # 如果token无效或不存在，则重新登录
-    print_and_flush(" 正在登录...")
-    try:
-        login_result = login(tel, pwd)
-        if login_result:
-            new_token = None
-            new_user_id = None
-
-            if isinstance(login_result, dict):
-                new_token = login_result.get("token") or (login_result.get("data") or {}).get("token")
-                new_user_id = login_result.get("user_id") or (login_result.get("data") or {}).get("user_id")
-            elif isinstance(login_result, (list, tuple)) and len(login_result) > 0:
-                new_token = login_result[0]
-                if len(login_result) > 1:
-                    new_user_id = login_result[1]
-            elif isinstance(login_result, str):
-                new_token = login_result
-
-            if not isinstance(new_user_id, (str, int)) or not str(new_user_id).strip():
-                print_and_flush(" 登录成功但未返回有效 user_id")
-                new_user_id = None
-
-            if new_token:
-                print_and_flush(f" 登录成功！")
-                # 保存token到文件
-                try:
-                    token_data = {
-                        "token": new_token,
-                        "user_id": new_user_id,
-                        "tel": tel,
-                        "timestamp": time.time()
-                    }
-                    with open(token_file, 'w', encoding='utf-8') as f:
-                        json.dump(token_data, f, ensure_ascii=False, indent=2)
-                    print_and_flush(f" Token已保存到: {token_file}")
-                except Exception as e:
-                    print_and_flush(f" 保存token失败: {e}")
-                return session, new_token, new_user_id
-            else:
-                print_and_flush(" 登录未返回有效 token")
-        else:
-            print_and_flush(" 登录失败")
-    except Exception as e:
-        print_and_flush(f" 登录过程出错: {e}")
-        traceback_print_and_flush_exc()
+# 协同占领模式下各账号召回完成后登记在这里，所有账号结束后统一分配领地
+_land_accounts = []
 
-    print_and_flush(" 无法获取 token，程序终止。")
-    return session, None, None
 
 def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
     """
@@ -226,6 +170,7 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
 
         print_and_flush(f" Token 已加载（前12位）：{str(token)[:12]}...")
         print_and_flush("-" * 50)
+        account_config = get_config().account(account_index)
 
         # ========== 擂台功能 ==========
         print_and_flush("\n" + "=" * 50)
@@ -235,8 +180,8 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
             # 查看擂台排行榜
             get_arena_rank_list(session, token)
             
-            # 自动兑换积分物品（传递账号索引）
-            auto_exchange_arena_goods(session, token, account_index=account_index)
+            # 自动兑换积分物品（传递当前账号的配置）
+            auto_exchange_arena_goods(session, token, account_index=account_index, settings=account_config)
         except Exception as e:
             print_and_flush(f" 擂台功能执行失败: {e}")
             traceback_print_and_flush_exc()
@@ -269,9 +214,8 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
             generals = get_general_list(session, token)
             if generals:
                 # 使用当前账号的配置而不是全局配置
-                account_config = ACCOUNTS[account_index].get("config", {})
-                max_trains = account_config.get("max_train_slots", config.get("max_train_slots", 2))
-                auto_train_generals(session, token, generals, max_trains=max_trains, account_index=account_index)
+                max_trains = account_config.max_train_slots
+                auto_train_generals(session, token, generals, max_trains=max_trains, account_index=account_index, settings=account_config)
             else:
                 print_and_flush("⚠️ 未能获取武将列表，跳过自动训练")
         except Exception as e:
@@ -287,8 +231,12 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
             # 获取所有领地资源并自动召回
             get_all_land_resources(session, token)
             
-            # 逐个占领资源（按当前账号配置的配比）
-            auto_occupy_resources_gradually(session, token, account_index)
+            if COORDINATED_LAND:
+                _land_accounts.append((account_index, session, token, account_config))
+                print_and_flush(" 协同占领模式：所有账号完成后统一分配领地")
+            else:
+                # 逐个占领资源（按当前账号配置的配比）
+                auto_occupy_resources_gradually(session, token, account_index, settings=account_config)
         except Exception as e:
             print_and_flush(f" 领地资源管理失败: {e}")
             traceback_print_and_flush_exc()
@@ -321,8 +269,7 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
         # 好友资源互赠
         try:
             # 使用当前账号的配置而不是全局配置
-            account_config = ACCOUNTS[account_index].get("config", {})
-            goodsid = account_config.get("default_goodsid", DEFAULT_GOODSID)  # 如果账号配置中没有，则使用全局默认值
+            goodsid = account_config.default_goodsid  # 如果账号配置中没有，则使用全局默认值
             print_and_flush(f" 自动选择资源: {GIFT_ITEMS.get(str(goodsid), '未知资源')}")
             
             if str(goodsid) in GIFT_ITEMS:
@@ -340,12 +287,8 @@ def run_account_tasks(account_index: int, tel: str, pwd: str, token_file: str):
         print_and_flush("📧 邮件处理")
         print_and_flush("=" * 50)
         try:
-            display_emails(session, token)
-            print_and_flush("\n 正在处理关卡抽奖邮件...")
-            process_all_customs_emails(session, token)
-            print_and_flush("\n📎 正在领取普通邮件附件...")
-            get_all_attachments(session, token)
-            delete_claimed_and_expired_emails(session, token)
+            # 展示、抽奖、领取、删除共用一次邮件列表
+            process_inbox(session, token, separate_lottery=True)
         except Exception as e:
             print_and_flush(f" 处理邮件失败: {e}")
             traceback_print_and_flush_exc()
@@ -397,6 +340,25 @@ def main():
             print_and_flush(f"\n⏳ 等待 5 秒后执行下一个账号...")
             time.sleep(5)
 
+    if COORDINATED_LAND and _land_accounts:
+        print_and_flush(f"\n{'='*60}")
+        install_tagged_streams()  # 分配到各账号的占领输出按账号加前缀
+        try:
+            coordinated_occupy_resources(_land_accounts, wrap=_run_tagged)
+        except Exception as e:
+            print_and_flush(f" 协同占领失败: {e}")
+            traceback_print_and_flush_exc()
+        # 协同占领在各账号领取日常任务奖励之后才进行，占领推进的任务进度在这里补领
+        for account_index, session, token, _ in _land_accounts:
+            def claim():
+                try:
+                    print_and_flush("🎁 协同占领后补领日常任务奖励")
+                    claim_all_available_rewards(session, token)
+                except Exception as e:
+                    print_and_flush(f" 领取日常任务奖励失败: {e}")
+                    traceback_print_and_flush_exc()
+            _run_tagged(account_index, claim)
+
     print_and_flush(f"\n{'='*60}")
     print_and_flush("🎉 核心功能任务执行完毕")
     print_and_flush(f"{'='*60}")
@@ -2,9 +2,10 @@ import re
 import time
 import json
 import requests
+from api_client import get_client, SUCCESS_VALUES
+from settings import get_account_settings
 from datetime import datetime
 import sys
-import json, sys, time
 
 def request_input(prompt, timeout=30000):
     """发送输入请求给前端，并等待回填"""
@@ -12,7 +13,7 @@ def request_input(prompt, timeout=30000):
     sys.stdout.flush()
     return input().strip()
 
-BASE_URL = "https://q-jiang.myprint.top/api/bas-generals"
+GENERALS_API = "bas-generals"
 _printed_failed_once = False
 
 def print_and_flush(*args, **kwargs):
@@ -143,16 +144,13 @@ def extract_soul(session: requests.Session, token: str, mugId: int) -> bool:
     """
     执行提魂操作
     """
-    url = "https://q-jiang.myprint.top/api/bas-generals/extractSoul"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     data = {"mugId": mugId, "code": None}
     
     try:
-        response = session.post(url, headers=headers, json=data, timeout=10)
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("bas-generals/extractSoul", data)
         
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             print_and_flush(f"✅ 提魂成功")
             return True
         else:
@@ -177,17 +175,15 @@ def _extract_generals_from_response(data):
 
 def get_general_list(session: requests.Session, token: str, debug: bool = False):
     try:
-        headers = {"Token": token, "Content-Type": "application/json"}
-        resp = session.post(f"{BASE_URL}/index", headers=headers, json={}, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        client = get_client(session, token)
+        data = client.post(f"{GENERALS_API}/index", {})
         if debug:
             print_and_flush(json.dumps(data, ensure_ascii=False, indent=2))
         generals = _extract_generals_from_response(data)
         if generals is None:
             code = data.get("code")
             success = data.get("success")
-            if (code is not None and str(code) == "200") or (success in [True, 1, "1", "true", "True"]):
+            if (code is not None and str(code) == "200") or (success in SUCCESS_VALUES):
                 generals = _extract_generals_from_response(data.get("data"))
         if not generals:
             nested = data.get("data") if isinstance(data, dict) else None
@@ -220,17 +216,14 @@ def get_user_info(session: requests.Session, token: str):
     """
     获取用户信息，包括VIP等级
     """
-    url = "https://q-jiang.myprint.top/api/bas-assets/userInfo"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     
     try:
-        response = session.post(url, headers=headers, json={})
-        response.raise_for_status()
-        result = response.json()
+        result = client.post("bas-assets/userInfo", {})
         
         # print_and_flush(f"📋 用户信息API响应: {result}")  # 添加调试信息
         
-        if result.get("success") and str(result.get("code")) == "200":
+        if client.is_success(result):
             user_data = result.get("data", {})
             # print_and_flush(f"📋 获取到的用户数据: {user_data}")  # 添加调试信息
             
@@ -247,7 +240,7 @@ def get_user_info(session: requests.Session, token: str):
         return None
 
 # ... existing code ...
-def train_general(session: requests.Session, token: str, mugId, type=None, index=0):
+def train_general(session: requests.Session, token: str, mugId, type=None, index=0, vip_rank=None):
     """
     训练武将
     :param session: requests session
@@ -255,15 +248,17 @@ def train_general(session: requests.Session, token: str, mugId, type=None, index
     :param mugId: 武将ID
     :param type: 训练类型 (1=普通, 2=VIP1+, 3=VIP5+), 如果为None则自动根据VIP等级确定
     :param index: 训练槽索引 (0-8)
+    :param vip_rank: VIP等级，调用方已知时传入可省去一次用户信息查询
     :return: True/False
     """
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     
     # 获取用户VIP信息以确定正确的type和index参数
-    user_info = get_user_info(session, token)
-    vip_rank = 0
-    if user_info:
-        vip_rank = user_info.get("vipRank", 0)
+    if vip_rank is None:
+        user_info = get_user_info(session, token)
+        vip_rank = 0
+        if user_info:
+            vip_rank = user_info.get("vipRank", 0)
     
     # 如果type未指定，则根据VIP等级自动设置
     if type is None:
@@ -299,10 +294,8 @@ def train_general(session: requests.Session, token: str, mugId, type=None, index
     
     for attempt in range(5):
         try:
-            resp = session.post(f"{BASE_URL}/trainGeneral", headers=headers, json=payload, timeout=10)
-            resp.raise_for_status()
-            data = resp.json()
-            if (str(data.get("code")) == "200") or (data.get("success") in [True, 1]):
+            data = client.post(f"{GENERALS_API}/trainGeneral", payload)
+            if client.is_success(data):
                 print_and_flush("✅ 训练请求成功")
                 return True
             msg = data.get("msg", "") or str(data)
@@ -324,14 +317,11 @@ def train_general(session: requests.Session, token: str, mugId, type=None, index
 # ... existing code ...
 
 def finish_train(session: requests.Session, token: str, mugId):
-    url = f"{BASE_URL}/finishTrain"
-    headers = {"Token": token, "Content-Type": "application/json"}
+    client = get_client(session, token)
     payload = {"mugId": mugId}
     try:
-        resp = session.post(url, headers=headers, json=payload, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        if (str(data.get("code")) == "200") or (data.get("success") in [True, 1]):
+        data = client.post(f"{GENERALS_API}/finishTrain", payload)
+        if client.is_success(data):
             print_and_flush(f"✅ 收获训练成功: {data.get('msg', '')}")
             return True
         else:
@@ -356,15 +346,8 @@ def show_train_slots(session: requests.Session, token: str, generals: list, max_
         if user_info:
             vip_rank = user_info.get("vipRank", 0)
         
-        # 从配置中获取最大训练槽位数
-        config_max_slots = 2  # 默认值
-        try:
-            with open("config.json", "r", encoding="utf-8") as f:
-                config = json.load(f)
-            # 尝试使用全局配置（但通常不会走到这一步，因为调用时会传入override）
-            config_max_slots = config.get("max_train_slots", config_max_slots)
-        except Exception:
-            pass  # 如果配置文件不存在，使用默认值
+        # 从全局配置中获取最大训练槽位数（通常不会走到这一步，因为调用时会传入override）
+        config_max_slots = get_account_settings().max_train_slots
         
         # 根据VIP等级和配置文件确定最大槽位数
         # VIP等级对应的最大训练槽位数
@@ -438,29 +421,22 @@ def get_trainable_generals(generals: list):
 
 
 # ... existing code ...
-def auto_train_generals(session: requests.Session, token: str, generals: list, max_trains: int = 3, account_index: int = None):
-    """自动训练武将，最多训练max_trains个"""
+def auto_train_generals(session: requests.Session, token: str, generals: list, max_trains: int = 3, account_index: int = None, settings=None):
+    """
+    自动训练武将，最多训练max_trains个
+    :param account_index: 账号索引，未传 settings 时用于获取对应账号的配置
+    :param settings: 账号配置（settings.AccountSettings）
+    """
     # 获取用户VIP信息以确定最大训练槽位数
     user_info = get_user_info(session, token)
     vip_rank = 0
     if user_info:
         vip_rank = user_info.get("vipRank", 0)
     
-    # 从配置中获取最大训练槽位数，优先使用当前账号的配置
-    config_max_slots = 2  # 默认值
-    try:
-        with open("config.json", "r", encoding="utf-8") as f:
-            config = json.load(f)
-        
-        # 如果提供了账号索引，则使用该账号的配置
-        if account_index is not None and 0 <= account_index < len(config.get("accounts", [])):
-            config_max_slots = config["accounts"][account_index]["config"].get("max_train_slots", config_max_slots)
-        else:
-            # 如果没有提供账号索引或索引无效，使用全局配置
-            config_max_slots = config.get("max_train_slots", config_max_slots)
-    except Exception as e:
-        print_and_flush(f"⚠️ 读取配置文件失败: {e}，使用默认配置")
-        pass  # 如果配置文件不存在，使用默认值
+    # 最大训练槽位数（账号配置优先，其次全局配置）
+    if settings is None:
+        settings = get_account_settings(account_index)
+    config_max_slots = settings.max_train_slots
     
     # 根据VIP等级和配置文件确定最大槽位数
     # VIP等级对应的最大训练槽位数
@@ -537,7 +513,7 @@ def auto_train_generals(session: requests.Session, token: str, generals: list, m
             slot_display_number = slot_idx + 1
             print_and_flush(f"➡️ 放入训练槽{slot_display_number}")
             # 根据VIP等级自动确定type
-            train_general(session, token, mugId, index=slot_idx)
+            train_general(session, token, mugId, index=slot_idx, vip_rank=vip_rank)
         else:
             print_and_flush(f"⚠️ 无法找到空闲槽位 {i+1}，跳过训练")
 # ... existing code ...
\ No newline at end of file
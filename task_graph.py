@@ -0,0 +1,100 @@
+# task_graph.py
+# 功能：单账号内的任务依赖图执行器
+# 每个任务声明自己依赖哪些任务，依赖全部结束后才会开始；互不依赖的任务并行执行
+import contextvars
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 当前线程正在执行的任务名（用于给并行任务的输出加前缀）
+current_task = contextvars.ContextVar("current_task", default="")
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+class TaskGraph:
+    """
+    任务依赖图
+    依赖只约束先后顺序：某个任务出错时会打印异常并记为失败，依赖它的任务仍然照常执行，
+    与原先逐个 try/except 顺序执行的行为保持一致
+    """
+
+    def __init__(self):
+        self._tasks = {}   # name -> (func, deps)
+        self._order = []   # 添加顺序，串行执行时按此顺序
+        self.results = {}  # name -> 任务返回值
+        self.errors = {}   # name -> 异常
+        self._lock = threading.Lock()
+
+    def add(self, name: str, func, deps=()):
+        """
+        添加任务
+        :param name: 任务名（唯一）
+        :param func: 无参可调用对象，返回值保存到 results[name]
+        :param deps: 依赖的任务名列表，必须是已添加的任务
+        """
+        if name in self._tasks:
+            raise ValueError(f"任务重复: {name}")
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"任务 {name} 依赖了未定义的任务 {dep}")
+        self._tasks[name] = (func, tuple(deps))
+        self._order.append(name)
+        return self
+
+    def result(self, name: str, default=None):
+        """获取已完成任务的返回值"""
+        with self._lock:
+            return self.results.get(name, default)
+
+    def _run_task(self, name: str):
+        func, _ = self._tasks[name]
+        token = current_task.set(name)
+        try:
+            value = func()
+            with self._lock:
+                self.results[name] = value
+        except Exception as e:
+            with self._lock:
+                self.errors[name] = e
+            print_and_flush(f" 任务 [{name}] 出错: {e}")
+            traceback.print_exc()
+            sys.stdout.flush()
+        finally:
+            current_task.reset(token)
+
+    def run(self, max_workers: int = 4):
+        """
+        执行所有任务
+        :param max_workers: 同时执行的任务数上限，1 表示按添加顺序逐个执行
+        :return: results 字典
+        """
+        if max_workers <= 1:
+            for name in self._order:
+                self._run_task(name)
+            return self.results
+
+        remaining = {name: set(deps) for name, (_, deps) in self._tasks.items()}
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task") as executor:
+            while remaining or running:
+                ready = [name for name in self._order if name in remaining and not remaining[name]]
+                for name in ready:
+                    del remaining[name]
+                    # 复制调用方的上下文，账号标签等 contextvars 能带入工作线程
+                    ctx = contextvars.copy_context()
+                    running[executor.submit(ctx.run, self._run_task, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished = running.pop(future)
+                    for deps in remaining.values():
+                        deps.discard(finished)
+        return self.results
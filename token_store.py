@@ -0,0 +1,228 @@
+# token_store.py
+# 功能：统一的登录 token 存储
+# 按账号（手机号）保存 token、user_id 和签发时间；启动时先探测已保存 token 是否仍然有效，
+# 有效则免登录，无效再登录；运行中接口返回登录失效时自动重新登录并替换 token
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import requests
+from api_client import get_client, set_reauth_handler
+from login import login
+
+TOKEN_STORE_FILE = "token_store.json"
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+def is_token_valid(session: requests.Session, token: str) -> bool:
+    """
+    检查token是否有效
+    通过访问一个需要认证的接口来判断；使用用户信息接口，探测结果同时写入响应缓存供后续模块使用
+    """
+    if not token:
+        return False
+
+    client = get_client(session, token)
+
+    try:
+        result = client.post("bas-assets/userInfo", {}, fresh=True, reauth=False)
+
+        # 如果返回code为200且success为True，则token有效
+        if client.is_success(result):
+            return True
+        # 如果返回需要重新登录的错误码或消息
+        elif str(result.get("code")) in ["401", "403"] or "登录" in str(result.get("msg", "")):
+            return False
+        # 其他情况认为token有效
+        return True
+    except Exception:
+        # 网络异常等情况下，默认认为token可能无效
+        return False
+
+
+class TokenStore:
+    """
+    token 存储（线程安全）
+    文件结构: {"<手机号>": {"token": ..., "user_id": ..., "issued_at": 签发时间戳, "validated_at": 最近验证时间戳}}
+    """
+
+    def __init__(self, path: str = TOKEN_STORE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._account_locks = {}
+        self._credentials = {}   # tel -> pwd（仅保存在内存中，用于运行中自动重新登录）
+        self._token_owner = {}   # token -> tel
+        self._data = None
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self._data = {}
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        loaded = json.load(f)
+                    if isinstance(loaded, dict):
+                        self._data = loaded
+            except Exception as e:
+                print_and_flush(f"⚠️ 读取token存储失败: {e}")
+        return self._data
+
+    def _save(self):
+        # 先写临时文件再替换，避免并发账号或中途退出写坏文件
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print_and_flush(f"⚠️ 保存token失败: {e}")
+
+    def _account_lock(self, tel: str):
+        with self._lock:
+            return self._account_locks.setdefault(tel, threading.Lock())
+
+    def get(self, tel: str) -> dict:
+        """读取账号保存的记录，没有时返回空字典"""
+        with self._lock:
+            return dict(self._load().get(tel) or {})
+
+    def put(self, tel: str, token: str, user_id=None, issued_at: float = None):
+        """保存账号的新 token"""
+        with self._lock:
+            now = time.time()
+            self._load()[tel] = {
+                "token": token,
+                "user_id": user_id,
+                "issued_at": issued_at or now,
+                "validated_at": now,
+            }
+            self._token_owner[token] = tel
+            self._save()
+
+    def mark_valid(self, tel: str):
+        with self._lock:
+            record = self._load().get(tel)
+            if record:
+                record["validated_at"] = time.time()
+                self._token_owner[record.get("token")] = tel
+                self._save()
+
+    def owner(self, token: str):
+        """token 所属账号的手机号，不是本程序登录或加载的 token 时返回 None"""
+        with self._lock:
+            return self._token_owner.get(token)
+
+    def import_legacy(self, tel: str, token_file: str):
+        """
+        旧版各脚本各自保存的 user_token_*.json 迁移到统一存储（存储中已有该账号时不覆盖）
+        """
+        if not token_file or not os.path.exists(token_file):
+            return
+        with self._lock:
+            if tel in self._load():
+                return
+        try:
+            with open(token_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            if legacy.get("tel") and str(legacy["tel"]) != str(tel):
+                # 旧版文件按账号序号命名，账号顺序调整后可能是其他账号的
+                print_and_flush(f" {token_file} 属于其他账号，跳过导入")
+                return
+            if legacy.get("token"):
+                self.put(tel, legacy["token"], legacy.get("user_id"), legacy.get("timestamp"))
+                print_and_flush(f" 已从 {token_file} 导入token")
+        except Exception as e:
+            print_and_flush(f" 读取token文件失败: {e}")
+
+    def _login(self, tel: str, pwd: str, session=None):
+        """登录并保存，返回 (token, user_id)"""
+        login_result = login(tel, pwd, session=session)
+        if not login_result:
+            print_and_flush(" 登录失败")
+            return None, None
+        new_token = login_result.get("token")
+        new_user_id = login_result.get("user_id")
+        if not isinstance(new_user_id, (str, int)) or not str(new_user_id).strip():
+            print_and_flush(" 登录成功但未返回有效 user_id")
+            new_user_id = None
+        if not new_token:
+            print_and_flush(" 登录未返回有效 token")
+            return None, None
+        self.put(tel, new_token, new_user_id)
+        return new_token, new_user_id
+
+    def ensure(self, session, tel: str, pwd: str, legacy_file: str = None):
+        """
+        获取账号的有效 token：已保存且探测有效则直接使用，否则重新登录
+        :return: (token, user_id)，失败时为 (None, None)
+        """
+        with self._lock:
+            self._credentials[tel] = pwd
+        with self._account_lock(tel):
+            self.import_legacy(tel, legacy_file)
+            record = self.get(tel)
+            token = record.get("token")
+            if token and is_token_valid(session, token):
+                age_hours = (time.time() - record.get("issued_at", time.time())) / 3600
+                print_and_flush(f" 检测到有效token（{age_hours:.1f} 小时前签发），无需重新登录")
+                self.mark_valid(tel)
+                return token, record.get("user_id")
+            if token:
+                print_and_flush(" Token已失效，正在重新登录...")
+            else:
+                print_and_flush(" 正在登录...")
+            return self._login(tel, pwd, session=session)
+
+    def relogin(self, old_token: str):
+        """
+        运行中 token 失效时由客户端调用：重新登录并返回新 token
+        多个线程同时遇到同一账号失效时只登录一次，其余直接拿到新 token
+        """
+        with self._lock:
+            tel = self._token_owner.get(old_token)
+            pwd = self._credentials.get(tel)
+        if not tel or pwd is None:
+            return None
+        with self._account_lock(tel):
+            current = self.get(tel).get("token")
+            if current and current != old_token:
+                return current
+            print_and_flush(" 登录状态失效，正在自动重新登录...")
+            new_token, _ = self._login(tel, pwd)
+            return new_token
+
+
+_store = TokenStore()
+set_reauth_handler(_store.relogin)
+
+
+def get_token_store() -> TokenStore:
+    return _store
+
+
+def ensure_session_token(session: requests.Session, tel: str, pwd: str, token_file: str = None):
+    """
+    确保 session 中有有效的 token，并返回 (session, token, user_id)
+    :param token_file: 旧版 token 文件，存在时首次运行会导入统一存储
+    """
+    try:
+        token, user_id = _store.ensure(session, tel, pwd, legacy_file=token_file)
+        if token:
+            get_client(session, token)
+            return session, token, user_id
+    except Exception as e:
+        print_and_flush(f" 登录过程出错: {e}")
+        traceback.print_exc()
+        sys.stdout.flush()
+
+    print_and_flush(" 无法获取 token，程序终止。")
+    return session, None, None
@@ -0,0 +1,174 @@
+# unprocessable_store.py
+# 功能：无法处理邮件的记录（按账号分文件保存）
+# 每个账号一个追加写入的 JSON Lines 文件，每行一次添加或移除；首次用到该账号时才读取，
+# 邮件已过期或记录超过保留时间后自动淘汰，失效的行多了以后整理重写一次
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+UNPROCESSABLE_DIR = "unprocessable_emails"
+DEFAULT_TTL_HOURS = 168       # 记录默认保留7天，之后重新尝试处理
+COMPACT_MIN_LINES = 200       # 文件行数超过有效记录的2倍且不少于此值时整理重写
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+def _expired_day(invalid_day) -> bool:
+    """邮件过期日期已到（与 email_manager.is_email_expired 的判断一致）"""
+    if not invalid_day:
+        return False
+    try:
+        return datetime.strptime(invalid_day, "%Y-%m-%d").date() <= datetime.now().date()
+    except ValueError:
+        return False
+
+
+class UnprocessableEmailStore:
+    """
+    单个账号的无法处理邮件记录（线程安全）
+    文件每行: {"op": "add", "id": 邮件ID, "ts": 记录时间戳, "invalid_day": 邮件过期日期} 或 {"op": "del", "id": 邮件ID}
+    修改先留在内存中，flush() 时一次追加到文件
+    """
+
+    def __init__(self, path: str, ttl_hours: float = DEFAULT_TTL_HOURS):
+        self.path = path
+        self.ttl = float(ttl_hours) * 3600
+        self._lock = threading.Lock()
+        self._entries = None   # {邮件ID: {"ts": ..., "invalid_day": ...}}
+        self._lines = 0        # 文件当前行数
+        self._pending = []     # 尚未写入文件的行
+        self._rewrite = False  # 下次 flush 时整理重写整个文件
+
+    def _evictable(self, entry: dict, now: float) -> bool:
+        return now - entry.get("ts", 0) > self.ttl or _expired_day(entry.get("invalid_day"))
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue  # 中途退出时可能留下不完整的最后一行
+                            self._lines += 1
+                            if record.get("op") == "add":
+                                self._entries[record["id"]] = {"ts": record.get("ts", 0), "invalid_day": record.get("invalid_day")}
+                            else:
+                                self._entries.pop(record.get("id"), None)
+            except Exception as e:
+                print_and_flush(f"⚠️ 读取无法处理邮件记录失败: {e}")
+            now = time.time()
+            for email_id in [k for k, entry in self._entries.items() if self._evictable(entry, now)]:
+                del self._entries[email_id]
+            if self._lines >= max(COMPACT_MIN_LINES, 2 * len(self._entries)):
+                self._rewrite = True
+        return self._entries
+
+    def contains(self, email_id) -> bool:
+        with self._lock:
+            entry = self._load().get(email_id)
+            if entry is None:
+                return False
+            if self._evictable(entry, time.time()):
+                del self._entries[email_id]
+                self._pending.append({"op": "del", "id": email_id})
+                return False
+            return True
+
+    def add(self, email_id, invalid_day: str = None):
+        with self._lock:
+            entry = {"ts": time.time(), "invalid_day": invalid_day or None}
+            self._load()[email_id] = entry
+            self._pending.append(dict(entry, op="add", id=email_id))
+
+    def discard(self, email_id) -> bool:
+        """移除记录，原来没有时返回 False"""
+        with self._lock:
+            if self._load().pop(email_id, None) is None:
+                return False
+            self._pending.append({"op": "del", "id": email_id})
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._load().clear()
+            self._pending = []
+            self._rewrite = True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def flush(self) -> int:
+        """
+        把内存中的修改写入文件（需要整理时重写为只含有效记录的文件）
+        :return: 写入的行数
+        """
+        with self._lock:
+            if self._entries is None or (not self._pending and not self._rewrite):
+                return 0
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if self._rewrite:
+                    lines = [dict(entry, op="add", id=email_id) for email_id, entry in self._entries.items()]
+                    tmp_path = f"{self.path}.tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.writelines(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+                    os.replace(tmp_path, self.path)
+                    self._lines = len(lines)
+                else:
+                    # 同一邮件在一批中多次添加/移除时只写最后一次
+                    lines = list({line["id"]: line for line in self._pending}.values())
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+                    self._lines += len(lines)
+                self._pending = []
+                self._rewrite = self._lines >= max(COMPACT_MIN_LINES, 2 * len(self._entries))
+                return len(lines)
+            except Exception as e:
+                print_and_flush(f"⚠️ 保存无法处理邮件记录失败: {e}")
+                return 0
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _ttl_hours() -> float:
+    try:
+        from settings import get_config
+        return get_config().unprocessable_email_ttl_hours
+    except Exception:
+        return DEFAULT_TTL_HOURS
+
+
+def get_unprocessable_store(account: str) -> UnprocessableEmailStore:
+    """
+    获取账号的无法处理邮件记录（首次使用时按 config.json 的 unprocessable_email_ttl_hours 创建）
+    :param account: 账号标识（手机号），未知账号共用 "_shared"（创建时提示一次）
+    """
+    shared = not account
+    account = account or "_shared"
+    with _stores_lock:
+        store = _stores.get(account)
+        if store is None:
+            if shared:
+                # 不属于任何账号的记录会在所有未知账号之间互相影响
+                print_and_flush("⚠️ 无法确定邮件所属账号，无法处理邮件记录将保存到共用文件 _shared.jsonl")
+            filename = re.sub(r"[^0-9A-Za-z_-]", "_", account) + ".jsonl"
+            store = UnprocessableEmailStore(os.path.join(UNPROCESSABLE_DIR, filename), _ttl_hours())
+            _stores[account] = store
+        return store
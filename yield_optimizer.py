@@ -0,0 +1,275 @@
+# yield_optimizer.py
+# 功能：按实测产出自动计算领地目标配比
+# 每轮占领前读取账号的资源数量（粮食、铜钱、银票等），占领结束后连同此后持有的各类领地数量一起记录，
+# 用所有账号的历史记录拟合"每块领地每小时产出多少资源"，再按账号当前的需求
+# （兑换银票缺的粮食、配置的目标数量）逐块分配领地，使每小时产出的价值最大
+import json
+import os
+import sys
+import threading
+import time
+
+YIELD_HISTORY_FILE = "yield_history.json"
+RESOURCE_TYPES = ("农田", "森林", "草原", "山丘", "沼泽")
+MAX_RECORDS_PER_ACCOUNT = 60
+MIN_PAIR_HOURS = 0.25  # 两次记录间隔太短时资源变化几乎全是噪声，不参与拟合
+MAX_PAIR_HOURS = 48
+
+# 默认参数，可在 config.json 的 resource_optimizer 中覆盖
+DEFAULT_OPTIMIZER = {
+    "horizon_hours": 24,      # 按多长时间的产出计算需求是否已满足
+    "values": {               # 每单位资源的价值
+        "armyProvisions": 1.0,
+        "copper": 0.01,
+        "silverTicket": 100.0,
+    },
+    "targets": {},            # 额外的资源目标数量，如 {"copper": 2000000}，达到后只按 surplus_factor 计价
+    "surplus_factor": 0.1,    # 超出需求的产出按原价值的多少计算
+    "prior_yield": {          # 没有历史数据时假定的每块领地每小时产出
+        "农田": {"armyProvisions": 1.0},
+    },
+    "prior_weight": 1.0,      # 先验的权重（相当于多少"块·小时"的观测）
+}
+
+
+def print_and_flush(*args, **kwargs):
+    try:
+        if sys.stdout and not sys.stdout.closed:
+            print(*args, **kwargs, flush=True)
+    except (ValueError, OSError):
+        pass
+
+
+def _merged_settings(settings: dict = None) -> dict:
+    merged = dict(DEFAULT_OPTIMIZER)
+    for key, value in (settings or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+class YieldHistory:
+    """
+    各账号的资源数量与占领情况记录（线程安全）
+    文件结构: {"<手机号>": [{"ts": 时间戳, "fields": {资源字段: 数量}, "counts": {领地类型: 块数}}]}
+    counts 是记录之后（本轮占领结束后）持有的领地，下一次记录前的产出按它计算
+    """
+
+    def __init__(self, path: str = YIELD_HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = None
+        self.version = 0  # 每次记录加一，拟合结果按版本缓存
+
+    def _load(self) -> dict:
+        if self._data is None:
+            self._data = {}
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        loaded = json.load(f)
+                    if isinstance(loaded, dict):
+                        self._data = loaded
+            except Exception as e:
+                print_and_flush(f"⚠️ 读取产出记录失败: {e}")
+        return self._data
+
+    def record(self, entries, ts: float = None):
+        """
+        记录各账号当前的资源数量和占领的各类领地数量（一批只写一次文件）
+        距该账号上一条记录不到 MIN_PAIR_HOURS 时不新增记录（这样的间隔不参与拟合，
+        守护模式下每次武将到达都会占领，逐次记录会把有用的历史挤出 MAX_RECORDS_PER_ACCOUNT），
+        只把上一条记录的领地块数更新为最新的，此后的产出按最新持有的领地计算
+        :param entries: [(账号标识, {资源字段: 数量}, {领地类型: 块数})]
+        """
+        ts = ts or time.time()
+        with self._lock:
+            data = self._load()
+            for account_key, fields, counts in entries:
+                records = data.setdefault(account_key, [])
+                if records and ts - records[-1]["ts"] < MIN_PAIR_HOURS * 3600:
+                    records[-1]["counts"] = counts
+                    continue
+                records.append({"ts": ts, "fields": fields, "counts": counts})
+                del records[:-MAX_RECORDS_PER_ACCOUNT]
+            self.version += 1
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print_and_flush(f"⚠️ 保存产出记录失败: {e}")
+
+    def samples(self):
+        """
+        相邻两次记录组成一个观测：前一次的各类领地块数 × 间隔小时数 -> 各资源的变化量
+        变化量是 userInfo 的差值，其中扣掉了期间的消耗（兑换银票、赠送、训练等），拟合出的产出偏低；
+        减少了的资源字段一定有消耗，不参与该观测
+        :return: [(各类型的块·小时列表, {资源字段: 变化量})]
+        """
+        with self._lock:
+            accounts = [list(records) for records in self._load().values()]
+        samples = []
+        for records in accounts:
+            for prev, cur in zip(records, records[1:]):
+                hours = (cur["ts"] - prev["ts"]) / 3600
+                if not MIN_PAIR_HOURS <= hours <= MAX_PAIR_HOURS:
+                    continue
+                plot_hours = [prev["counts"].get(name, 0) * hours for name in RESOURCE_TYPES]
+                deltas = {
+                    field: cur["fields"][field] - prev["fields"][field]
+                    for field in cur["fields"]
+                    if field in prev["fields"] and cur["fields"][field] >= prev["fields"][field]
+                }
+                samples.append((plot_hours, deltas))
+        return samples
+
+
+def fit_yields(samples, fields, prior_yield: dict, prior_weight: float) -> dict:
+    """
+    拟合每块领地每小时的产出：对每个资源字段求非负、向先验收缩的最小二乘
+    （5个变量的坐标下降，几十条观测在毫秒内完成；从未占领过的类型保持先验值）
+    :return: {领地类型: {资源字段: 每小时产出}}
+    """
+    n = len(RESOURCE_TYPES)
+    yields = {name: {} for name in RESOURCE_TYPES}
+    for field in fields:
+        rows = [(plot_hours, deltas[field]) for plot_hours, deltas in samples if field in deltas]
+        prior = [float(prior_yield.get(name, {}).get(field, 0)) for name in RESOURCE_TYPES]
+        coef = list(prior)
+        if rows:
+            # 先算好 X'X 和 X'y，迭代时只做 5x5 的运算
+            gram = [[sum(x[t] * x[k] for x, _ in rows) for k in range(n)] for t in range(n)]
+            xy = [sum(x[t] * y for x, y in rows) for t in range(n)]
+            for _ in range(50):
+                for t in range(n):
+                    # 去掉第 t 个变量后的残差与其观测的内积
+                    dot = xy[t] - sum(gram[t][k] * coef[k] for k in range(n) if k != t)
+                    coef[t] = max(0.0, (dot + prior_weight * prior[t]) / (gram[t][t] + prior_weight))
+        for t, name in enumerate(RESOURCE_TYPES):
+            if coef[t] > 0:
+                yields[name][field] = coef[t]
+    return yields
+
+
+def account_needs(fields: dict, targets: dict) -> dict:
+    """
+    账号各资源的需求量（None 表示不限）
+    粮食：按 market.auto_change_silver_ticket 的规则，保留铜钱以外的铜钱全部兑换银票还缺多少粮食
+    """
+    from market import SILVER_TICKET_COPPER_RESERVE, SILVER_TICKET_COPPER_COST
+
+    needs = {}
+    copper = fields.get("copper")
+    provisions = fields.get("armyProvisions")
+    if copper is not None and provisions is not None:
+        exchangeable = max(0, copper - SILVER_TICKET_COPPER_RESERVE) // SILVER_TICKET_COPPER_COST
+        needs["armyProvisions"] = max(0, exchangeable - provisions)
+    for field, target in (targets or {}).items():
+        if field in fields:
+            needs[field] = max(0, target - fields[field])
+    return needs
+
+
+def solve_distribution(total_slots: int, yields: dict, values: dict, needs: dict,
+                       horizon_hours: float, surplus_factor: float):
+    """
+    逐块分配领地：每次选择在 horizon_hours 内边际价值最高的类型（需求满足前按原价计价，之后打折），
+    价值函数对每种资源都是凹的，贪心分配即为最优
+    :return: {领地类型: 块数}，所有类型都没有可计价产出时返回 None
+    """
+    remaining = {field: need for field, need in needs.items()}
+    distribution = {name: 0 for name in RESOURCE_TYPES}
+    for _ in range(total_slots):
+        best_name, best_value = None, 0.0
+        for name in RESOURCE_TYPES:
+            value = 0.0
+            for field, per_hour in yields.get(name, {}).items():
+                produced = per_hour * horizon_hours
+                unit_value = values.get(field, 0)
+                need = remaining.get(field)
+                if need is None:
+                    value += produced * unit_value
+                else:
+                    useful = min(produced, need)
+                    value += useful * unit_value + (produced - useful) * unit_value * surplus_factor
+            if value > best_value:
+                best_name, best_value = name, value
+        if best_name is None:
+            return None if not any(distribution.values()) else distribution
+        distribution[best_name] += 1
+        for field, per_hour in yields[best_name].items():
+            if remaining.get(field) is not None:
+                remaining[field] = max(0, remaining[field] - per_hour * horizon_hours)
+    return distribution
+
+
+class YieldOptimizer:
+    """按实测产出为多个账号批量计算目标配比（拟合结果按记录版本缓存，所有账号共用）"""
+
+    def __init__(self, settings: dict = None, history: YieldHistory = None):
+        self.settings = _merged_settings(settings)
+        self.history = history or YieldHistory()
+        self._fitted = None  # (记录版本, 拟合结果)
+
+    def yields(self) -> dict:
+        version = self.history.version
+        if self._fitted is None or self._fitted[0] != version:
+            fitted = fit_yields(
+                self.history.samples(),
+                list(self.settings["values"]),
+                self.settings["prior_yield"],
+                float(self.settings["prior_weight"]),
+            )
+            self._fitted = (version, fitted)
+        return self._fitted[1]
+
+    def record(self, entries, ts: float = None):
+        """
+        占领结束后记录各账号的资源数量和此后持有的各类领地块数
+        :param entries: [(账号手机号, 占领前读取的资源数量, 占领后的各类领地块数)]
+        :param ts: 读取资源数量的时间
+        """
+        self.history.record(entries, ts)
+
+    def optimize(self, states):
+        """
+        :param states: [(账号手机号, 当前资源数量 {字段: 数量}, 领地总数)]
+        :return: {账号手机号: 目标配比}，无法计算的账号不在结果中
+        """
+        yields = self.yields()
+        results = {}
+        for key, fields, total_slots in states:
+            distribution = solve_distribution(
+                total_slots,
+                yields,
+                self.settings["values"],
+                account_needs(fields, self.settings["targets"]),
+                float(self.settings["horizon_hours"]),
+                float(self.settings["surplus_factor"]),
+            )
+            if distribution:
+                results[key] = distribution
+        return results
+
+
+_optimizer = None
+_optimizer_lock = threading.Lock()
+
+
+def get_yield_optimizer() -> YieldOptimizer:
+    """获取全局共享的优化器（首次使用时按 config.json 的 resource_optimizer 配置创建）"""
+    global _optimizer
+    with _optimizer_lock:
+        if _optimizer is None:
+            settings = None
+            try:
+                from settings import get_config
+                settings = get_config().resource_optimizer
+            except Exception:
+                pass
+            _optimizer = YieldOptimizer(settings)
+        return _optimizer